@@ -0,0 +1,341 @@
+"""Benchmarks for the plugin against an in-process fake ledger.
+
+Run with ``python -m benchmarks.run --help`` from the repository root.
+Results are written as one JSON object per line, e.g.::
+
+    {"benchmark": "save_many", "params": {"batch_size": 100,
+     "concurrency": 10, "latency": 0.005}, "ops": 100,
+     "seconds": 0.41, "ops_per_second": 243.9, "requests": 100}
+
+where ``seconds`` is the best time of the repeated runs and
+``requests`` is the number of requests each run made to the ledger.
+"""
+
+import argparse
+import json
+import sys
+from collections import OrderedDict
+from functools import partial
+from itertools import count
+from random import Random
+from time import perf_counter
+
+from coalaip_bigchaindb import Plugin, builder
+from coalaip_bigchaindb.utils import order_transactions
+from tests.ledger import FakeLedger, FakeLedgerTransport
+
+
+FAKE_NODE = 'http://fake-ledger:9984'
+
+# BigchainDB transactions carry no nonce, so every entity saved needs
+# distinct data to get a distinct id
+_entity_numbers = count()
+
+
+def make_plugin(ledger, **options):
+    transport_class = partial(FakeLedgerTransport, ledger=ledger)
+    return Plugin(FAKE_NODE, transport_class=transport_class, **options)
+
+
+def make_entity_data():
+    return {'type': 'CreativeWork',
+            'name': 'Work {}'.format(next(_entity_numbers))}
+
+
+def build_chain(ledger, users, length):
+    """Write an entity with a history of :attr:`length` transactions
+    (one CREATE followed by TRANSFERs back and forth between
+    :attr:`users`) without injecting latency.
+
+    Returns:
+        tuple: The entity's asset id and its current owner
+    """
+    latency, ledger.latency = ledger.latency, 0
+    try:
+        plugin = make_plugin(ledger, tip_cache_size=1)
+        asset_id = plugin.save(make_entity_data(), user=users[0])
+        for index in range(1, length):
+            plugin.transfer(asset_id, from_user=users[(index - 1) % 2],
+                            to_user=users[index % 2])
+    finally:
+        ledger.latency = latency
+    return asset_id, users[(length - 1) % 2]
+
+
+def timed(run, *, repeat, ledger=None, setup=None):
+    """Time :attr:`run` (after an untimed :attr:`setup`, if given) over
+    :attr:`repeat` runs.
+
+    Returns:
+        tuple: The best time, in seconds, and the number of ledger
+        requests made by the best run
+    """
+    best = None
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        requests = ledger.requests if ledger else 0
+        start = perf_counter()
+        run(*args)
+        elapsed = perf_counter() - start
+        if best is None or elapsed < best[0]:
+            best = (elapsed,
+                    ledger.requests - requests if ledger else 0)
+    return best
+
+
+def result(benchmark, params, ops, timing):
+    seconds, requests = timing
+    return OrderedDict([
+        ('benchmark', benchmark),
+        ('params', params),
+        ('ops', ops),
+        ('seconds', seconds),
+        ('ops_per_second', ops / seconds if seconds else None),
+        ('requests', requests),
+    ])
+
+
+def bench_save(args, users):
+    for batch_size in args.batch_sizes:
+        ledger = FakeLedger(latency=args.latency)
+        plugin = make_plugin(ledger)
+
+        def run():
+            for _ in range(batch_size):
+                plugin.save(make_entity_data(), user=users[0])
+
+        yield result('save',
+                     {'batch_size': batch_size, 'latency': args.latency},
+                     batch_size,
+                     timed(run, repeat=args.repeat, ledger=ledger))
+
+
+def bench_save_many(args, users):
+    for batch_size in args.batch_sizes:
+        for concurrency in args.concurrency:
+            ledger = FakeLedger(latency=args.latency)
+            plugin = make_plugin(ledger, pool_maxsize=concurrency)
+
+            def setup():
+                return ([make_entity_data() for _ in range(batch_size)],)
+
+            def run(entities_data):
+                plugin.save_many(entities_data, user=users[0],
+                                 max_workers=concurrency)
+
+            yield result('save_many',
+                         {'batch_size': batch_size,
+                          'concurrency': concurrency,
+                          'latency': args.latency},
+                         batch_size,
+                         timed(run, repeat=args.repeat, ledger=ledger,
+                               setup=setup))
+
+
+def bench_load(args, users):
+    for batch_size in args.batch_sizes:
+        for concurrency in args.concurrency:
+            ledger = FakeLedger(latency=args.latency)
+            plugin = make_plugin(ledger, pool_maxsize=concurrency)
+            saved = plugin.save_many(
+                [make_entity_data() for _ in range(batch_size)],
+                user=users[0])
+            persist_ids = [item.result for item in saved]
+
+            def run():
+                plugin.load_many(persist_ids, max_workers=concurrency)
+
+            yield result('load',
+                         {'batch_size': batch_size,
+                          'concurrency': concurrency,
+                          'latency': args.latency},
+                         batch_size,
+                         timed(run, repeat=args.repeat, ledger=ledger))
+
+
+def bench_transfer_many(args, users):
+    for batch_size in args.batch_sizes:
+        for concurrency in args.concurrency:
+            ledger = FakeLedger(latency=args.latency)
+            plugin = make_plugin(ledger, pool_maxsize=concurrency)
+
+            def setup():
+                saved = plugin.save_many(
+                    [make_entity_data() for _ in range(batch_size)],
+                    user=users[0], max_workers=concurrency)
+                return ([(item.result, None, users[0], users[1])
+                         for item in saved],)
+
+            def run(transfers):
+                plugin.transfer_many(transfers, max_workers=concurrency)
+
+            yield result('transfer_many',
+                         {'batch_size': batch_size,
+                          'concurrency': concurrency,
+                          'latency': args.latency},
+                         batch_size,
+                         timed(run, repeat=args.repeat, ledger=ledger,
+                               setup=setup))
+
+
+def bench_transfer(args, users):
+    for history_length in args.history_lengths:
+        ledger = FakeLedger(latency=args.latency)
+        plugin = make_plugin(ledger)
+        asset_id, owner = build_chain(ledger, users, history_length)
+        owners = [owner]
+
+        def run():
+            from_user = owners[-1]
+            to_user = users[1] if from_user is users[0] else users[0]
+            plugin.transfer(asset_id, from_user=from_user, to_user=to_user)
+            owners.append(to_user)
+
+        yield result('transfer',
+                     {'history_length': history_length,
+                      'latency': args.latency},
+                     1,
+                     timed(run, repeat=args.repeat, ledger=ledger))
+
+
+def bench_get_history(args, users):
+    for history_length in args.history_lengths:
+        ledger = FakeLedger(latency=args.latency)
+        plugin = make_plugin(ledger)
+        asset_id, _ = build_chain(ledger, users, history_length)
+
+        yield result('get_history',
+                     {'history_length': history_length,
+                      'latency': args.latency},
+                     1,
+                     timed(lambda: plugin.get_history(asset_id),
+                           repeat=args.repeat, ledger=ledger))
+
+
+def bench_iter_history(args, users):
+    for history_length in args.history_lengths:
+        ledger = FakeLedger(latency=args.latency)
+        plugin = make_plugin(ledger)
+        asset_id, _ = build_chain(ledger, users, history_length)
+
+        def run():
+            for _ in plugin.iter_history(asset_id):
+                pass
+
+        yield result('iter_history',
+                     {'history_length': history_length,
+                      'latency': args.latency},
+                     1,
+                     timed(run, repeat=args.repeat, ledger=ledger))
+
+
+def bench_order_transactions(args, users):
+    shuffler = Random(args.seed)
+    for history_length in args.history_lengths:
+        ledger = FakeLedger()
+        plugin = make_plugin(ledger)
+        asset_id, _ = build_chain(ledger, users, history_length)
+        transactions = plugin.driver.transactions.get(asset_id=asset_id)
+
+        def setup():
+            shuffled = list(transactions)
+            shuffler.shuffle(shuffled)
+            return (shuffled,)
+
+        yield result('order_transactions',
+                     {'history_length': history_length},
+                     history_length,
+                     timed(order_transactions, repeat=args.repeat,
+                           setup=setup))
+
+
+def bench_prepare(args, users):
+    ledger = FakeLedger()
+    plugin = make_plugin(ledger)
+    preparers = OrderedDict([
+        ('driver', plugin.driver.transactions.prepare),
+        ('builder', builder.prepare_transaction),
+    ])
+    for batch_size in args.batch_sizes:
+        for preparer, prepare in preparers.items():
+            def setup():
+                return ([make_entity_data() for _ in range(batch_size)],)
+
+            def run(entities_data):
+                for entity_data in entities_data:
+                    prepare(operation='CREATE',
+                            signers=users[0]['public_key'],
+                            asset={'data': entity_data})
+
+            yield result('prepare',
+                         {'batch_size': batch_size, 'preparer': preparer},
+                         batch_size,
+                         timed(run, repeat=args.repeat, setup=setup))
+
+
+BENCHMARKS = OrderedDict([
+    ('save', bench_save),
+    ('save_many', bench_save_many),
+    ('load', bench_load),
+    ('transfer', bench_transfer),
+    ('transfer_many', bench_transfer_many),
+    ('get_history', bench_get_history),
+    ('iter_history', bench_iter_history),
+    ('order_transactions', bench_order_transactions),
+    ('prepare', bench_prepare),
+])
+
+
+def int_list(value):
+    return [int(item) for item in value.split(',')]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the plugin against an in-process fake '
+                    'ledger, writing one JSON result per line.')
+    parser.add_argument('benchmarks', nargs='*', metavar='BENCHMARK',
+                        help='Benchmarks to run (default: all of '
+                             '{})'.format(', '.join(BENCHMARKS)))
+    parser.add_argument('--latency', type=float, default=0.005,
+                        help='Seconds of latency injected into each '
+                             'ledger request (default: %(default)s)')
+    parser.add_argument('--history-lengths', type=int_list,
+                        default=[10, 100, 1000],
+                        help='Comma-separated entity history lengths '
+                             '(default: 10,100,1000)')
+    parser.add_argument('--batch-sizes', type=int_list, default=[10, 100],
+                        help='Comma-separated batch sizes '
+                             '(default: 10,100)')
+    parser.add_argument('--concurrency', type=int_list, default=[1, 10],
+                        help='Comma-separated numbers of concurrent '
+                             'requests (default: 1,10)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per benchmark; the best is reported '
+                             '(default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed for shuffling transactions '
+                             '(default: %(default)s)')
+    parser.add_argument('--output', type=argparse.FileType('w'),
+                        default=sys.stdout,
+                        help='File to write results to (default: stdout)')
+    args = parser.parse_args(argv)
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error('unknown benchmark: {}'.format(name))
+    return args
+
+
+def main(argv=None):
+    from bigchaindb_driver.crypto import generate_keypair
+
+    args = parse_args(argv)
+    users = [generate_keypair()._asdict() for _ in range(2)]
+    for name in args.benchmarks or BENCHMARKS:
+        for bench_result in BENCHMARKS[name](args, users):
+            args.output.write(json.dumps(bench_result) + '\n')
+            args.output.flush()
+
+
+if __name__ == '__main__':
+    main()
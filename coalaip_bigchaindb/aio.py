@@ -0,0 +1,292 @@
+"""asyncio support for the BigchainDB ledger plugin.
+
+Requires Python 3.5+ and `aiohttp <https://aiohttp.readthedocs.io/>`_,
+which can be installed with the ``async`` extra::
+
+    $ pip install coalaip-bigchaindb[async]
+"""
+
+import asyncio
+import json
+from functools import wraps
+from itertools import cycle
+
+import aiohttp
+from bigchaindb_driver.crypto import generate_keypair
+from bigchaindb_driver.exceptions import (
+    HTTP_EXCEPTIONS,
+    BigchaindbException,
+    NotFoundError,
+    MissingPrivateKeyError,
+    TransportError,
+    ConnectionError,
+)
+from bigchaindb_driver.offchain import (
+    fulfill_transaction,
+    prepare_transaction,
+)
+from coalaip.exceptions import (
+    EntityCreationError,
+    EntityNotFoundError,
+    EntityTransferError,
+    PersistenceError,
+)
+from coalaip_bigchaindb.utils import (
+    order_history,
+    transfer_tx_params,
+)
+
+
+API_PREFIX = '/api/v1'
+DEFAULT_NODE = 'http://localhost:9984'
+
+
+def reraise_as_persistence_error_if_not(*allowed_exceptions):
+    """Decorator: Coroutine counterpart of
+    :func:`coalaip_bigchaindb.utils.reraise_as_persistence_error_if_not`.
+
+    Args:
+        *allowed_exceptions (:exc:`Exception`): Exceptions to not
+            reraise with :exc:`coalaip.PersistenceError`
+    """
+    def decorator(func):
+        @wraps(func)
+        async def reraises_if_not(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as ex:
+                if not isinstance(ex, (PersistenceError,) +
+                                  allowed_exceptions):
+                    raise PersistenceError(error=ex) from ex
+                else:
+                    raise
+        return reraises_if_not
+    return decorator
+
+
+class AsyncPlugin:
+    """asyncio counterpart of :class:`~.Plugin`.
+
+    Talks to BigchainDB's HTTP API through a single
+    :class:`aiohttp.ClientSession` whose connections are kept alive and
+    reused between calls, so that many ledger calls can be in flight at
+    once from a single event loop. Transactions are prepared and
+    fulfilled locally, exactly as :class:`~.Plugin` does.
+
+    Errors are mapped to the same :mod:`coalaip.exceptions` as
+    :class:`~.Plugin`'s methods.
+
+    Use as an async context manager (or call :meth:`close` when done)
+    to release the pooled connections::
+
+        async with AsyncPlugin('http://localhost:9984') as plugin:
+            asset_id = await plugin.save(entity_data, user=user)
+    """
+
+    def __init__(self, *nodes, limit=100, limit_per_host=0,
+                 keepalive_timeout=15, timeout=None, headers=None):
+        """Initialize a :class:`~.AsyncPlugin` instance for one or more
+        BigchainDB nodes.
+
+        Args:
+            *nodes (str): One or more URLs of BigchainDB nodes to
+                connect to as the persistence layer. Requests are
+                spread across the nodes in a round-robin fashion.
+            limit (int, keyword, optional): Maximum number of
+                simultaneous connections across all nodes. Defaults to
+                ``100``; ``0`` for no limit.
+            limit_per_host (int, keyword, optional): Maximum number of
+                simultaneous connections to a single node. Defaults to
+                ``0`` (no limit).
+            keepalive_timeout (float, keyword, optional): Seconds to
+                keep idle connections open for reuse. Defaults to
+                ``15``.
+            timeout (float, keyword, optional): Total timeout, in
+                seconds, of each request. Defaults to no timeout.
+            headers (dict, keyword, optional): Extra headers to send
+                with every request
+        """
+
+        self.nodes = tuple(node.rstrip('/') for node in nodes) or \
+            (DEFAULT_NODE,)
+        self.headers = headers
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._connector_options = {
+            'limit': limit,
+            'limit_per_host': limit_per_host,
+            'keepalive_timeout': keepalive_timeout,
+        }
+        self._node_picker = cycle(self.nodes)
+        self._session = None
+
+    @property
+    def type(self):
+        """str: the type of this plugin (``'BigchainDB'``)"""
+        return 'BigchainDB'
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Close all pooled connections to BigchainDB."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def generate_user(self):
+        """Create a new public/private keypair for use with
+        BigchainDB (see :meth:`.Plugin.generate_user`).
+        """
+
+        return generate_keypair()._asdict()
+
+    def is_same_user(self, user_a, user_b):
+        """Check if :attr:`user_a` represents the same user as
+        :attr:`user_b` on BigchainDB by comparing their public keys.
+        """
+
+        return user_a['public_key'] == user_b['public_key']
+
+    @reraise_as_persistence_error_if_not(EntityNotFoundError)
+    async def get_history(self, persist_id):
+        """Get the transaction history of an COALA IP entity on
+        BigchainDB (see :meth:`.Plugin.get_history`).
+        """
+
+        try:
+            transactions = await self._request(
+                'GET', '/transactions/', params={'asset_id': persist_id})
+        except NotFoundError:
+            raise EntityNotFoundError()
+
+        # Assume that each transaction will only ever have one owner
+        # (and therefore one output as well)
+        events, _ = order_history(transactions)
+        return [event.to_dict() for event in events]
+
+    @reraise_as_persistence_error_if_not(EntityNotFoundError)
+    async def get_status(self, persist_id):
+        """Get the status of an COALA IP entity on BigchainDB (see
+        :meth:`.Plugin.get_status`).
+        """
+
+        try:
+            return await self._request(
+                'GET', '/statuses', params={'transaction_id': persist_id})
+        except NotFoundError:
+            raise EntityNotFoundError()
+
+    @reraise_as_persistence_error_if_not(EntityCreationError)
+    async def save(self, entity_data, *, user):
+        """Create and assign a new entity with the given data to the
+        given user's public key on BigchainDB (see
+        :meth:`.Plugin.save`).
+        """
+
+        try:
+            tx = prepare_transaction(
+                operation='CREATE',
+                signers=user['public_key'],
+                asset={'data': entity_data})
+        except BigchaindbException as ex:
+            raise EntityCreationError(error=ex) from ex
+        try:
+            fulfilled_tx = fulfill_transaction(
+                tx, private_keys=user['private_key'])
+        except MissingPrivateKeyError as ex:
+            raise EntityCreationError(error=ex) from ex
+        try:
+            await self._request('POST', '/transactions/', json=fulfilled_tx)
+        except (TransportError, ConnectionError) as ex:
+            raise EntityCreationError(error=ex) from ex
+
+        return fulfilled_tx['id']
+
+    @reraise_as_persistence_error_if_not(EntityNotFoundError)
+    async def load(self, persist_id):
+        """Load the data of the entity associated with the
+        :attr:`persist_id` from BigchainDB (see :meth:`.Plugin.load`).
+        """
+
+        try:
+            tx_json = await self._request(
+                'GET', '/transactions/{}'.format(persist_id))
+        except NotFoundError:
+            raise EntityNotFoundError()
+
+        if tx_json['operation'] == 'CREATE':
+            return tx_json['asset']['data']
+        else:
+            return tx_json['metadata']
+
+    @reraise_as_persistence_error_if_not(EntityNotFoundError,
+                                         EntityTransferError)
+    async def transfer(self, persist_id, transfer_payload=None, *,
+                       from_user, to_user):
+        """Transfer the entity matching the given :attr:`persist_id`
+        from the current owner (:attr:`from_user`) to a new owner
+        (:attr:`to_user`) (see :meth:`.Plugin.transfer`).
+        """
+
+        try:
+            _, last_tx = order_history(await self._request(
+                'GET', '/transactions/', params={'asset_id': persist_id}))
+        except NotFoundError:
+            raise EntityNotFoundError()
+        if last_tx is None:
+            raise EntityNotFoundError()
+
+        try:
+            transfer_tx = prepare_transaction(**transfer_tx_params(
+                input_tx=last_tx, recipients=to_user['public_key'],
+                metadata=transfer_payload))
+        except BigchaindbException as ex:
+            raise EntityTransferError(error=ex) from ex
+
+        try:
+            fulfilled_tx = fulfill_transaction(
+                transfer_tx, private_keys=from_user['private_key'])
+        except MissingPrivateKeyError as ex:
+            raise EntityTransferError(error=ex) from ex
+
+        try:
+            transfer_json = await self._request('POST', '/transactions/',
+                                                json=fulfilled_tx)
+        except (TransportError, ConnectionError) as ex:
+            raise EntityTransferError(error=ex) from ex
+
+        return transfer_json['id']
+
+    def _get_session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(**self._connector_options),
+                headers=self.headers,
+                timeout=self.timeout)
+        return self._session
+
+    async def _request(self, method, path, *, json=None, params=None):
+        url = next(self._node_picker) + API_PREFIX + path
+        try:
+            async with self._get_session().request(
+                    method, url, json=json, params=params) as response:
+                status_code = response.status
+                text = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as ex:
+            raise ConnectionError(None, str(ex), None) from ex
+
+        data = _parse_json(text)
+        if not 200 <= status_code < 300:
+            exc_cls = HTTP_EXCEPTIONS.get(status_code, TransportError)
+            raise exc_cls(status_code, text, data)
+        return data if data is not None else text
+
+
+def _parse_json(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
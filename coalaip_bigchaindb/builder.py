@@ -0,0 +1,268 @@
+"""Driver-free builder of BigchainDB 1.0 ``CREATE`` and ``TRANSFER``
+transactions.
+
+Builds the same transactions, down to their ids, as
+:func:`bigchaindb_driver.offchain.prepare_transaction` does for
+transactions with a single Ed25519 owner per input and output (the only
+kind the plugin writes), without going through the driver's transaction
+model. Each public key's condition, and its serialized form, are only
+computed once (see :func:`ed25519_condition_uri`), and the serialized
+transaction that its id is hashed from is assembled from the separately
+serialized asset, metadata, inputs and outputs (see
+:mod:`~coalaip_bigchaindb.serialization`), making it cheap to build many
+transactions at once.
+"""
+
+from base64 import urlsafe_b64encode
+from functools import lru_cache
+from hashlib import sha256
+
+from coalaip_bigchaindb.serialization import hash_data, serialize
+
+
+VERSION = '1.0'
+ED25519_TYPE = 'ed25519-sha-256'
+ED25519_COST = 131072
+CONDITION_CACHE_SIZE = 4096
+
+# DER encoding of an Ed25519 condition's fingerprint contents, up to the
+# public key: a SEQUENCE holding a [0]-tagged 32 byte OCTET STRING
+_ED25519_FINGERPRINT_PREFIX = b'\x30\x22\x80\x20'
+_ED25519_KEY_LENGTH = 32
+
+_B58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+_B58_INDEX = {char: index for index, char in enumerate(_B58_ALPHABET)}
+
+
+def prepare_transaction(*, operation='CREATE', signers=None,
+                        recipients=None, asset=None, metadata=None,
+                        inputs=None):
+    """Prepare a transaction, ready to be fulfilled.
+
+    Takes the same arguments as
+    :func:`bigchaindb_driver.offchain.prepare_transaction`.
+
+    Returns:
+        dict: The prepared transaction
+
+    Raises:
+        :exc:`ValueError`: If the operation is not ``'CREATE'`` or
+            ``'TRANSFER'``, or if the transaction does not have a single
+            owner per input and output
+    """
+    operation = operation.upper()
+    if operation == 'CREATE':
+        return prepare_create_transaction(signers=signers,
+                                          recipients=recipients,
+                                          asset=asset, metadata=metadata)
+    if operation == 'TRANSFER':
+        return prepare_transfer_transaction(inputs=inputs,
+                                            recipients=recipients,
+                                            asset=asset, metadata=metadata)
+    raise ValueError('Unsupported operation `{}`'.format(operation))
+
+
+def prepare_create_transaction(*, signers, recipients=None, asset=None,
+                               metadata=None):
+    """Prepare a ``CREATE`` transaction, ready to be fulfilled.
+
+    Args:
+        signers (str or list of str): Public key of the creator
+        recipients (str or list of str, optional): Public key of the
+            owner of the created asset. Defaults to the creator.
+        asset (dict, optional): The asset to create, of the form
+            ``{'data': ...}``
+        metadata (dict, optional): The transaction's metadata
+
+    Returns:
+        dict: The prepared transaction
+    """
+    signer = _single_key(signers, 'signers')
+    recipient = _single_key(recipients, 'recipients') if recipients else signer
+    _check_metadata(metadata)
+
+    tx_asset = {'data': asset['data'] if asset else None}
+    tx_id = _hash_body(asset=tx_asset, inputs=_create_inputs_json(signer),
+                       metadata=metadata, operation='CREATE',
+                       outputs=_outputs_json(recipient))
+    return {
+        'inputs': [{
+            'owners_before': [signer],
+            'fulfills': None,
+            'fulfillment': _ed25519_details(signer),
+        }],
+        'outputs': [_output(recipient)],
+        'operation': 'CREATE',
+        'metadata': metadata,
+        'asset': tx_asset,
+        'version': VERSION,
+        'id': tx_id,
+    }
+
+
+def prepare_transfer_transaction(*, inputs, recipients, asset,
+                                 metadata=None):
+    """Prepare a ``TRANSFER`` transaction, ready to be fulfilled.
+
+    Args:
+        inputs (dict or list of dict): The outputs to spend, each of the
+            form::
+
+                {
+                    'fulfillment': The spent output's condition details,
+                    'fulfills': {
+                        'transaction_id': (str),
+                        'output_index': (int),
+                    },
+                    'owners_before': The spent output's public keys,
+                }
+
+        recipients (str or list of str): Public key of the new owner
+        asset (dict): The transferred asset, of the form ``{'id': ...}``
+        metadata (dict, optional): The transaction's metadata
+
+    Returns:
+        dict: The prepared transaction
+    """
+    if not isinstance(inputs, (list, tuple)):
+        inputs = [inputs]
+    recipient = _single_key(recipients, 'recipients')
+    _check_metadata(metadata)
+
+    tx_inputs = []
+    fulfillments = []
+    for input_ in inputs:
+        fulfillment = input_['fulfillment']
+        if fulfillment.get('type') != ED25519_TYPE:
+            raise ValueError('Unsupported fulfillment type `{}`'.format(
+                fulfillment.get('type')))
+        fulfills = input_['fulfills']
+        tx_inputs.append({
+            'owners_before': list(input_['owners_before']),
+            'fulfills': {
+                'transaction_id': fulfills['transaction_id'],
+                'output_index': fulfills['output_index'],
+            },
+            'fulfillment': None,
+        })
+        fulfillments.append(_ed25519_details(fulfillment['public_key']))
+
+    tx_asset = {'id': asset['id']}
+    tx_id = _hash_body(asset=tx_asset, inputs=serialize(tx_inputs),
+                       metadata=metadata, operation='TRANSFER',
+                       outputs=_outputs_json(recipient))
+    for input_, fulfillment in zip(tx_inputs, fulfillments):
+        input_['fulfillment'] = fulfillment
+    return {
+        'inputs': tx_inputs,
+        'outputs': [_output(recipient)],
+        'operation': 'TRANSFER',
+        'metadata': metadata,
+        'asset': tx_asset,
+        'version': VERSION,
+        'id': tx_id,
+    }
+
+
+@lru_cache(maxsize=CONDITION_CACHE_SIZE)
+def ed25519_condition_uri(public_key):
+    """Get the URI of the Ed25519 condition locking an output to a
+    public key.
+
+    The URIs of the last ``CONDITION_CACHE_SIZE`` public keys are
+    cached.
+
+    Args:
+        public_key (str): Base58 encoded Ed25519 public key
+
+    Returns:
+        str: The condition's URI
+
+    Raises:
+        :exc:`ValueError`: If :attr:`public_key` is not a valid Ed25519
+            public key
+    """
+    key = b58decode(public_key)
+    if len(key) != _ED25519_KEY_LENGTH:
+        raise ValueError('Public key `{}` must be {} bytes long'.format(
+            public_key, _ED25519_KEY_LENGTH))
+
+    fingerprint = sha256(_ED25519_FINGERPRINT_PREFIX + key).digest()
+    return 'ni:///sha-256;{}?fpt={}&cost={}'.format(
+        urlsafe_b64encode(fingerprint).rstrip(b'=').decode(),
+        ED25519_TYPE, ED25519_COST)
+
+
+def b58decode(value):
+    """Decode a Base58 (Bitcoin alphabet) encoded string.
+
+    Raises:
+        :exc:`ValueError`: If :attr:`value` is not valid Base58
+    """
+    number = 0
+    for char in value:
+        try:
+            number = number * 58 + _B58_INDEX[char]
+        except KeyError:
+            raise ValueError('Invalid Base58 character `{}`'.format(char))
+
+    leading_zeros = len(value) - len(value.lstrip(_B58_ALPHABET[0]))
+    decoded = number.to_bytes((number.bit_length() + 7) // 8, 'big')
+    return b'\x00' * leading_zeros + decoded
+
+
+def _hash_body(*, asset, inputs, metadata, operation, outputs):
+    # Serialize the transaction (without its id and fulfillments) as
+    # serialize() would, by joining its serialized values in sorted key
+    # order, so that cached inputs and outputs are not serialized again
+    return hash_data(''.join((
+        '{"asset":', serialize(asset),
+        ',"inputs":', inputs,
+        ',"metadata":', serialize(metadata),
+        ',"operation":"', operation,
+        '","outputs":', outputs,
+        ',"version":"', VERSION, '"}',
+    )))
+
+
+@lru_cache(maxsize=CONDITION_CACHE_SIZE)
+def _create_inputs_json(public_key):
+    return serialize([{
+        'owners_before': [public_key],
+        'fulfills': None,
+        'fulfillment': None,
+    }])
+
+
+@lru_cache(maxsize=CONDITION_CACHE_SIZE)
+def _outputs_json(public_key):
+    return serialize([_output(public_key)])
+
+
+def _output(public_key):
+    return {
+        'public_keys': [public_key],
+        'condition': {
+            'details': _ed25519_details(public_key),
+            'uri': ed25519_condition_uri(public_key),
+        },
+        'amount': '1',
+    }
+
+
+def _ed25519_details(public_key):
+    return {'type': ED25519_TYPE, 'public_key': public_key}
+
+
+def _single_key(keys, name):
+    if isinstance(keys, str):
+        return keys
+    if isinstance(keys, (list, tuple)) and len(keys) == 1 and isinstance(
+            keys[0], str):
+        return keys[0]
+    raise ValueError('`{}` must be a single public key'.format(name))
+
+
+def _check_metadata(metadata):
+    if metadata is not None and not isinstance(metadata, dict):
+        raise TypeError('`metadata` must be a dict or None')
@@ -0,0 +1,418 @@
+from collections import OrderedDict
+from threading import Event, Lock
+from time import monotonic
+
+from coalaip_bigchaindb.utils import (
+    HistoryEvent,
+    get_parent_id,
+    order_history,
+)
+
+
+class LRUCache:
+    """Thread-safe, size-bounded mapping that evicts its least recently
+    used entries first.
+
+    Keeps count of lookup hits and misses to help with sizing.
+
+    Args:
+        maxsize (int): Maximum number of entries to hold
+    """
+
+    def __init__(self, maxsize):
+        if maxsize < 1:
+            raise ValueError('`maxsize` must be at least 1')
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """Look up the value for :attr:`key`, marking it as recently
+        used.
+
+        Returns:
+            The cached value, or :attr:`default` if :attr:`key` is not
+            cached
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Cache :attr:`value` under :attr:`key`, evicting the least
+        recently used entry if the cache is full.
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def peek(self, key, default=None):
+        """Look up the value for :attr:`key` without marking it as
+        recently used or counting a hit or miss.
+        """
+        with self._lock:
+            return self._entries.get(key, default)
+
+    def pop(self, key, default=None):
+        """Remove and return the value for :attr:`key`, or
+        :attr:`default` if it is not cached.
+        """
+        with self._lock:
+            return self._entries.pop(key, default)
+
+    def clear(self):
+        """Remove all entries and reset the hit and miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class HistoryCache:
+    """Thread-safe, size-bounded cache of each asset's ordered
+    transaction chain.
+
+    Rather than re-ordering an asset's full list of transactions every
+    time it is fetched, only the transactions that are new since the
+    last update are linked onto the cached chain's tip, making repeated
+    updates cost O(new transactions) instead of O(full history). If the
+    new transactions cannot be linked onto the tip (e.g. a cached
+    transaction was dropped by the ledger), the chain is rebuilt from
+    scratch.
+
+    Args:
+        maxsize (int): Maximum number of assets' chains to hold
+    """
+
+    def __init__(self, maxsize):
+        self._chains = LRUCache(maxsize)
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._chains)
+
+    def __contains__(self, asset_id):
+        return asset_id in self._chains
+
+    @property
+    def hits(self):
+        """int: Number of updates that reused a cached chain"""
+        return self._chains.hits
+
+    @property
+    def misses(self):
+        """int: Number of updates that had to build a new chain"""
+        return self._chains.misses
+
+    def update(self, asset_id, transactions):
+        """Bring the cached chain of :attr:`asset_id` up to date with
+        its full (unordered) list of :attr:`transactions`.
+
+        Args:
+            asset_id (str): Id of the asset
+            transactions (list): Unordered list of all the asset's
+                transactions, as returned by BigchainDB
+
+        Returns:
+            tuple: A ``(events, tip)`` pair, where ``events`` is a new
+            list of :class:`~coalaip_bigchaindb.utils.HistoryEvent` for
+            each transaction in the chain, ordered from the first
+            transaction, and ``tip`` is the last transaction of the
+            chain (or ``None`` if there are no transactions)
+
+        Raises:
+            :exc:`ValueError`: If the transactions cannot be ordered
+                into a single chain (see
+                :func:`~coalaip_bigchaindb.utils.order_history`)
+        """
+        with self._lock:
+            chain = self._chains.get(asset_id)
+            if chain is None or not chain.extend(transactions):
+                chain = _AssetChain(*order_history(transactions))
+                if chain.tip is None:
+                    return [], None
+                self._chains.put(asset_id, chain)
+
+            return list(chain.events), chain.tip
+
+    def clear(self):
+        """Remove all cached chains."""
+        self._chains.clear()
+
+
+class OwnerIndex:
+    """Thread-safe, size-bounded index of the assets currently owned by
+    each public key.
+
+    A public key is only indexed once the full list of assets it owns
+    has been :meth:`put` (e.g. after querying BigchainDB); from then on,
+    assets created or transferred through :meth:`move` are added to or
+    removed from its list. Changes made without going through
+    :meth:`move` (e.g. transfers by other clients) are not reflected,
+    unless a :attr:`ttl` is given so that lists are eventually
+    refetched.
+
+    As listing a public key's assets may take a while, :meth:`scan`
+    records the moves made in the meantime so that :meth:`put` can
+    apply them to the list once it is complete.
+
+    Args:
+        maxsize (int): Maximum number of public keys to index
+        ttl (float, keyword, optional): Seconds after which the list
+            :meth:`put` for a public key expires. Defaults to never
+            expiring.
+    """
+
+    def __init__(self, maxsize, *, ttl=None):
+        self.ttl = ttl
+        self._owned = LRUCache(maxsize)
+        self._scans = {}
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._owned)
+
+    def __contains__(self, public_key):
+        return public_key in self._owned
+
+    @property
+    def hits(self):
+        """int: Number of lookups answered from the index"""
+        return self._owned.hits
+
+    @property
+    def misses(self):
+        """int: Number of lookups of public keys that are not indexed
+        (or whose list expired)
+        """
+        return self._owned.misses
+
+    def get(self, public_key):
+        """Look up the assets owned by :attr:`public_key`.
+
+        Returns:
+            list of str: The asset ids, in the order they were indexed,
+            or ``None`` if :attr:`public_key` is not indexed or its
+            list expired
+        """
+        with self._lock:
+            entry = self._owned.peek(public_key)
+            if entry is not None and entry[0] <= monotonic():
+                self._owned.pop(public_key)
+            entry = self._owned.get(public_key)
+            return None if entry is None else list(entry[1])
+
+    def scan(self, public_key):
+        """Start recording the moves to and from :attr:`public_key`,
+        until the returned scan is passed to :meth:`put` or
+        :meth:`discard`.
+
+        Returns:
+            An opaque scan
+        """
+        scan = _Scan(public_key)
+        with self._lock:
+            self._scans.setdefault(public_key, set()).add(scan)
+        return scan
+
+    def discard(self, scan):
+        """Stop recording moves for :attr:`scan` (e.g. if it was
+        abandoned before listing all of the assets).
+        """
+        with self._lock:
+            self._discard(scan)
+
+    def put(self, public_key, asset_ids, *, scan=None):
+        """Index the full list of assets owned by :attr:`public_key`,
+        replacing any previous list.
+
+        Args:
+            public_key (str): Public key owning the assets
+            asset_ids (list of str): Ids of the assets
+            scan (keyword, optional): If given, the scan, as returned by
+                :meth:`scan`, that listed :attr:`asset_ids`; the moves
+                it recorded are applied to them before indexing
+        """
+        owned = OrderedDict.fromkeys(asset_ids)
+        expires_at = (monotonic() + self.ttl if self.ttl is not None
+                      else float('inf'))
+        with self._lock:
+            if scan is not None:
+                self._discard(scan)
+                for asset_id, is_added in scan.moves:
+                    if is_added:
+                        owned[asset_id] = None
+                    else:
+                        owned.pop(asset_id, None)
+            self._owned.put(public_key, (expires_at, owned))
+
+    def move(self, asset_id, *, from_key=None, to_key):
+        """Record that :attr:`asset_id` changed owner from
+        :attr:`from_key` (``None`` if it was just created) to
+        :attr:`to_key`, updating whichever of the two are indexed or
+        being scanned.
+        """
+        with self._lock:
+            if from_key is not None:
+                self._move(asset_id, from_key, is_added=False)
+            self._move(asset_id, to_key, is_added=True)
+
+    def clear(self):
+        """Remove all indexed public keys."""
+        self._owned.clear()
+
+    def _move(self, asset_id, public_key, *, is_added):
+        for scan in self._scans.get(public_key, ()):
+            scan.moves.append((asset_id, is_added))
+        entry = self._owned.peek(public_key)
+        if entry is not None:
+            if is_added:
+                entry[1][asset_id] = None
+            else:
+                entry[1].pop(asset_id, None)
+
+    def _discard(self, scan):
+        scans = self._scans.get(scan.public_key)
+        if scans is not None:
+            scans.discard(scan)
+            if not scans:
+                del self._scans[scan.public_key]
+
+
+class SingleFlight:
+    """Thread-safe coalescer of concurrent calls for the same key.
+
+    While a call for a key is in flight, other callers asking for the
+    same key wait for it to finish and share its result, or its
+    exception, instead of making their own call. Results are not kept
+    once the call has finished; later callers make a new call.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._in_flight = {}
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._in_flight)
+
+    def __contains__(self, key):
+        return key in self._in_flight
+
+    def do(self, key, func, *args, **kwargs):
+        """Call ``func(*args, **kwargs)``, unless a call for :attr:`key`
+        is already in flight, in which case wait for it instead.
+
+        Returns:
+            The result of the (possibly shared) call
+
+        Raises:
+            Any exception raised by the (possibly shared) call
+        """
+        with self._lock:
+            call = self._in_flight.get(key)
+            if call is None:
+                call = self._in_flight[key] = _Call()
+                self.calls += 1
+                is_leader = True
+            else:
+                self.shared += 1
+                is_leader = False
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as ex:
+            call.error = ex
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+        return call.result
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class _Scan:
+    __slots__ = ('public_key', 'moves')
+
+    def __init__(self, public_key):
+        self.public_key = public_key
+        self.moves = []
+
+
+class _AssetChain:
+    __slots__ = ('events', 'tx_ids', 'tip')
+
+    def __init__(self, events, tip):
+        self.events = events
+        self.tx_ids = {event.event_id for event in events}
+        self.tip = tip
+
+    def extend(self, transactions):
+        """Link any new transactions onto the chain's tip.
+
+        Returns:
+            bool: ``False`` if the transactions were inconsistent with
+            the chain and it must be rebuilt; ``True`` otherwise
+        """
+        new_txs_by_parent = {}
+        for tx in transactions:
+            if tx['id'] not in self.tx_ids:
+                new_txs_by_parent[get_parent_id(tx)] = tx
+
+        # All previously seen transactions must still be present
+        if len(transactions) - len(new_txs_by_parent) != len(self.tx_ids):
+            return False
+
+        new_tip = self.tip
+        new_chain = []
+        while new_tip['id'] in new_txs_by_parent:
+            new_tip = new_txs_by_parent.pop(new_tip['id'])
+            new_chain.append(new_tip)
+        if new_txs_by_parent:
+            return False
+
+        for tx in new_chain:
+            self.events.append(_tx_event(tx))
+            self.tx_ids.add(tx['id'])
+        self.tip = new_tip
+        return True
+
+
+def _tx_event(tx):
+    # Assume that each transaction will only ever have one owner (and
+    # therefore one output as well)
+    return HistoryEvent(public_key=tx['outputs'][0]['public_keys'][0],
+                        event_id=tx['id'])
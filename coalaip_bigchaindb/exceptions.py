@@ -0,0 +1,32 @@
+class TransactionChainError(ValueError):
+    """Raised when a list of transactions cannot be ordered into a
+    single, linear chain.
+
+    Attributes:
+        reason (str): What broke the chain; one of::
+
+            'duplicate': a transaction appears more than once
+            'fork': two transactions spend the same transaction
+            'disjoint': there is more than one CREATE transaction
+            'missing_parent': a transaction spends a transaction that
+                is not in the list
+            'cycle': the transactions spend each other in a loop
+
+        transaction_id (str): Id of the transaction where the break was
+            detected
+        parent_id (str): Id of the transaction spent by
+            :attr:`transaction_id`, if any
+    """
+
+    DUPLICATE = 'duplicate'
+    FORK = 'fork'
+    DISJOINT = 'disjoint'
+    MISSING_PARENT = 'missing_parent'
+    CYCLE = 'cycle'
+
+    def __init__(self, message, *, reason, transaction_id=None,
+                 parent_id=None):
+        super().__init__(message)
+        self.reason = reason
+        self.transaction_id = transaction_id
+        self.parent_id = parent_id
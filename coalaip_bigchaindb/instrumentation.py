@@ -0,0 +1,249 @@
+"""Instrumentation hooks for timing the plugin's operations, their
+phases and the requests they make to BigchainDB.
+
+Observers (see :class:`~.Observer`) are given to the plugin through
+:class:`~.Plugin`'s ``observers`` option and are notified of events
+synchronously, in the thread that caused them.
+"""
+
+import logging
+from collections import namedtuple
+from functools import wraps
+from inspect import isgeneratorfunction
+from threading import local
+from time import monotonic
+
+
+logger = logging.getLogger(__name__)
+
+
+OperationEvent = namedtuple('OperationEvent',
+                            ('operation', 'seconds', 'error', 'parent'))
+"""A call to one of the plugin's public operations (e.g.
+:meth:`~.Plugin.save`) finished.
+
+``operation`` is the name of the operation, ``seconds`` how long it
+took (for generators, e.g. :meth:`~.Plugin.iter_owned`, the time spent
+producing items, excluding the caller's time between them), and
+``error`` the class name of the exception it raised (or ``None`` if it
+succeeded). ``parent`` is the name of the operation this one was called
+from (e.g. ``'load_many'`` for each of its loads), or ``None`` for
+top-level operations; only top-level operations should be summed to
+avoid counting nested ones twice.
+"""
+
+PhaseEvent = namedtuple('PhaseEvent',
+                        ('phase', 'operation', 'seconds', 'count', 'error'))
+"""A phase of an operation finished.
+
+``phase`` is one of ``'prepare'``, ``'fulfill'`` or ``'send'`` (of a
+transaction), ``'retrieve'`` (of a single transaction), ``'history'``
+(fetching an entity's transactions) or ``'order'`` (ordering them).
+``operation`` is the operation of the transactions involved
+(``'CREATE'`` or ``'TRANSFER'``) when there is one, ``count`` the number
+of transactions involved (``None`` if unknown), and ``seconds`` and
+``error`` are as in :class:`~.OperationEvent`.
+"""
+
+RequestEvent = namedtuple('RequestEvent', (
+    'method', 'path', 'node', 'seconds', 'request_size', 'response_size',
+    'status_code', 'retries', 'error'))
+"""A request to a BigchainDB node finished.
+
+``node`` is the URL of the node the request was sent to,
+``request_size`` and ``response_size`` the sizes of the request's and
+response's bodies in bytes (``None`` if unknown), ``status_code`` the
+response's status code (``None`` if there was no response) and
+``retries`` the number of times the request was retried, either on the
+same node or by failing over from another node. ``seconds`` and
+``error`` are as in :class:`~.OperationEvent`.
+"""
+
+
+class Observer:
+    """Base class for instrumentation observers.
+
+    Subclasses override the methods for the events they are interested
+    in; by default, every event is ignored. Observers should be quick
+    and must be thread-safe, as events are emitted synchronously from
+    every thread the plugin is used from. Exceptions raised by an
+    observer are logged and otherwise ignored.
+    """
+
+    def on_operation(self, event):
+        """Called with an :class:`~.OperationEvent`."""
+
+    def on_phase(self, event):
+        """Called with a :class:`~.PhaseEvent`."""
+
+    def on_request(self, event):
+        """Called with a :class:`~.RequestEvent`."""
+
+
+class Instrumentation:
+    """Dispatcher of instrumentation events to a set of observers.
+
+    Args:
+        observers (list of :class:`~.Observer`, optional): Observers to
+            notify of events
+    """
+
+    def __init__(self, observers=()):
+        self.observers = tuple(observers)
+        self._local = local()
+
+    def __bool__(self):
+        return bool(self.observers)
+
+    def emit_operation(self, event):
+        self._emit('on_operation', event)
+
+    def emit_phase(self, event):
+        self._emit('on_phase', event)
+
+    def emit_request(self, event):
+        self._emit('on_request', event)
+
+    def propagate(self, func):
+        """Wrap :attr:`func` so that the operations it calls from other
+        threads (e.g. through :func:`~.map_concurrently`) are marked as
+        nested in the operation running in the current thread.
+        """
+        parent = self._current()
+        if not self.observers or parent is None:
+            return func
+
+        @wraps(func)
+        def propagated(*args, **kwargs):
+            previous = self._enter(parent)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._enter(previous)
+        return propagated
+
+    def phase(self, phase, operation=None, *, count=1):
+        """Context manager timing a phase of an operation and emitting a
+        :class:`~.PhaseEvent` once it finishes.
+        """
+        if not self.observers:
+            return _NULL_PHASE
+        return _Phase(self, phase, operation, count)
+
+    def _current(self):
+        return getattr(self._local, 'operation', None)
+
+    def _enter(self, operation):
+        """Make :attr:`operation` the current thread's operation,
+        returning the previous one.
+        """
+        previous = self._current()
+        self._local.operation = operation
+        return previous
+
+    def _emit(self, method, event):
+        for observer in self.observers:
+            try:
+                getattr(observer, method)(event)
+            except Exception:
+                logger.exception('Instrumentation observer %r failed',
+                                 observer)
+
+
+class _Phase:
+    __slots__ = ('instrumentation', 'phase', 'operation', 'count', 'start')
+
+    def __init__(self, instrumentation, phase, operation, count):
+        self.instrumentation = instrumentation
+        self.phase = phase
+        self.operation = operation
+        self.count = count
+
+    def __enter__(self):
+        self.start = monotonic()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.instrumentation.emit_phase(PhaseEvent(
+            phase=self.phase, operation=self.operation,
+            seconds=monotonic() - self.start, count=self.count,
+            error=exc_type.__name__ if exc_type else None))
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def instrumented(func):
+    """Decorator: Times calls to the wrapped method, emitting an
+    :class:`~.OperationEvent` through the instance's
+    ``instrumentation`` once each call finishes.
+
+    Generator methods are supported as well, in which case the event is
+    emitted once iteration finishes, fails or is abandoned.
+    """
+    operation = func.__name__
+
+    if isgeneratorfunction(func):
+        @wraps(func)
+        def instrumented_generator(self, *args, **kwargs):
+            instrumentation = self.instrumentation
+            if not instrumentation.observers:
+                return (yield from func(self, *args, **kwargs))
+
+            iterator = func(self, *args, **kwargs)
+            parent = instrumentation._current()
+            seconds = 0
+            error = None
+            try:
+                while True:
+                    instrumentation._enter(operation)
+                    start = monotonic()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        seconds += monotonic() - start
+                        instrumentation._enter(parent)
+                    yield item
+            except Exception as ex:
+                error = type(ex).__name__
+                raise
+            finally:
+                iterator.close()
+                instrumentation.emit_operation(OperationEvent(
+                    operation=operation, seconds=seconds, error=error,
+                    parent=parent))
+        return instrumented_generator
+
+    @wraps(func)
+    def instrumented_method(self, *args, **kwargs):
+        instrumentation = self.instrumentation
+        if not instrumentation.observers:
+            return func(self, *args, **kwargs)
+
+        parent = instrumentation._enter(operation)
+        start = monotonic()
+        try:
+            result = func(self, *args, **kwargs)
+        except Exception as ex:
+            instrumentation.emit_operation(OperationEvent(
+                operation=operation, seconds=monotonic() - start,
+                error=type(ex).__name__, parent=parent))
+            raise
+        finally:
+            instrumentation._enter(parent)
+        instrumentation.emit_operation(OperationEvent(
+            operation=operation, seconds=monotonic() - start, error=None,
+            parent=parent))
+        return result
+    return instrumented_method
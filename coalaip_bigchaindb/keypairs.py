@@ -0,0 +1,114 @@
+from collections import deque
+from threading import Condition, Thread
+
+from bigchaindb_driver.crypto import generate_keypair
+
+
+class KeypairPool:
+    """Bounded buffer of pre-generated keypairs, kept topped up by a
+    background thread so that taking a keypair costs O(1).
+
+    The background thread refills the buffer up to :attr:`size`
+    whenever it drops below :attr:`refill_threshold`.
+
+    Args:
+        size (int): Maximum number of keypairs to hold
+        refill_threshold (int, keyword, optional): Number of buffered
+            keypairs below which the buffer is refilled. Defaults to
+            half of :attr:`size`.
+    """
+
+    def __init__(self, size, *, refill_threshold=None):
+        if size < 1:
+            raise ValueError('`size` must be at least 1')
+
+        self.size = size
+        self.refill_threshold = (size // 2 if refill_threshold is None
+                                 else refill_threshold)
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self.refills = 0
+        self._keypairs = deque()
+        self._condition = Condition()
+        self._closed = False
+        self._refiller = Thread(target=self._refill, daemon=True,
+                                name='coalaip-bigchaindb-keypair-pool')
+        self._refiller.start()
+
+    def __len__(self):
+        return len(self._keypairs)
+
+    def take(self):
+        """Take a pre-generated keypair from the buffer.
+
+        Returns:
+            :class:`bigchaindb_driver.crypto.CryptoKeypair`: A keypair,
+            or ``None`` if the buffer is empty
+        """
+        with self._condition:
+            try:
+                keypair = self._keypairs.popleft()
+            except IndexError:
+                self.misses += 1
+                keypair = None
+            else:
+                self.hits += 1
+
+            if self._needs_refill():
+                self._condition.notify()
+            return keypair
+
+    def stats(self):
+        """Get the pool's statistics.
+
+        Returns:
+            dict: The statistics::
+
+                {
+                    'available': Number of buffered keypairs,
+                    'hits': Number of keypairs taken from the buffer,
+                    'misses': Number of takes from an empty buffer,
+                    'generated': Number of keypairs generated,
+                    'refills': Number of times the buffer was refilled,
+                }
+        """
+        with self._condition:
+            return {
+                'available': len(self._keypairs),
+                'hits': self.hits,
+                'misses': self.misses,
+                'generated': self.generated,
+                'refills': self.refills,
+            }
+
+    def close(self):
+        """Stop refilling the buffer and discard its keypairs."""
+        with self._condition:
+            self._closed = True
+            self._keypairs.clear()
+            self._condition.notify()
+        self._refiller.join()
+
+    def _needs_refill(self):
+        return (not self._keypairs or
+                len(self._keypairs) < self.refill_threshold)
+
+    def _refill(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._closed or self._needs_refill())
+                if self._closed:
+                    return
+                self.refills += 1
+
+            # Generate outside of the lock so that takes are never blocked
+            # on key generation
+            while len(self._keypairs) < self.size:
+                keypair = generate_keypair()
+                with self._condition:
+                    if self._closed:
+                        return
+                    self._keypairs.append(keypair)
+                    self.generated += 1
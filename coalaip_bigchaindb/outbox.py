@@ -0,0 +1,284 @@
+import json
+import sqlite3
+from random import uniform
+from threading import Event, Lock, Thread
+from time import time
+
+from bigchaindb_driver.exceptions import ConnectionError
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS outbox (
+    tx_id TEXT PRIMARY KEY,
+    tx_json TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL,
+    last_error TEXT,
+    failed INTEGER NOT NULL DEFAULT 0
+)
+'''
+
+
+class Outbox:
+    """Durable, SQLite-backed queue of fulfilled transactions waiting to
+    be sent to BigchainDB.
+
+    Transactions are written to the outbox before they are sent and
+    removed once they have been delivered. Those that could not be
+    delivered are deferred (see :meth:`defer`) and resent by a
+    background thread (see :meth:`start`), waiting longer between each
+    attempt, until they are delivered or permanently rejected. As a
+    transaction's id never changes, resending it is idempotent.
+    Transactions left in the outbox by a previous process (e.g. after a
+    crash) are resent as soon as the background thread starts.
+
+    Args:
+        path (str): Path of the SQLite database file (created if it
+            does not exist)
+        initial_interval (float, keyword, optional): Seconds to wait
+            after the first failed attempt to send a transaction before
+            resending it. Defaults to ``1``.
+        max_interval (float, keyword, optional): Maximum number of
+            seconds to wait between resends of a transaction. Defaults
+            to ``60``.
+        poll_interval (float, keyword, optional): Maximum number of
+            seconds the background thread sleeps between checks for
+            transactions to resend. Defaults to ``1``.
+    """
+
+    def __init__(self, path, *, initial_interval=1, max_interval=60,
+                 poll_interval=1):
+        self.path = path
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.poll_interval = poll_interval
+        self.delivered = 0
+        self.retries = 0
+        self._db = sqlite3.connect(path, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute(SCHEMA)
+        self._lock = Lock()
+        self._wakeup = Event()
+        self._closed = False
+        self._sender = None
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute(
+                'SELECT COUNT(*) FROM outbox WHERE NOT failed').fetchone()[0]
+
+    def put(self, tx):
+        """Write a fulfilled transaction to the outbox, unless it is
+        already there.
+
+        The caller is expected to send the transaction itself: it is not
+        resent until the caller defers it after a failed attempt (see
+        :meth:`defer`) or leaves it in the outbox for the next process
+        (see :meth:`start`), so that it is never sent twice at once.
+        """
+        with self._lock:
+            self._db.execute(
+                'INSERT OR IGNORE INTO outbox (tx_id, tx_json) VALUES (?, ?)',
+                (tx['id'], json.dumps(tx)))
+
+    def remove(self, tx_id, *, delivered=True):
+        """Remove a transaction from the outbox, once it has been
+        delivered (or if it should no longer be sent).
+        """
+        with self._lock:
+            self._db.execute('DELETE FROM outbox WHERE tx_id = ?', (tx_id,))
+            if delivered:
+                self.delivered += 1
+
+    def defer(self, tx_id, error=None):
+        """Record a failed attempt to send a transaction and schedule it
+        to be resent later, waiting twice as long (with random jitter)
+        as after its previous attempt.
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT attempts FROM outbox WHERE tx_id = ?',
+                (tx_id,)).fetchone()
+            if row is None:
+                return
+            attempts = row[0] + 1
+            interval = min(self.initial_interval * 2 ** (attempts - 1),
+                           self.max_interval)
+            self._db.execute(
+                'UPDATE outbox SET attempts = ?, next_attempt = ?, '
+                'last_error = ? WHERE tx_id = ?',
+                (attempts, time() + uniform(interval / 2, interval),
+                 _describe(error), tx_id))
+
+    def fail(self, tx_id, error=None):
+        """Mark a transaction as permanently rejected, so that it is no
+        longer resent. It is kept in the outbox for inspection (see
+        :meth:`failed`).
+        """
+        with self._lock:
+            self._db.execute(
+                'UPDATE outbox SET failed = 1, '
+                'last_error = COALESCE(?, last_error) WHERE tx_id = ?',
+                (_describe(error), tx_id))
+
+    def pending(self):
+        """Get the transactions waiting to be delivered.
+
+        Returns:
+            list of dict: The transactions, oldest first
+        """
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT tx_json FROM outbox WHERE NOT failed '
+                'ORDER BY rowid').fetchall()
+        return [json.loads(tx_json) for tx_json, in rows]
+
+    def failed(self):
+        """Get the transactions that were permanently rejected.
+
+        Returns:
+            dict: The last error of each transaction, keyed by the
+            transaction's id
+        """
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT tx_id, last_error FROM outbox WHERE failed '
+                'ORDER BY rowid').fetchall()
+        return dict(rows)
+
+    def stats(self):
+        """Get the outbox's statistics.
+
+        Returns:
+            dict: The statistics::
+
+                {
+                    'pending': Number of transactions waiting to be
+                               delivered,
+                    'failed': Number of permanently rejected
+                              transactions,
+                    'delivered': Number of transactions delivered,
+                    'retries': Number of resends,
+                }
+        """
+        with self._lock:
+            pending, failed = self._db.execute(
+                'SELECT COUNT(*) - COALESCE(SUM(failed), 0), '
+                'COALESCE(SUM(failed), 0) FROM outbox').fetchone()
+            return {
+                'pending': pending,
+                'failed': failed,
+                'delivered': self.delivered,
+                'retries': self.retries,
+            }
+
+    def drain(self, send, *, now=None):
+        """Resend every transaction that is due to be resent.
+
+        Args:
+            send (callable): Function sending a transaction. It returns
+                ``True`` if the transaction was delivered and ``False``
+                if it was permanently rejected; any exception it raises
+                is taken as a failed attempt, after which the
+                transaction is resent later.
+            now (float, keyword, optional): Time (as returned by
+                :func:`time.time`) at which transactions must be due.
+                Defaults to the current time.
+
+        Returns:
+            int: Number of transactions delivered
+        """
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT tx_json FROM outbox WHERE NOT failed AND '
+                'next_attempt <= ? ORDER BY rowid',
+                (time() if now is None else now,)).fetchall()
+
+        delivered = 0
+        for tx_json, in rows:
+            if self._closed:
+                break
+            tx = json.loads(tx_json)
+            with self._lock:
+                self.retries += 1
+            try:
+                is_delivered = send(tx)
+            except Exception as ex:
+                self.defer(tx['id'], ex)
+                continue
+
+            if is_delivered:
+                self.remove(tx['id'])
+                delivered += 1
+            else:
+                self.fail(tx['id'])
+        return delivered
+
+    def next_attempt(self):
+        """float: Time of the next scheduled resend, or ``None`` if
+        there is nothing to resend"""
+        with self._lock:
+            return self._db.execute(
+                'SELECT MIN(next_attempt) FROM outbox '
+                'WHERE NOT failed').fetchone()[0]
+
+    def start(self, send):
+        """Start resending transactions on a background thread, starting
+        with any that are already due, or that were left in the outbox
+        without being deferred (e.g. by a process that crashed while
+        sending them).
+
+        Args:
+            send (callable): Function sending a transaction (see
+                :meth:`drain`)
+        """
+        def run():
+            while not self._closed:
+                self.drain(send)
+                next_attempt = self.next_attempt()
+                timeout = self.poll_interval
+                if next_attempt is not None:
+                    timeout = min(max(next_attempt - time(), 0), timeout)
+                self._wakeup.wait(timeout)
+                self._wakeup.clear()
+
+        # Transactions that were never deferred were left by a previous
+        # process, as this one has not sent any yet
+        with self._lock:
+            self._db.execute(
+                'UPDATE outbox SET next_attempt = ? '
+                'WHERE next_attempt IS NULL', (time(),))
+
+        self._sender = Thread(target=run, daemon=True,
+                              name='coalaip-bigchaindb-outbox')
+        self._sender.start()
+
+    def close(self):
+        """Stop the background thread, if any, and close the database.
+
+        Undelivered transactions stay in the database, to be resent by
+        the next :class:`~.Outbox` opened on it.
+        """
+        self._closed = True
+        self._wakeup.set()
+        if self._sender is not None:
+            self._sender.join()
+        with self._lock:
+            self._db.close()
+
+
+def is_retriable(ex):
+    """Check if a failure to send a transaction may succeed if the
+    transaction is sent again, i.e. if BigchainDB could not be reached
+    or failed with a server error rather than rejecting the transaction.
+    """
+    if isinstance(ex, ConnectionError):
+        return True
+    status_code = getattr(ex, 'status_code', None)
+    return status_code is None or status_code >= 500
+
+
+def _describe(error):
+    if error is None:
+        return None
+    return '{}: {}'.format(type(error).__name__, error)
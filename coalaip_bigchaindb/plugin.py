@@ -1,3 +1,9 @@
+from collections import OrderedDict
+from copy import deepcopy
+from functools import partial
+from random import uniform
+from time import monotonic, sleep
+
 from bigchaindb_driver import BigchainDB
 from bigchaindb_driver.crypto import generate_keypair
 from bigchaindb_driver.exceptions import (
@@ -11,15 +17,38 @@ from coalaip.exceptions import (
     EntityCreationError,
     EntityNotFoundError,
     EntityTransferError,
+    PersistenceError,
 )
 from coalaip.plugin import AbstractPlugin
+from coalaip_bigchaindb import builder
+from coalaip_bigchaindb.cache import (
+    HistoryCache,
+    LRUCache,
+    OwnerIndex,
+    SingleFlight,
+)
+from coalaip_bigchaindb.instrumentation import Instrumentation, instrumented
+from coalaip_bigchaindb.keypairs import KeypairPool
+from coalaip_bigchaindb.outbox import is_retriable
+from coalaip_bigchaindb.signing import SigningPool
+from coalaip_bigchaindb.transport import PooledTransport
 from coalaip_bigchaindb.utils import (
+    BatchResult,
+    TransactionView,
+    get_asset_id,
+    iter_json_array,
+    iter_order_transactions,
     make_transfer_tx,
-    order_transactions,
+    map_concurrently,
+    order_history,
     reraise_as_persistence_error_if_not,
 )
 
 
+DEFAULT_MAX_WORKERS = 10
+SETTLED_STATUSES = ('valid', 'invalid')
+
+
 class Plugin(AbstractPlugin):
     """BigchainDB ledger plugin for `COALA IP's Python reference
     implementation <https://github.com/bigchaindb/pycoalaip>`_.
@@ -28,16 +57,197 @@ class Plugin(AbstractPlugin):
     related actions.
     """
 
-    def __init__(self, *nodes):
+    def __init__(self, *nodes, timeout=None, max_retries=0,
+                 pool_maxsize=10, pool_block=False, headers=None,
+                 latency_aware=False, transport_class=PooledTransport,
+                 prepare_offline=False, signing_workers=None,
+                 keypair_pool_size=None, tx_cache_size=None,
+                 history_cache_size=None, tip_cache_size=None,
+                 owner_index_size=None, owner_index_ttl=None,
+                 coalesce_reads=False, observers=None, outbox=None, tx_store=None):
         """Initialize a :class:`~.Plugin` instance and connect to one or
         more BigchainDB nodes.
 
         Args:
             *nodes (str): One or more URLs of BigchainDB nodes to
                 connect to as the persistence layer
+            timeout (float or tuple, keyword, optional): Timeout of each
+                request to BigchainDB, in seconds; either a single
+                timeout or a ``(connect timeout, read timeout)`` pair.
+                Defaults to no timeout.
+            max_retries (int or :class:`urllib3.util.retry.Retry`,
+                keyword, optional): Retry policy for failed requests to
+                BigchainDB; a number only retries failed connection
+                attempts. Defaults to ``0``.
+            pool_maxsize (int, keyword, optional): Maximum number of
+                keep-alive connections to keep open to each node.
+                Defaults to ``10``.
+            pool_block (bool, keyword, optional): Whether to limit the
+                number of concurrent connections to each node to
+                :attr:`pool_maxsize` by waiting for a free connection,
+                rather than opening (and then discarding) extra ones.
+                Defaults to ``False``.
+            headers (dict, keyword, optional): Extra headers to send
+                with every request to BigchainDB
+            latency_aware (bool, keyword, optional): If there are
+                multiple :attr:`nodes`, whether to send reads to the
+                fastest healthy node and avoid failing nodes for a while
+                (see :class:`~.LatencyAwareScheduler`), rather than
+                sending requests to each node in turn. Defaults to
+                ``False``.
+            transport_class (type, keyword, optional): Transport to
+                connect to BigchainDB through; given the :attr:`nodes`,
+                the connection options above and the plugin's
+                :attr:`instrumentation`. Defaults to
+                :class:`~.PooledTransport`.
+            prepare_offline (bool, keyword, optional): Whether to
+                prepare transactions with the driver-free
+                :mod:`~coalaip_bigchaindb.builder` rather than the
+                driver. Both give the same transactions, but the builder
+                is faster. Defaults to ``False``.
+            signing_workers (int, keyword, optional): If given, fulfill
+                the transactions of batch operations (e.g.
+                :meth:`save_many`) in parallel on a
+                :class:`~.SigningPool` (:attr:`signing_pool`) of this
+                many worker processes. Defaults to fulfilling them
+                one by one in the calling thread.
+            keypair_pool_size (int, keyword, optional): If given, keep
+                up to this many keypairs pre-generated in the background
+                by a :class:`~.KeypairPool` (:attr:`keypair_pool`) for
+                :meth:`generate_user` to hand out. Defaults to generating
+                each keypair on demand.
+            tx_cache_size (int, keyword, optional): If given, keep up
+                to this many transactions loaded through :meth:`load`
+                in an in-memory LRU cache (:attr:`tx_cache`). Only
+                transactions that are already ``'valid'`` (and therefore
+                immutable) are cached. Defaults to no caching.
+            history_cache_size (int, keyword, optional): If given, keep
+                the ordered transaction chains of up to this many
+                entities in memory (:attr:`history_cache`), so that
+                :meth:`get_history` and :meth:`transfer` only need to
+                order transactions that are new since their last call.
+                Defaults to no caching.
+            tip_cache_size (int, keyword, optional): If given, track the
+                latest transaction of up to this many entities created
+                or transferred through this plugin (:attr:`tip_cache`),
+                so that :meth:`transfer` can spend them without first
+                fetching the entity's history. Defaults to no tracking.
+            owner_index_size (int, keyword, optional): If given, keep
+                the assets owned by up to this many public keys looked
+                up through :meth:`get_owned` in an in-memory index
+                (:attr:`owner_index`), kept up to date with the entities
+                created or transferred through this plugin, so that
+                repeated lookups do not query BigchainDB. Defaults to no
+                indexing.
+            owner_index_ttl (float, keyword, optional): Seconds after
+                which the assets indexed for a public key are fetched
+                from BigchainDB again, to pick up changes made by other
+                clients. Defaults to never refetching them.
+            coalesce_reads (bool, keyword, optional): Whether concurrent
+                calls to :meth:`load` for the same transaction, or to
+                :meth:`get_history` (or anything else that fetches an
+                entity's history, e.g. :meth:`transfer`) for the same
+                entity, should share a single request to BigchainDB and
+                its result or error (see :attr:`single_flight`), rather
+                than each making their own. Defaults to ``False``.
+            observers (list of :class:`~.Observer`, keyword, optional):
+                Observers to notify of the timings of the plugin's
+                operations, their phases and their requests to BigchainDB
+                (through :attr:`instrumentation`). Defaults to no
+                instrumentation.
+            outbox (:class:`~.Outbox`, keyword, optional): If given,
+                write every fulfilled transaction to this durable outbox
+                (:attr:`outbox`) before sending it. Transactions that
+                fail to send because BigchainDB could not be reached or
+                had a server error are then kept in the outbox and
+                resent in the background until they are delivered,
+                instead of failing the operation; transactions left in
+                the outbox by a previous process are resent on startup.
+                Defaults to sending transactions directly.
+            tx_store (:class:`~.TransactionStore`, keyword, optional):
+                If given, persist the valid transactions loaded through
+                :meth:`load` in this on-disk store (:attr:`tx_store`),
+                and look transactions up in it before fetching them from
+                BigchainDB, so that they survive restarts. Histories are
+                always fetched from BigchainDB, as they may have grown
+                since they were last fetched. Defaults to no
+                persistence.
         """
 
-        self.driver = BigchainDB(*nodes)
+        self.instrumentation = Instrumentation(observers or ())
+        self.prepare_offline = prepare_offline
+        self.driver = BigchainDB(
+            *nodes,
+            transport_class=partial(transport_class, timeout=timeout,
+                                    max_retries=max_retries,
+                                    pool_maxsize=pool_maxsize,
+                                    pool_block=pool_block,
+                                    latency_aware=latency_aware,
+                                    instrumentation=self.instrumentation),
+            headers=headers)
+        self.signing_pool = (SigningPool(signing_workers)
+                             if signing_workers else None)
+        self.keypair_pool = (KeypairPool(keypair_pool_size)
+                             if keypair_pool_size else None)
+        self.tx_cache = LRUCache(tx_cache_size) if tx_cache_size else None
+        self.history_cache = (HistoryCache(history_cache_size)
+                              if history_cache_size else None)
+        self.tip_cache = LRUCache(tip_cache_size) if tip_cache_size else None
+        self.owner_index = (OwnerIndex(owner_index_size,
+                                       ttl=owner_index_ttl)
+                            if owner_index_size else None)
+        self.single_flight = SingleFlight() if coalesce_reads else None
+        self.tx_store = tx_store
+        self.outbox = outbox
+        if self.outbox is not None:
+            self.outbox.start(self._resend_tx)
+
+    def pool_stats(self):
+        """Get usage statistics of the connection pool to each
+        BigchainDB node.
+
+        Returns:
+            dict: Each node's statistics (see
+            :meth:`.PooledConnection.pool_stats`), keyed by the node's
+            URL; empty if the :attr:`transport_class` does not keep any
+        """
+
+        transport = self.driver.transport
+        if not hasattr(transport, 'pool_stats'):
+            return {}
+        return transport.pool_stats()
+
+    def node_stats(self):
+        """Get the latency and health statistics of each BigchainDB
+        node, if :attr:`latency_aware` node selection is enabled.
+
+        Returns:
+            dict: Each node's statistics (see
+            :meth:`.LatencyAwareScheduler.stats`), keyed by the node's
+            URL; empty if the :attr:`transport_class` does not keep any
+        """
+
+        transport = self.driver.transport
+        if not hasattr(transport, 'node_stats'):
+            return {}
+        return transport.node_stats()
+
+    def close(self):
+        """Close all pooled connections to BigchainDB and shut down the
+        :attr:`signing_pool`, :attr:`keypair_pool`, :attr:`outbox` and
+        :attr:`tx_store`, if any.
+        """
+
+        if self.outbox is not None:
+            self.outbox.close()
+        if self.tx_store is not None:
+            self.tx_store.close()
+        if hasattr(self.driver.transport, 'close'):
+            self.driver.transport.close()
+        if self.signing_pool is not None:
+            self.signing_pool.close()
+        if self.keypair_pool is not None:
+            self.keypair_pool.close()
 
     @property
     def type(self):
@@ -48,6 +258,9 @@ class Plugin(AbstractPlugin):
         """Create a new public/private keypair for use with
         BigchainDB.
 
+        The keypair is taken from the :attr:`keypair_pool` if there is
+        one with keypairs available, and generated on demand otherwise.
+
         Returns:
             dict: A dict containing a new user's public and private
             keys::
@@ -58,7 +271,13 @@ class Plugin(AbstractPlugin):
                 }
         """
 
-        return generate_keypair()._asdict()
+        keypair = None
+        if self.keypair_pool is not None:
+            keypair = self.keypair_pool.take()
+        if keypair is None:
+            keypair = generate_keypair()
+
+        return keypair._asdict()
 
     def is_same_user(self, user_a, user_b):
         """Check if :attr:`user_a` represents the same user as
@@ -67,6 +286,7 @@ class Plugin(AbstractPlugin):
 
         return user_a['public_key'] == user_b['public_key']
 
+    @instrumented
     @reraise_as_persistence_error_if_not(EntityNotFoundError)
     def get_history(self, persist_id):
         """Get the transaction history of an COALA IP entity on
@@ -95,23 +315,146 @@ class Plugin(AbstractPlugin):
                 from the BigchainDB driver occurred.
         """
 
+        events, _ = self._get_chain(persist_id)
+        return [event.to_dict() for event in events]
+
+    @instrumented
+    @reraise_as_persistence_error_if_not(EntityNotFoundError)
+    def iter_history(self, persist_id):
+        """Generator: Iterate over the ownership history of an COALA IP
+        entity on BigchainDB, from its creation onwards.
+
+        Unlike :meth:`get_history`, the entity's transactions are
+        streamed from BigchainDB (if the transport supports it) and
+        only the ids and owner of those that cannot be placed in the
+        history yet are held in memory, so that events are yielded as
+        soon as they are known. If there is a :attr:`history_cache`,
+        the entity's history is taken from it instead.
+
+        Args:
+            persist_id (str): Asset id of the entity on the connected
+                BigchainDB instance
+
+        Yields:
+            :class:`~.HistoryEvent`: Each ownership event, i.e. a
+            ``(public_key, event_id)`` pair where ``event_id`` is the
+            event's transaction id
+
+        Raises:
+            :exc:`coalaip.EntityNotFoundError`: If no asset whose id
+                matches :attr:`persist_id` could be found in the
+                connected BigchainDB instance
+            :exc:`~.PersistenceError`: If any other unhandled error
+                from the BigchainDB driver occurred.
+        """
+
+        if self.history_cache is not None:
+            events, _ = self._get_chain(persist_id)
+            yield from events
+            return
+
+        views = (TransactionView.from_tx(tx)
+                 for tx in self._iter_transactions(persist_id))
+        for view in iter_order_transactions(views, key=TransactionView.link):
+            yield view.to_event()
+
+    @instrumented
+    def get_owned(self, public_key, *, max_workers=DEFAULT_MAX_WORKERS):
+        """Get the COALA IP entities currently owned by a user on
+        BigchainDB.
+
+        See :meth:`iter_owned`.
+
+        Returns:
+            list of str: Asset ids of the entities
+        """
+
+        return list(self.iter_owned(public_key, max_workers=max_workers))
+
+    @instrumented
+    @reraise_as_persistence_error_if_not()
+    def iter_owned(self, public_key, *, max_workers=DEFAULT_MAX_WORKERS):
+        """Generator: Iterate over the COALA IP entities currently owned
+        by a user on BigchainDB.
+
+        The user's unspent outputs are streamed from BigchainDB (if the
+        transport supports it) and resolved to asset ids by retrieving
+        their transactions, up to :attr:`max_workers` at a time. If
+        there is an :attr:`owner_index` that already holds the user,
+        the entities are taken from it instead; otherwise, the user is
+        added to it once iteration completes.
+
+        Args:
+            public_key (str): Public key of the user
+            max_workers (int, keyword, optional): Maximum number of
+                concurrent requests to BigchainDB. Defaults to
+                ``10``.
+
+        Yields:
+            str: Asset id of each entity owned by the user
+
+        Raises:
+            :exc:`~.PersistenceError`: If any unhandled error from the
+                BigchainDB driver occurred.
+        """
+
+        if self.owner_index is not None:
+            owned = self.owner_index.get(public_key)
+            if owned is not None:
+                yield from owned
+                return
+
+        if self.owner_index is None:
+            yield from self._scan_owned(public_key, max_workers)
+            return
+
+        # Entities created or transferred while scanning are applied to
+        # the scanned list before it is indexed
+        scan = self.owner_index.scan(public_key)
         try:
-            transactions = self.driver.transactions.get(asset_id=persist_id)
-        except NotFoundError:
-            raise EntityNotFoundError()
+            owned = []
+            for asset_id in self._scan_owned(public_key, max_workers):
+                owned.append(asset_id)
+                yield asset_id
+            self.owner_index.put(public_key, owned, scan=scan)
+        finally:
+            self.owner_index.discard(scan)
+
+    def _scan_owned(self, public_key, max_workers):
+        """Generator: Resolve the unspent outputs of a public key to
+        asset ids, in batches of up to :attr:`max_workers`.
+        """
+        batch = []
+        for output in self._iter_outputs(public_key):
+            batch.append(output['transaction_id'])
+            if len(batch) >= max_workers:
+                yield from self._resolve_asset_ids(batch, max_workers)
+                batch = []
+        yield from self._resolve_asset_ids(batch, max_workers)
 
-        # Assume that each transaction will only ever have one owner
-        # (and therefore one output as well)
-        history = [{
-            'user': {
-                'public_key': tx['outputs'][0]['public_keys'][0],
-                'private_key': None
-            },
-            'event_id': tx['id'],
-        } for tx in order_transactions(transactions)]
+    def _iter_outputs(self, public_key):
+        """Generator: Fetch the unspent outputs of a public key, decoding
+        them one by one as they are streamed from BigchainDB if the
+        transport supports streaming.
+        """
+        transport = self.driver.transport
+        if hasattr(transport, 'stream_request'):
+            chunks = transport.stream_request(
+                'GET', path=self.driver.outputs.path,
+                params={'public_key': public_key, 'spent': 'false'})
+            yield from iter_json_array(chunks)
+        else:
+            yield from self.driver.outputs.get(public_key, spent=False)
 
-        return history
+    def _resolve_asset_ids(self, tx_ids, max_workers):
+        results = map_concurrently(self._retrieve_tx, tx_ids,
+                                   max_workers=max_workers)
+        for tx_json, error in results:
+            if error is not None:
+                raise error
+            yield get_asset_id(tx_json)
 
+    @instrumented
     @reraise_as_persistence_error_if_not(EntityNotFoundError)
     def get_status(self, persist_id):
         """Get the status of an COALA IP entity on BigchainDB.
@@ -141,6 +484,106 @@ class Plugin(AbstractPlugin):
         except NotFoundError:
             raise EntityNotFoundError()
 
+    @instrumented
+    def get_statuses(self, persist_ids, *, max_workers=DEFAULT_MAX_WORKERS):
+        """Get the statuses of several COALA IP entities on BigchainDB,
+        querying them concurrently.
+
+        Args:
+            persist_ids (list of str): Asset ids of the entities on the
+                connected BigchainDB instance
+            max_workers (int, keyword, optional): Maximum number of
+                concurrent requests to BigchainDB. Defaults to
+                ``10``.
+
+        Returns:
+            list of :class:`~.BatchResult`: The outcome of getting each
+            entity's status, in the same order as :attr:`persist_ids`.
+            On success, ``result`` holds the status as returned by
+            :meth:`get_status`; otherwise, ``error`` holds the
+            :exc:`coalaip.EntityNotFoundError` or
+            :exc:`~.PersistenceError` that :meth:`get_status` would have
+            raised for the entity.
+        """
+
+        return map_concurrently(
+            self.instrumentation.propagate(self.get_status), persist_ids,
+            max_workers=max_workers)
+
+    @instrumented
+    def wait_until_valid(self, persist_ids, *, timeout=60,
+                         initial_interval=0.5, max_interval=10,
+                         max_workers=DEFAULT_MAX_WORKERS):
+        """Poll BigchainDB until each of the given COALA IP entities is
+        settled (i.e. ``'valid'`` or ``'invalid'``), or until
+        :attr:`timeout` runs out.
+
+        Every entity is polled on its own schedule, with the interval
+        between its polls doubling (with random jitter) after each poll
+        that finds it unsettled. Entities stop being polled as soon as
+        they are settled, and all of the entities that are due for a
+        poll at the same time are polled concurrently.
+
+        Args:
+            persist_ids (list of str): Asset ids of the entities on the
+                connected BigchainDB instance
+            timeout (float, keyword, optional): Maximum number of
+                seconds to keep polling for. Defaults to ``60``.
+            initial_interval (float, keyword, optional): Seconds to wait
+                before polling an unsettled entity for the second time.
+                Defaults to ``0.5``.
+            max_interval (float, keyword, optional): Maximum number of
+                seconds to wait between polls of an unsettled entity.
+                Defaults to ``10``.
+            max_workers (int, keyword, optional): Maximum number of
+                concurrent requests to BigchainDB. Defaults to
+                ``10``.
+
+        Returns:
+            :class:`~collections.OrderedDict`: The last known status of
+            each entity (see :meth:`get_status`), keyed by its asset id
+            in the order of :attr:`persist_ids`. An entity whose status
+            could never be found is mapped to ``None``. Entities that
+            are unsettled when :attr:`timeout` runs out keep their last
+            known status (e.g. ``'backlog'``).
+        """
+
+        statuses = OrderedDict((persist_id, None)
+                               for persist_id in persist_ids)
+        deadline = monotonic() + timeout
+        intervals = dict.fromkeys(statuses, initial_interval)
+        next_polls = dict.fromkeys(statuses, monotonic())
+
+        while next_polls:
+            now = monotonic()
+            due = [persist_id for persist_id, poll_at in next_polls.items()
+                   if poll_at <= now]
+            results = map_concurrently(
+                self.instrumentation.propagate(self.get_status), due,
+                max_workers=max_workers)
+
+            for persist_id, (status, _) in zip(due, results):
+                if status is not None:
+                    statuses[persist_id] = status['status']
+                if statuses[persist_id] in SETTLED_STATUSES:
+                    del next_polls[persist_id]
+                    continue
+
+                interval = intervals[persist_id]
+                intervals[persist_id] = min(interval * 2, max_interval)
+                next_polls[persist_id] = monotonic() + uniform(interval / 2,
+                                                               interval)
+
+            if not next_polls:
+                break
+            next_poll = min(next_polls.values())
+            if next_poll > deadline:
+                break
+            sleep(max(next_poll - monotonic(), 0))
+
+        return statuses
+
+    @instrumented
     @reraise_as_persistence_error_if_not(EntityCreationError)
     def save(self, entity_data, *, user):
         """Create and assign a new entity with the given data to the
@@ -170,25 +613,207 @@ class Plugin(AbstractPlugin):
                 from the BigchainDB driver occurred.
         """
 
+        fulfilled_tx = self._make_create_tx(entity_data, user)
+        self._send_create_tx(fulfilled_tx)
+
+        return fulfilled_tx['id']
+
+    @instrumented
+    def save_many(self, entities_data, *, user,
+                  max_workers=DEFAULT_MAX_WORKERS):
+        """Create and assign a batch of new entities with the given data
+        to the given user's public key on BigchainDB.
+
+        All of the creation transactions are prepared and signed up
+        front before being sent to BigchainDB concurrently, using at
+        most :attr:`max_workers` requests in flight at once. A failure
+        to save one entity does not abort the rest of the batch.
+
+        Args:
+            entities_data (list of dict): The dicts holding each
+                entity's data (see :meth:`save`)
+            user (dict, keyword): The user to assign the created
+                entities to on BigchainDB (see :meth:`save`)
+            max_workers (int, keyword, optional): Maximum number of
+                concurrent requests to BigchainDB. Defaults to
+                ``10``.
+
+        Returns:
+            list of :class:`~.BatchResult`: The outcome of saving each
+            entity, in the same order as :attr:`entities_data`. On
+            success, ``result`` holds the asset id of the new entity;
+            otherwise, ``error`` holds the :exc:`coalaip.EntityCreationError`
+            or :exc:`~.PersistenceError` that :meth:`save` would have
+            raised for the entity.
+        """
+
+        entities_data = list(entities_data)
+        results = [None] * len(entities_data)
+
+        prepared_txs = []
+        for index, entity_data in enumerate(entities_data):
+            try:
+                tx = self._prepare_create_tx(entity_data, user)
+            except Exception as ex:
+                results[index] = BatchResult(result=None, error=ex)
+            else:
+                prepared_txs.append((index, tx))
+
+        fulfilled = self._fulfill_many(
+            [(tx, user['private_key']) for _, tx in prepared_txs],
+            error_cls=EntityCreationError)
+        fulfilled_txs = []
+        for (index, _), (fulfilled_tx, error) in zip(prepared_txs, fulfilled):
+            if error is not None:
+                results[index] = BatchResult(result=None, error=error)
+            else:
+                fulfilled_txs.append((index, fulfilled_tx))
+
+        def send(indexed_tx):
+            _, fulfilled_tx = indexed_tx
+            self._send_create_tx(fulfilled_tx)
+            return fulfilled_tx['id']
+
+        sent = map_concurrently(send, fulfilled_txs, max_workers=max_workers)
+        for (index, _), result in zip(fulfilled_txs, sent):
+            results[index] = result
+
+        return results
+
+    def _make_create_tx(self, entity_data, user):
+        tx = self._prepare_create_tx(entity_data, user)
+        return self._fulfill_tx(tx, user['private_key'],
+                                error_cls=EntityCreationError)
+
+    @reraise_as_persistence_error_if_not(EntityCreationError)
+    def _prepare_create_tx(self, entity_data, user):
         try:
-            tx = self.driver.transactions.prepare(
-                operation='CREATE',
-                signers=user['public_key'],
-                asset={'data': entity_data})
+            prepare = (builder.prepare_transaction if self.prepare_offline
+                       else self.driver.transactions.prepare)
+            with self.instrumentation.phase('prepare', 'CREATE'):
+                return prepare(operation='CREATE',
+                               signers=user['public_key'],
+                               asset={'data': entity_data})
         except BigchaindbException as ex:
             raise EntityCreationError(error=ex) from ex
+
+    def _fulfill_tx(self, tx, private_keys, *, error_cls):
         try:
-            fulfilled_tx = self.driver.transactions.fulfill(
-                tx, private_keys=user['private_key'])
-        except MissingPrivateKeyError as ex:
+            with self.instrumentation.phase('fulfill', tx['operation']):
+                return self.driver.transactions.fulfill(
+                    tx, private_keys=private_keys)
+        except Exception as ex:
+            raise _as_fulfill_error(ex, error_cls) from ex
+
+    def _fulfill_many(self, transactions, *, error_cls):
+        """Fulfill a batch of ``(transaction, private_keys)`` pairs,
+        through the :attr:`signing_pool` if there is one.
+
+        Returns:
+            list of :class:`~.BatchResult`: The fulfilled transactions,
+            with errors mapped to :attr:`error_cls` as in
+            :meth:`_fulfill_tx`
+        """
+        transactions = list(transactions)
+        operation = transactions[0][0]['operation'] if transactions else None
+        with self.instrumentation.phase('fulfill', operation,
+                                        count=len(transactions)):
+            results = self._fulfill_all(transactions)
+
+        return [result if result.error is None else
+                BatchResult(result=None,
+                            error=_as_fulfill_error(result.error, error_cls))
+                for result in results]
+
+    def _fulfill_all(self, transactions):
+        if self.signing_pool is not None:
+            return self.signing_pool.fulfill_many(transactions)
+
+        results = []
+        for tx, private_keys in transactions:
+            try:
+                fulfilled_tx = self.driver.transactions.fulfill(
+                    tx, private_keys=private_keys)
+            except Exception as ex:
+                results.append(BatchResult(result=None, error=ex))
+            else:
+                results.append(BatchResult(result=fulfilled_tx, error=None))
+        return results
+
+    @reraise_as_persistence_error_if_not(EntityCreationError)
+    def _send_create_tx(self, fulfilled_tx):
+        try:
+            with self.instrumentation.phase('send', 'CREATE'):
+                self._send_tx(fulfilled_tx)
+        except (TransportError, ConnectionError) as ex:
             raise EntityCreationError(error=ex) from ex
+
+        self._track_tip(fulfilled_tx['id'], fulfilled_tx)
+        self._track_owner(fulfilled_tx['id'], fulfilled_tx)
+
+    def _send_tx(self, fulfilled_tx):
+        """Send a fulfilled transaction, writing it to the
+        :attr:`outbox` first if there is one.
+
+        If sending fails with an error worth retrying, the transaction
+        is left in the outbox to be resent in the background and is
+        returned as if it had been sent. If BigchainDB rejects it, it is
+        only reported as rejected if BigchainDB does not already know
+        it (e.g. from an earlier attempt whose response was lost).
+        """
+        if self.outbox is None:
+            return self.driver.transactions.send(fulfilled_tx)
+
+        self.outbox.put(fulfilled_tx)
+        try:
+            tx_json = self.driver.transactions.send(fulfilled_tx)
+        except (TransportError, ConnectionError) as ex:
+            if is_retriable(ex):
+                self.outbox.defer(fulfilled_tx['id'], ex)
+                return fulfilled_tx
+            try:
+                is_known = self._is_known_tx(fulfilled_tx['id'])
+            except (TransportError, ConnectionError) as status_ex:
+                # Whether it was rejected is unknown; retry it later
+                self.outbox.defer(fulfilled_tx['id'], status_ex)
+                return fulfilled_tx
+            if not is_known:
+                self.outbox.remove(fulfilled_tx['id'], delivered=False)
+                raise
+            tx_json = fulfilled_tx
+
+        self.outbox.remove(fulfilled_tx['id'])
+        return tx_json
+
+    def _resend_tx(self, fulfilled_tx):
+        """Resend a transaction from the :attr:`outbox`.
+
+        Returns:
+            bool: ``True`` if the transaction was delivered, either now
+            or by an earlier attempt, and ``False`` if BigchainDB
+            rejected it
+        """
         try:
             self.driver.transactions.send(fulfilled_tx)
         except (TransportError, ConnectionError) as ex:
-            raise EntityCreationError(error=ex) from ex
+            if is_retriable(ex):
+                raise
+            return self._is_known_tx(fulfilled_tx['id'])
+        return True
 
-        return fulfilled_tx['id']
+    def _is_known_tx(self, tx_id):
+        """Check if BigchainDB knows a transaction that it rejected,
+        i.e. if an earlier attempt to send it reached BigchainDB even
+        though its response did not reach us, making the rejected
+        attempt a duplicate.
+        """
+        try:
+            self.driver.transactions.status(tx_id)
+        except NotFoundError:
+            return False
+        return True
 
+    @instrumented
     @reraise_as_persistence_error_if_not(EntityNotFoundError)
     def load(self, persist_id):
         """Load the data of the entity associated with the
@@ -209,24 +834,171 @@ class Plugin(AbstractPlugin):
                 from the BigchainDB driver occurred.
         """
 
-        try:
-            tx_json = self.driver.transactions.retrieve(persist_id)
-        except NotFoundError:
-            raise EntityNotFoundError()
+        tx_json = self._retrieve_tx(persist_id)
 
         if tx_json['operation'] == 'CREATE':
             return tx_json['asset']['data']
         else:
             return tx_json['metadata']
 
+    @instrumented
+    def load_many(self, persist_ids, *, max_workers=DEFAULT_MAX_WORKERS):
+        """Load the data of several entities from BigchainDB, fetching
+        them concurrently.
+
+        Each distinct entity is only loaded once (as in :meth:`load`,
+        going through the :attr:`tx_cache` and :attr:`tx_store`, if
+        any), with at most :attr:`max_workers` requests in flight at
+        once. A failure to load one entity does not abort the rest of
+        the batch.
+
+        Args:
+            persist_ids (list of str): Asset ids of the entities being
+                loaded on the connected BigchainDB instance; may
+                contain duplicates
+            max_workers (int, keyword, optional): Maximum number of
+                concurrent requests to BigchainDB. Defaults to
+                ``10``.
+
+        Returns:
+            list of :class:`~.BatchResult`: The outcome of loading each
+            entity, in the same order as :attr:`persist_ids`. On
+            success, ``result`` holds the entity's data as returned by
+            :meth:`load`; otherwise, ``error`` holds the
+            :exc:`coalaip.EntityNotFoundError` or
+            :exc:`~.PersistenceError` that :meth:`load` would have
+            raised for the entity.
+        """
+
+        persist_ids = list(persist_ids)
+        unique_ids = list(OrderedDict.fromkeys(persist_ids))
+        results = dict(zip(unique_ids, map_concurrently(
+            self.instrumentation.propagate(self.load), unique_ids,
+            max_workers=max_workers)))
+
+        # Give each repeat of an id its own copy of the loaded data, so
+        # that changing one result does not change the others
+        batch = []
+        seen_ids = set()
+        for persist_id in persist_ids:
+            result = results[persist_id]
+            if persist_id in seen_ids:
+                result = result._replace(result=deepcopy(result.result))
+            seen_ids.add(persist_id)
+            batch.append(result)
+        return batch
+
+    def _get_chain(self, asset_id):
+        """Fetch the ordered transaction chain of an asset.
+
+        Returns:
+            tuple: A ``(events, tip)`` pair, where ``events`` is a list
+            of :class:`~.HistoryEvent` ordered from the asset's creation
+            and ``tip`` is the asset's latest transaction (or ``None``
+            if it has no transactions)
+        """
+        with self.instrumentation.phase('history', count=None):
+            try:
+                transactions = self._coalesce(
+                    ('history', asset_id), self.driver.transactions.get,
+                    asset_id=asset_id)
+            except NotFoundError:
+                raise EntityNotFoundError()
+
+        with self.instrumentation.phase('order', count=len(transactions)):
+            if self.history_cache is not None:
+                return self.history_cache.update(asset_id, transactions)
+            # Assume that each transaction will only ever have one owner
+            # (and therefore one output as well)
+            return order_history(transactions)
+
+    def _iter_transactions(self, asset_id):
+        """Generator: Fetch the transactions of an asset, decoding them
+        one by one as they are streamed from BigchainDB if the transport
+        supports streaming (see :meth:`.PooledTransport.stream_request`).
+        """
+        transport = self.driver.transport
+        try:
+            if hasattr(transport, 'stream_request'):
+                chunks = transport.stream_request(
+                    'GET', path=self.driver.transactions.path,
+                    params={'asset_id': asset_id})
+                yield from iter_json_array(chunks)
+            else:
+                yield from self.driver.transactions.get(asset_id=asset_id)
+        except NotFoundError:
+            raise EntityNotFoundError()
+
+    def _retrieve_tx(self, tx_id):
+        if self.tx_cache is not None:
+            tx_json = self.tx_cache.get(tx_id)
+            if tx_json is not None:
+                # Hand out copies, so that callers changing the returned
+                # data (e.g. from load()) cannot change the cached
+                # transaction
+                return deepcopy(tx_json)
+
+        if self.tx_store is not None:
+            tx_json = self.tx_store.get(tx_id)
+            if tx_json is not None:
+                if self.tx_cache is not None:
+                    self.tx_cache.put(tx_id, deepcopy(tx_json))
+                return tx_json
+
+        if self.single_flight is None:
+            return self._fetch_tx(tx_id)
+        # Concurrent callers share the fetched transaction; hand each of
+        # them a copy, as for cached transactions
+        return deepcopy(self.single_flight.do(('retrieve', tx_id),
+                                              self._fetch_tx, tx_id))
+
+    def _fetch_tx(self, tx_id):
+        try:
+            with self.instrumentation.phase('retrieve'):
+                tx_json = self.driver.transactions.retrieve(tx_id)
+        except NotFoundError:
+            raise EntityNotFoundError()
+
+        # Only cache transactions that can no longer change (i.e. those in
+        # a valid block); anything else may still be dropped by the ledger
+        if ((self.tx_cache is not None or self.tx_store is not None) and
+                self._is_valid(tx_id)):
+            if self.tx_cache is not None:
+                self.tx_cache.put(tx_id, deepcopy(tx_json))
+            if self.tx_store is not None:
+                self.tx_store.put(tx_json)
+
+        return tx_json
+
+    def _coalesce(self, key, func, *args, **kwargs):
+        """Call ``func(*args, **kwargs)``, sharing the call with any
+        concurrent ones for the same :attr:`key` if reads are coalesced
+        (see :attr:`single_flight`).
+        """
+        if self.single_flight is None:
+            return func(*args, **kwargs)
+        return self.single_flight.do(key, func, *args, **kwargs)
+
+    def _is_valid(self, tx_id):
+        try:
+            return self.get_status(tx_id).get('status') == 'valid'
+        except (EntityNotFoundError, PersistenceError):
+            return False
+
+    @instrumented
     @reraise_as_persistence_error_if_not(EntityNotFoundError,
                                          EntityTransferError)
     def transfer(self, persist_id, transfer_payload=None, *, from_user,
-                 to_user):
+                 to_user, input_tx=None):
         """Transfer the entity matching the given :attr:`persist_id`
         from the current owner (:attr:`from_user`) to a new owner
         (:attr:`to_user`).
 
+        The transfer spends the entity's latest transaction. Unless it
+        is given as :attr:`input_tx` or was written by this plugin and
+        tracked through :attr:`tip_cache`, the entity's history is
+        fetched from BigchainDB to find it.
+
         Args:
             persist_id (str): Asset id of the entity on the connected
                 BigchainDB instance
@@ -238,6 +1010,9 @@ class Plugin(AbstractPlugin):
             to_user (dict, keyword): A dict holding the new owner's
                 public key and private key (see
                 :meth:`generate_user`)
+            input_tx (dict, keyword, optional): The entity's latest
+                transaction, if already known, to spend in the
+                transfer
 
         Returns:
             str: Id of the transaction transferring the entity from
@@ -248,34 +1023,338 @@ class Plugin(AbstractPlugin):
                 matches :attr:`persist_id` could be found in the
                 connected BigchainDB instance
             :exc:`coalaip.EntityTransferError`: If the transfer
-                transaction fails
+                transaction fails, including if a given or tracked
+                :attr:`input_tx` is not a transaction of the entity
+                currently owned by :attr:`from_user` or has already
+                been spent
             :exc:`~.PersistenceError`: If any other unhandled error
                 from the BigchainDB driver occurred.
         """
 
-        try:
-            ordered_tx = order_transactions(
-                self.driver.transactions.get(asset_id=persist_id))
-            last_tx = ordered_tx[-1]
-        except NotFoundError:
+        input_tx, is_local_tip = self._get_transfer_input(
+            persist_id, from_user=from_user, input_tx=input_tx)
+        fulfilled_tx = self._make_transfer_tx(
+            input_tx, transfer_payload, from_user=from_user, to_user=to_user)
+        transfer_json = self._send_transfer_tx(
+            persist_id, fulfilled_tx, is_local_tip=is_local_tip)
+
+        return transfer_json['id']
+
+    @instrumented
+    @reraise_as_persistence_error_if_not(EntityNotFoundError,
+                                         EntityTransferError)
+    def transfer_chain(self, persist_id, transfers, *, input_tx=None,
+                       timeout=60, initial_interval=0.5, max_interval=10):
+        """Transfer the entity matching the given :attr:`persist_id`
+        through a sequence of owners in a single call (e.g. from its
+        creator to a publisher and then on to a licensee).
+
+        All of the transfer transactions are built and signed up front,
+        each spending the one before it, without fetching the entity's
+        history in between. As BigchainDB only accepts transactions
+        spending valid transactions, each transfer is sent once the
+        previous one is ``'valid'`` (polling as in
+        :meth:`wait_until_valid`); the last transfer is not waited for.
+
+        Args:
+            persist_id (str): Asset id of the entity on the connected
+                BigchainDB instance
+            transfers (list of tuple): ``(transfer_payload, from_user,
+                to_user)`` tuples describing each transfer in order
+                (see :meth:`transfer`), where each transfer's
+                ``from_user`` is the previous transfer's ``to_user``
+            input_tx (dict, keyword, optional): The entity's latest
+                transaction, if already known, to spend in the first
+                transfer (see :meth:`transfer`)
+            timeout (float, keyword, optional): Maximum number of
+                seconds to wait for each transfer to become valid before
+                sending the next. Defaults to ``60``.
+            initial_interval (float, keyword, optional): See
+                :meth:`wait_until_valid`. Defaults to ``0.5``.
+            max_interval (float, keyword, optional): See
+                :meth:`wait_until_valid`. Defaults to ``10``.
+
+        Returns:
+            list of str: Ids of the transfer transactions, in order
+
+        Raises:
+            :exc:`coalaip.EntityNotFoundError`: If no asset whose id
+                matches :attr:`persist_id` could be found in the
+                connected BigchainDB instance
+            :exc:`coalaip.EntityTransferError`: If the transfers do not
+                form a chain of owners, or if any transfer fails or does
+                not become valid in time, in which case the transfers
+                before it have already been sent
+            :exc:`~.PersistenceError`: If any other unhandled error
+                from the BigchainDB driver occurred.
+        """
+
+        transfers = list(transfers)
+        if not transfers:
+            return []
+        for (_, _, to_user), (_, from_user, _) in zip(transfers,
+                                                      transfers[1:]):
+            if not self.is_same_user(to_user, from_user):
+                raise EntityTransferError(
+                    ('Cannot chain a transfer to `{}` with a transfer from '
+                     '`{}`').format(to_user['public_key'],
+                                    from_user['public_key']))
+
+        input_tx, is_local_tip = self._get_transfer_input(
+            persist_id, from_user=transfers[0][1], input_tx=input_tx)
+        transfer_txs = []
+        for transfer_payload, _, to_user in transfers:
+            input_tx = self._prepare_transfer_tx(input_tx, transfer_payload,
+                                                 to_user=to_user)
+            transfer_txs.append(input_tx)
+
+        private_keys = [from_user['private_key']
+                        for _, from_user, _ in transfers]
+        fulfilled_txs = []
+        for fulfilled_tx, error in self._fulfill_many(
+                list(zip(transfer_txs, private_keys)),
+                error_cls=EntityTransferError):
+            if error is not None:
+                raise error
+            fulfilled_txs.append(fulfilled_tx)
+
+        transfer_tx_ids = []
+        for fulfilled_tx in fulfilled_txs:
+            if transfer_tx_ids:
+                previous_tx_id = transfer_tx_ids[-1]
+                status = self.wait_until_valid(
+                    [previous_tx_id], timeout=timeout,
+                    initial_interval=initial_interval,
+                    max_interval=max_interval)[previous_tx_id]
+                if status != 'valid':
+                    raise EntityTransferError(
+                        ('Sent {} of {} transfers of asset `{}`; transfer '
+                         '`{}` did not become valid (status: {})').format(
+                             len(transfer_tx_ids), len(fulfilled_txs),
+                             persist_id, previous_tx_id, status))
+
+            self._send_transfer_tx(persist_id, fulfilled_tx,
+                                   is_local_tip=(is_local_tip or
+                                                 bool(transfer_tx_ids)))
+            transfer_tx_ids.append(fulfilled_tx['id'])
+
+        return transfer_tx_ids
+
+    @instrumented
+    def transfer_many(self, transfers, *, max_workers=DEFAULT_MAX_WORKERS):
+        """Transfer a batch of entities between their current and new
+        owners.
+
+        The latest transaction of each entity is looked up concurrently
+        (as in :meth:`transfer`), then all of the transfer transactions
+        are prepared and signed before being sent to BigchainDB
+        concurrently, using at most :attr:`max_workers` requests in
+        flight at once. A failure to transfer one entity does not abort
+        the rest of the batch.
+
+        Args:
+            transfers (list of tuple): ``(persist_id, transfer_payload,
+                from_user, to_user)`` tuples describing each transfer
+                (see :meth:`transfer`). Each entity may only be
+                transferred once per batch.
+            max_workers (int, keyword, optional): Maximum number of
+                concurrent requests to BigchainDB. Defaults to
+                ``10``.
+
+        Returns:
+            list of :class:`~.BatchResult`: The outcome of each
+            transfer, in the same order as :attr:`transfers`. On
+            success, ``result`` holds the id of the transfer
+            transaction; otherwise, ``error`` holds the
+            :exc:`coalaip.EntityNotFoundError`,
+            :exc:`coalaip.EntityTransferError` or
+            :exc:`~.PersistenceError` that :meth:`transfer` would have
+            raised for the entity, or an
+            :exc:`coalaip.EntityTransferError` if the entity was
+            already transferred earlier in the batch.
+        """
+
+        transfers = list(transfers)
+        results = [None] * len(transfers)
+
+        pending = []
+        seen_asset_ids = set()
+        for index, (persist_id, _, _, _) in enumerate(transfers):
+            if persist_id in seen_asset_ids:
+                error = EntityTransferError(
+                    ('Cannot transfer asset `{}` more than once in the same '
+                     'batch').format(persist_id))
+                results[index] = BatchResult(result=None, error=error)
+            else:
+                seen_asset_ids.add(persist_id)
+                pending.append(index)
+
+        def get_input(index):
+            persist_id, _, from_user, _ = transfers[index]
+            return self._get_transfer_input(persist_id, from_user=from_user)
+
+        inputs = map_concurrently(get_input, pending,
+                                  max_workers=max_workers)
+        prepared_txs = []
+        for index, (transfer_input, error) in zip(pending, inputs):
+            if error is None:
+                input_tx, is_local_tip = transfer_input
+                _, transfer_payload, _, to_user = transfers[index]
+                try:
+                    transfer_tx = self._prepare_transfer_tx(
+                        input_tx, transfer_payload, to_user=to_user)
+                except Exception as ex:
+                    error = ex
+                else:
+                    prepared_txs.append((index, transfer_tx, is_local_tip))
+            if error is not None:
+                results[index] = BatchResult(
+                    result=None, error=_as_transfer_error(error))
+
+        fulfilled = self._fulfill_many(
+            [(transfer_tx, transfers[index][2]['private_key'])
+             for index, transfer_tx, _ in prepared_txs],
+            error_cls=EntityTransferError)
+        fulfilled_txs = []
+        for (index, _, is_local_tip), (fulfilled_tx, error) in zip(
+                prepared_txs, fulfilled):
+            if error is not None:
+                results[index] = BatchResult(result=None, error=error)
+            else:
+                fulfilled_txs.append((index, fulfilled_tx, is_local_tip))
+
+        def send(indexed_tx):
+            index, fulfilled_tx, is_local_tip = indexed_tx
+            transfer_json = self._send_transfer_tx(
+                transfers[index][0], fulfilled_tx, is_local_tip=is_local_tip)
+            return transfer_json['id']
+
+        sent = map_concurrently(send, fulfilled_txs, max_workers=max_workers)
+        for (index, _, _), result in zip(fulfilled_txs, sent):
+            results[index] = result
+
+        return results
+
+    def _get_transfer_input(self, asset_id, *, from_user, input_tx=None):
+        """Find the transaction to spend when transferring an asset.
+
+        Returns:
+            tuple: A ``(input_tx, is_local_tip)`` pair, where
+            ``is_local_tip`` is ``True`` if the transaction was given or
+            tracked locally rather than fetched from BigchainDB
+        """
+        if input_tx is not None:
+            self._check_transfer_input(asset_id, input_tx,
+                                       from_user=from_user)
+            return input_tx, True
+
+        if self.tip_cache is not None:
+            tip = self.tip_cache.get(asset_id)
+            if tip is not None:
+                try:
+                    self._check_transfer_input(asset_id, tip,
+                                               from_user=from_user)
+                except EntityTransferError:
+                    # Another client may have transferred the asset since
+                    # its tip was tracked; look up its real tip instead
+                    self.tip_cache.pop(asset_id)
+                else:
+                    return tip, True
+
+        _, input_tx = self._get_chain(asset_id)
+        if input_tx is None:
             raise EntityNotFoundError()
+        return input_tx, False
 
-        try:
-            transfer_tx = make_transfer_tx(self.driver, input_tx=last_tx,
-                                           recipients=to_user['public_key'],
-                                           metadata=transfer_payload)
-        except BigchaindbException as ex:
-            raise EntityTransferError(error=ex) from ex
+    def _check_transfer_input(self, asset_id, input_tx, *, from_user):
+        if get_asset_id(input_tx) != asset_id:
+            raise EntityTransferError(
+                ("Cannot transfer asset `{}` by spending transaction `{}`, "
+                 "as it belongs to asset `{}`").format(
+                     asset_id, input_tx['id'], get_asset_id(input_tx)))
+        if input_tx['outputs'][0]['public_keys'] != [from_user['public_key']]:
+            raise EntityTransferError(
+                ("Cannot transfer asset `{}` from `{}`, as its latest known "
+                 "transaction `{}` is owned by `{}`").format(
+                     asset_id, from_user['public_key'], input_tx['id'],
+                     ', '.join(input_tx['outputs'][0]['public_keys'])))
+
+    def _make_transfer_tx(self, input_tx, transfer_payload, *, from_user,
+                          to_user):
+        transfer_tx = self._prepare_transfer_tx(input_tx, transfer_payload,
+                                                to_user=to_user)
+        return self._fulfill_tx(transfer_tx, from_user['private_key'],
+                                error_cls=EntityTransferError)
 
+    @reraise_as_persistence_error_if_not(EntityTransferError)
+    def _prepare_transfer_tx(self, input_tx, transfer_payload, *, to_user):
         try:
-            fulfilled_tx = self.driver.transactions.fulfill(
-                transfer_tx, private_keys=from_user['private_key'])
-        except MissingPrivateKeyError as ex:
+            with self.instrumentation.phase('prepare', 'TRANSFER'):
+                return make_transfer_tx(
+                    None if self.prepare_offline else self.driver,
+                    input_tx=input_tx, recipients=to_user['public_key'],
+                    metadata=transfer_payload)
+        except BigchaindbException as ex:
             raise EntityTransferError(error=ex) from ex
 
+    @reraise_as_persistence_error_if_not(EntityTransferError)
+    def _send_transfer_tx(self, asset_id, fulfilled_tx, *,
+                          is_local_tip=False):
         try:
-            transfer_json = self.driver.transactions.send(fulfilled_tx)
+            with self.instrumentation.phase('send', 'TRANSFER'):
+                transfer_json = self._send_tx(fulfilled_tx)
         except (TransportError, ConnectionError) as ex:
-            raise EntityTransferError(error=ex) from ex
+            # Failing to reach BigchainDB, or a server error, says nothing
+            # about whether the transaction's input is still unspent
+            if not is_local_tip or is_retriable(ex):
+                raise EntityTransferError(error=ex) from ex
 
-        return transfer_json['id']
+            # BigchainDB rejected the transfer, possibly because the given
+            # or tracked tip was spent elsewhere; stop trusting it so the
+            # next transfer looks up the real tip
+            if self.tip_cache is not None:
+                self.tip_cache.pop(asset_id)
+            spent_tx_id = fulfilled_tx['inputs'][0]['fulfills'][
+                'transaction_id']
+            raise EntityTransferError(
+                ("Failed to transfer asset `{}` by spending transaction `{}`; "
+                 "the transaction may be stale or already spent").format(
+                     asset_id, spent_tx_id),
+                error=ex) from ex
+
+        self._track_tip(asset_id, fulfilled_tx)
+        self._track_owner(asset_id, fulfilled_tx)
+        return transfer_json
+
+    def _track_tip(self, asset_id, tx):
+        if self.tip_cache is not None:
+            self.tip_cache.put(asset_id, tx)
+
+    def _track_owner(self, asset_id, tx):
+        if self.owner_index is not None:
+            from_key = (tx['inputs'][0]['owners_before'][0]
+                        if tx['operation'] == 'TRANSFER' else None)
+            self.owner_index.move(
+                asset_id, from_key=from_key,
+                to_key=tx['outputs'][0]['public_keys'][0])
+
+
+def _as_transfer_error(ex):
+    # Map errors as Plugin.transfer()'s decorator does
+    if isinstance(ex, (PersistenceError, EntityNotFoundError,
+                       EntityTransferError)):
+        return ex
+    error = PersistenceError(error=ex)
+    error.__cause__ = ex
+    return error
+
+
+def _as_fulfill_error(ex, error_cls):
+    if isinstance(ex, MissingPrivateKeyError):
+        error = error_cls(error=ex)
+    elif isinstance(ex, PersistenceError):
+        return ex
+    else:
+        error = PersistenceError(error=ex)
+    error.__cause__ = ex
+    return error
@@ -0,0 +1,101 @@
+"""Prometheus metrics for the BigchainDB ledger plugin.
+
+Requires `prometheus_client
+<https://github.com/prometheus/client_python>`_, which can be installed
+with the ``prometheus`` extra::
+
+    $ pip install coalaip-bigchaindb[prometheus]
+"""
+
+from prometheus_client import REGISTRY, Counter, Histogram
+
+from coalaip_bigchaindb.instrumentation import Observer
+
+
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576,
+                float('inf'))
+
+
+class PrometheusObserver(Observer):
+    """Instrumentation observer recording the plugin's events as
+    Prometheus counters and histograms.
+
+    Records:
+
+    * ``<namespace>_operation_seconds``: histogram of operation
+      durations, by ``operation``
+    * ``<namespace>_operation_errors``: counter of failed operations,
+      by ``operation`` and ``error``
+
+    Only top-level operations are recorded, so that operations nested
+    in others (e.g. the loads of :meth:`~.Plugin.load_many`) are not
+    counted twice.
+    * ``<namespace>_phase_seconds``: histogram of phase durations, by
+      ``phase`` and ``operation``
+    * ``<namespace>_request_seconds``: histogram of request durations,
+      by ``method`` and ``node``
+    * ``<namespace>_request_bytes`` and ``<namespace>_response_bytes``:
+      histograms of request and response body sizes, by ``method`` and
+      ``node``
+    * ``<namespace>_request_retries``: counter of request retries, by
+      ``method`` and ``node``
+    * ``<namespace>_request_errors``: counter of failed requests, by
+      ``method``, ``node`` and ``error``
+
+    Args:
+        namespace (str, keyword, optional): Prefix of the metrics'
+            names. Defaults to ``'coalaip_bigchaindb'``.
+        registry (:class:`prometheus_client.CollectorRegistry`,
+            keyword, optional): Registry to register the metrics with.
+            Defaults to the default registry.
+    """
+
+    def __init__(self, *, namespace='coalaip_bigchaindb', registry=REGISTRY):
+        metric_options = {'namespace': namespace, 'registry': registry}
+        self.operation_seconds = Histogram(
+            'operation_seconds', 'Duration of plugin operations',
+            ['operation'], **metric_options)
+        self.operation_errors = Counter(
+            'operation_errors', 'Failed plugin operations',
+            ['operation', 'error'], **metric_options)
+        self.phase_seconds = Histogram(
+            'phase_seconds', 'Duration of the phases of plugin operations',
+            ['phase', 'operation'], **metric_options)
+        self.request_seconds = Histogram(
+            'request_seconds', 'Duration of requests to BigchainDB',
+            ['method', 'node'], **metric_options)
+        self.request_bytes = Histogram(
+            'request_bytes', 'Size of request bodies sent to BigchainDB',
+            ['method', 'node'], buckets=SIZE_BUCKETS, **metric_options)
+        self.response_bytes = Histogram(
+            'response_bytes', 'Size of response bodies from BigchainDB',
+            ['method', 'node'], buckets=SIZE_BUCKETS, **metric_options)
+        self.request_retries = Counter(
+            'request_retries', 'Retries of requests to BigchainDB',
+            ['method', 'node'], **metric_options)
+        self.request_errors = Counter(
+            'request_errors', 'Failed requests to BigchainDB',
+            ['method', 'node', 'error'], **metric_options)
+
+    def on_operation(self, event):
+        if event.parent is not None:
+            return
+        self.operation_seconds.labels(event.operation).observe(event.seconds)
+        if event.error:
+            self.operation_errors.labels(event.operation, event.error).inc()
+
+    def on_phase(self, event):
+        self.phase_seconds.labels(
+            event.phase, event.operation or '').observe(event.seconds)
+
+    def on_request(self, event):
+        labels = (event.method.upper(), event.node)
+        self.request_seconds.labels(*labels).observe(event.seconds)
+        if event.request_size is not None:
+            self.request_bytes.labels(*labels).observe(event.request_size)
+        if event.response_size is not None:
+            self.response_bytes.labels(*labels).observe(event.response_size)
+        if event.retries:
+            self.request_retries.labels(*labels).inc(event.retries)
+        if event.error:
+            self.request_errors.labels(*(labels + (event.error,))).inc()
@@ -0,0 +1,119 @@
+"""Canonical JSON serialization and hashing of transactions, as
+BigchainDB computes transaction ids.
+
+BigchainDB serializes transactions with `python-rapidjson
+<https://pypi.org/project/python-rapidjson/>`_ (installed along with
+BigchainDB and the driver) with sorted keys, no whitespace and
+non-ASCII characters left as is, and hashes them with SHA3-256. If
+python-rapidjson is installed, :func:`serialize` uses it in exactly the
+same way; otherwise, it falls back to the standard library's
+:mod:`json`, tuned to give the same output::
+
+    $ pip install python-rapidjson
+
+As python-rapidjson formats floats differently from :mod:`json` (e.g.
+``1e100`` rather than ``1e+100``), the fallback refuses to serialize
+floats rather than risk producing a different id.
+"""
+
+import json
+import re
+
+try:
+    import rapidjson
+except ImportError:
+    rapidjson = None
+
+try:
+    from hashlib import sha3_256
+except ImportError:  # Python < 3.6; pysha3 is installed with BigchainDB
+    from sha3 import sha3_256
+
+
+_encoder = json.JSONEncoder(sort_keys=True, separators=(',', ':'),
+                            ensure_ascii=False)
+
+# json escapes control characters with lowercase hex digits, RapidJSON
+# with uppercase ones; only match escapes whose backslash is not itself
+# escaped
+_CONTROL_ESCAPE = re.compile(r'(?<!\\)((?:\\\\)*)\\u00([0-9a-f]{2})')
+
+
+def serialize_rapidjson(data):
+    """Serialize :attr:`data` canonically with python-rapidjson, as
+    BigchainDB does.
+
+    Raises:
+        :exc:`RuntimeError`: If python-rapidjson is not installed
+    """
+    if rapidjson is None:
+        raise RuntimeError('python-rapidjson is not installed')
+    return rapidjson.dumps(data, skipkeys=False, ensure_ascii=False,
+                           sort_keys=True)
+
+
+def serialize_json(data):
+    """Serialize :attr:`data` canonically with the standard library,
+    giving the same output as :func:`serialize_rapidjson`.
+
+    Raises:
+        :exc:`TypeError`: If :attr:`data` holds a float or a dict key
+            that is not a string
+    """
+    _check_serializable(data)
+    serialized = _encoder.encode(data)
+    if '\\u00' in serialized:
+        serialized = _CONTROL_ESCAPE.sub(
+            lambda match: match.group(1) + '\\u00' + match.group(2).upper(),
+            serialized)
+    return serialized
+
+
+#: str: Name of the backend used by :func:`serialize`; ``'rapidjson'``
+#: or ``'json'``
+BACKEND = 'json' if rapidjson is None else 'rapidjson'
+
+#: Serialize data canonically with the fastest available backend (see
+#: :func:`serialize_rapidjson` and :func:`serialize_json`).
+serialize = serialize_json if rapidjson is None else serialize_rapidjson
+
+
+def hash_data(serialized):
+    """Hash serialized data with SHA3-256, as BigchainDB does.
+
+    Returns:
+        str: The hex digest of the hash
+    """
+    return sha3_256(serialized.encode()).hexdigest()
+
+
+def transaction_id(tx):
+    """Compute the id of a (prepared or fulfilled) transaction.
+
+    Args:
+        tx (dict): The transaction, with or without its ``'id'``
+
+    Returns:
+        str: The transaction's id
+    """
+    body = {key: value for key, value in tx.items() if key != 'id'}
+    body['inputs'] = [dict(input_, fulfillment=None)
+                      for input_ in tx['inputs']]
+    return hash_data(serialize(body))
+
+
+def _check_serializable(data):
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if not isinstance(key, str):
+                    raise TypeError('keys must be a string')
+                stack.append(item)
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, float):
+            raise TypeError(
+                'Serializing floats as BigchainDB does requires '
+                'python-rapidjson')
@@ -0,0 +1,115 @@
+from multiprocessing import get_context
+from threading import Lock
+from time import monotonic
+
+from bigchaindb_driver.offchain import fulfill_transaction
+from coalaip_bigchaindb.utils import BatchResult
+
+
+class SigningPool:
+    """Pool of worker processes that fulfill (i.e. sign) prepared
+    transactions in parallel, spreading the CPU cost of signing across
+    cores.
+
+    Worker processes are spawned rather than forked, so that they do
+    not inherit the locks and connections held by the parent's threads
+    (e.g. a :class:`~.KeypairPool`'s or :class:`~.Outbox`'s) at the time
+    of the fork, which could deadlock them. As with any spawned process,
+    scripts creating a pool must guard their entry point with
+    ``if __name__ == '__main__':``.
+
+    Keeps track of its signing throughput.
+
+    Args:
+        max_workers (int, optional): Number of worker processes.
+            Defaults to the number of CPUs.
+        chunksize (int, keyword, optional): Number of transactions sent
+            to a worker process at once. Defaults to ``16``.
+    """
+
+    def __init__(self, max_workers=None, *, chunksize=16):
+        self.chunksize = chunksize
+        self.signed = 0
+        self.failed = 0
+        self.seconds = 0.0
+        self._pool = get_context('spawn').Pool(max_workers)
+        self._stats_lock = Lock()
+
+    @property
+    def throughput(self):
+        """float: Transactions signed per second spent signing"""
+        with self._stats_lock:
+            return self.signed / self.seconds if self.seconds else 0.0
+
+    def fulfill_many(self, transactions):
+        """Fulfill a batch of prepared transactions.
+
+        Args:
+            transactions (list of tuple): ``(transaction,
+                private_keys)`` pairs, where ``private_keys`` are the
+                keys to fulfill the transaction with (see
+                :func:`bigchaindb_driver.offchain.fulfill_transaction`)
+
+        Returns:
+            list of :class:`~.BatchResult`: The outcome of fulfilling
+            each transaction, in the same order as
+            :attr:`transactions`. On success, ``result`` holds the
+            fulfilled transaction; otherwise, ``error`` holds the
+            exception raised when fulfilling it.
+        """
+        transactions = list(transactions)
+        chunks = [transactions[start:start + self.chunksize]
+                  for start in range(0, len(transactions), self.chunksize)]
+
+        start = monotonic()
+        results = [result
+                   for chunk_results in self._pool.map(_fulfill_chunk, chunks)
+                   for result in chunk_results]
+        elapsed = monotonic() - start
+
+        failed = sum(1 for result in results if result.error is not None)
+        with self._stats_lock:
+            self.signed += len(results) - failed
+            self.failed += failed
+            self.seconds += elapsed
+
+        return results
+
+    def stats(self):
+        """Get the pool's signing statistics.
+
+        Returns:
+            dict: The statistics::
+
+                {
+                    'signed': Number of transactions fulfilled,
+                    'failed': Number of transactions that failed,
+                    'seconds': Seconds spent fulfilling transactions,
+                    'throughput': Transactions fulfilled per second,
+                }
+        """
+        throughput = self.throughput
+        with self._stats_lock:
+            return {
+                'signed': self.signed,
+                'failed': self.failed,
+                'seconds': self.seconds,
+                'throughput': throughput,
+            }
+
+    def close(self):
+        """Shut down the worker processes."""
+        self._pool.close()
+        self._pool.join()
+
+
+def _fulfill_chunk(transactions):
+    results = []
+    for tx, private_keys in transactions:
+        try:
+            fulfilled_tx = fulfill_transaction(tx, private_keys=private_keys)
+        except Exception as ex:
+            results.append(BatchResult(result=None, error=ex))
+        else:
+            results.append(BatchResult(result=fulfilled_tx, error=None))
+    return results
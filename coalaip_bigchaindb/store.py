@@ -0,0 +1,85 @@
+import json
+import sqlite3
+from threading import Lock
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS transactions (
+    tx_id TEXT PRIMARY KEY,
+    tx_json TEXT NOT NULL
+);
+'''
+
+
+class TransactionStore:
+    """Persistent, SQLite-backed store of valid transactions, indexed by
+    transaction id.
+
+    Only transactions in a valid block, which can therefore no longer
+    change, should be stored. As the store outlives the process, a
+    plugin restarted on the same database starts with the transactions
+    it had already loaded.
+
+    Keeps count of lookup hits and misses to help with sizing.
+
+    Args:
+        path (str): Path of the SQLite database file (created if it
+            does not exist)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(path, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.executescript(SCHEMA)
+        self._lock = Lock()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute(
+                'SELECT COUNT(*) FROM transactions').fetchone()[0]
+
+    def __contains__(self, tx_id):
+        with self._lock:
+            return self._db.execute(
+                'SELECT 1 FROM transactions WHERE tx_id = ?',
+                (tx_id,)).fetchone() is not None
+
+    def get(self, tx_id):
+        """Look up a transaction by its id.
+
+        Returns:
+            dict: The transaction, or ``None`` if it is not stored
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT tx_json FROM transactions WHERE tx_id = ?',
+                (tx_id,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, tx):
+        """Store a valid transaction, unless it is already stored."""
+        with self._lock:
+            self._db.execute(
+                'INSERT OR IGNORE INTO transactions (tx_id, tx_json) '
+                'VALUES (?, ?)', (tx['id'], json.dumps(tx)))
+
+    def clear(self):
+        """Remove all stored transactions and reset the hit and miss
+        counters.
+        """
+        with self._lock:
+            self._db.execute('DELETE FROM transactions')
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,526 @@
+from itertools import cycle
+from random import choice, random
+from threading import Lock
+from time import monotonic
+
+from bigchaindb_driver.exceptions import (
+    HTTP_EXCEPTIONS,
+    ConnectionError,
+    TransportError,
+)
+from bigchaindb_driver.transport import Transport
+from coalaip_bigchaindb.instrumentation import Instrumentation, RequestEvent
+from requests import Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import Timeout
+
+
+STREAM_CHUNK_SIZE = 65536
+
+
+class PooledConnection:
+    """HTTP connection to a single BigchainDB node, backed by a pool of
+    keep-alive connections.
+
+    Args:
+        node_url (str, keyword): URL of the BigchainDB node
+        headers (dict, keyword, optional): Extra headers to send with
+            every request
+        pool_maxsize (int, keyword, optional): Maximum number of
+            connections to keep open to the node. Defaults to ``10``.
+        pool_block (bool, keyword, optional): Whether to wait for a free
+            connection once :attr:`pool_maxsize` connections are in use,
+            rather than opening (and then discarding) extra connections.
+            Defaults to ``False``.
+        timeout (float or tuple, keyword, optional): Timeout of each
+            request, in seconds; either a single timeout or a
+            ``(connect timeout, read timeout)`` pair. Defaults to no
+            timeout.
+        max_retries (int or :class:`urllib3.util.retry.Retry`, keyword,
+            optional): Retry policy for failed requests; a number only
+            retries failed connection attempts. Defaults to ``0``.
+        instrumentation (:class:`~.Instrumentation`, keyword,
+            optional): Instrumentation to report each request to
+    """
+
+    def __init__(self, *, node_url, headers=None, pool_maxsize=10,
+                 pool_block=False, timeout=None, max_retries=0,
+                 instrumentation=None):
+        self.node_url = node_url
+        self.timeout = timeout
+        self.instrumentation = instrumentation or Instrumentation()
+        self.adapter = HTTPAdapter(pool_connections=1,
+                                   pool_maxsize=pool_maxsize,
+                                   pool_block=pool_block,
+                                   max_retries=max_retries)
+        self.session = Session()
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self._stats_lock = Lock()
+
+    def request(self, method, *, path=None, json=None, params=None,
+                headers=None, attempt=0):
+        """Send a request to the node.
+
+        :attr:`attempt` is the number of times the request was already
+        attempted on other nodes, and is only used for instrumentation.
+
+        Returns:
+            The response's decoded JSON data, or its text if the
+            response is not JSON
+
+        Raises:
+            :exc:`bigchaindb_driver.exceptions.ConnectionError`: If the
+                node could not be reached or timed out
+            :exc:`bigchaindb_driver.exceptions.TransportError`: If the
+                node responded with an error status (or one of its
+                subclasses, for statuses that the driver knows of)
+        """
+        start = monotonic()
+        try:
+            response = self._send(method, path, start, attempt, json=json,
+                                  params=params, headers=headers)
+        finally:
+            with self._stats_lock:
+                self.in_flight -= 1
+
+        text = response.text
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+
+        self._raise_for_status(method, path, start, response, attempt,
+                               text=text, data=data)
+        self._report(method, path, start, response, attempt, None)
+        return data if data is not None else text
+
+    def stream(self, method, *, path=None, params=None, headers=None,
+               chunk_size=STREAM_CHUNK_SIZE):
+        """Generator: Send a request to the node, yielding the
+        response's text in chunks as it is received.
+
+        The request is only sent once the generator is first iterated,
+        and its connection is returned to the pool once the generator
+        is exhausted or closed.
+
+        Args:
+            chunk_size (int, keyword, optional): Number of bytes to read
+                from the response at once. Defaults to ``65536``.
+
+        Yields:
+            str: The next chunk of the response's text
+
+        Raises:
+            See :meth:`request`
+        """
+        start = monotonic()
+        try:
+            response = self._send(method, path, start, 0, params=params,
+                                  headers=headers, stream=True)
+            try:
+                self._raise_for_status(method, path, start, response, 0)
+                self._report(method, path, start, response, 0, None,
+                             streamed=True)
+                # BigchainDB's JSON responses do not declare a charset
+                response.encoding = response.encoding or 'utf-8'
+                chunks = response.iter_content(chunk_size,
+                                               decode_unicode=True)
+                yield from chunks
+            finally:
+                response.close()
+        finally:
+            with self._stats_lock:
+                self.in_flight -= 1
+
+    def pool_stats(self):
+        """Get usage statistics of the connection's pool.
+
+        Returns:
+            dict: The statistics::
+
+                {
+                    'requests': Number of requests sent,
+                    'errors': Number of failed requests,
+                    'in_flight': Number of requests currently in flight,
+                    'connections_opened': Number of connections opened,
+                    'idle_connections': Number of open connections
+                                        waiting to be reused,
+                }
+        """
+        connections_opened = 0
+        idle_connections = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            connections_opened += pool.num_connections
+            idle_connections += sum(1 for conn in list(pool.pool.queue)
+                                    if conn is not None)
+
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'in_flight': self.in_flight,
+            'connections_opened': connections_opened,
+            'idle_connections': idle_connections,
+        }
+
+    def close(self):
+        """Close all of the connection's pooled connections."""
+        self.session.close()
+
+    def _count_error(self):
+        with self._stats_lock:
+            self.errors += 1
+
+    def _send(self, method, path, start, attempt, **kwargs):
+        url = self.node_url + path if path else self.node_url
+        with self._stats_lock:
+            self.requests += 1
+            self.in_flight += 1
+        try:
+            return self.session.request(method=method, url=url,
+                                        timeout=self.timeout, **kwargs)
+        except (RequestsConnectionError, Timeout) as ex:
+            self._count_error()
+            error = ConnectionError(None, str(ex), None)
+            self._report(method, path, start, None, attempt, error)
+            raise error from ex
+
+    def _raise_for_status(self, method, path, start, response, attempt, *,
+                          text=None, data=None):
+        if 200 <= response.status_code < 300:
+            return
+
+        if text is None:
+            text = response.text
+            try:
+                data = response.json()
+            except ValueError:
+                data = None
+
+        self._count_error()
+        exc_cls = HTTP_EXCEPTIONS.get(response.status_code, TransportError)
+        error = exc_cls(response.status_code, text, data)
+        self._report(method, path, start, response, attempt, error)
+        raise error
+
+    def _report(self, method, path, start, response, attempt, error, *,
+                streamed=False):
+        if not self.instrumentation:
+            return
+
+        request_size = response_size = status_code = None
+        retries = attempt
+        if response is not None:
+            body = response.request.body
+            request_size = len(body) if body is not None else 0
+            if not streamed:
+                response_size = len(response.content)
+            status_code = response.status_code
+            # urllib3 keeps the history of the retries it made
+            urllib3_retries = getattr(response.raw, 'retries', None)
+            if urllib3_retries is not None:
+                retries += len(urllib3_retries.history)
+
+        self.instrumentation.emit_request(RequestEvent(
+            method=method, path=path, node=self.node_url,
+            seconds=monotonic() - start, request_size=request_size,
+            response_size=response_size, status_code=status_code,
+            retries=retries, error=type(error).__name__ if error else None))
+
+
+class RoundRobinScheduler:
+    """Node scheduler that picks each node in turn.
+
+    Args:
+        nodes (iterable of str): URLs of the nodes to schedule
+    """
+
+    def __init__(self, nodes):
+        self._picker = cycle(nodes)
+        self._lock = Lock()
+
+    def pick(self, method, *, exclude=()):
+        """Pick the node to send the next request to.
+
+        Args:
+            method (str): HTTP method of the request
+            exclude (iterable of str, keyword, optional): Nodes to avoid
+                if possible (e.g. because they just failed)
+
+        Returns:
+            str: URL of the picked node
+        """
+        with self._lock:
+            return next(self._picker)
+
+    def record(self, node, *, latency, failed):
+        """Record the outcome of a request to a node."""
+
+    def stats(self):
+        """dict: Each node's scheduling statistics, keyed by URL"""
+        return {}
+
+
+class LatencyAwareScheduler:
+    """Node scheduler that sends reads to the fastest healthy node and
+    stops sending requests to failing nodes for a cooldown period.
+
+    Keeps an exponentially weighted moving average of each node's
+    latency and error rate. Nodes whose error rate reaches
+    :attr:`max_error_rate` are ejected for :attr:`cooldown` seconds,
+    after which they are tried again; a single further failure ejects
+    them again, while successes bring them back into rotation.
+
+    Reads (``GET`` requests) go to the healthy node with the lowest
+    average latency, except for a small share of reads that are sent to
+    a random healthy node to keep every node's latency up to date.
+    Writes are spread across the healthy nodes in turn. If every node
+    has been ejected, the node whose cooldown ends first is used.
+
+    Args:
+        nodes (iterable of str): URLs of the nodes to schedule
+        smoothing (float, keyword, optional): Weight of the latest
+            request in each moving average. Defaults to ``0.2``.
+        max_error_rate (float, keyword, optional): Error rate at which
+            a node is ejected. Defaults to ``0.5``.
+        cooldown (float, keyword, optional): Seconds for which an
+            ejected node is avoided. Defaults to ``30``.
+        explore_rate (float, keyword, optional): Share of reads sent to
+            a random healthy node. Defaults to ``0.05``.
+    """
+
+    def __init__(self, nodes, *, smoothing=0.2, max_error_rate=0.5,
+                 cooldown=30, explore_rate=0.05):
+        self.nodes = tuple(nodes)
+        self.smoothing = smoothing
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.explore_rate = explore_rate
+        self._latencies = dict.fromkeys(self.nodes)
+        self._error_rates = dict.fromkeys(self.nodes, 0.0)
+        self._ejected_until = dict.fromkeys(self.nodes, 0.0)
+        self._write_picker = cycle(self.nodes)
+        self._lock = Lock()
+
+    def pick(self, method, *, exclude=()):
+        """Pick the node to send the next request to.
+
+        Args:
+            method (str): HTTP method of the request
+            exclude (iterable of str, keyword, optional): Nodes to avoid
+                if possible (e.g. because they just failed)
+
+        Returns:
+            str: URL of the picked node
+        """
+        with self._lock:
+            now = monotonic()
+            healthy = [node for node in self.nodes
+                       if self._ejected_until[node] <= now and
+                       node not in exclude]
+            if not healthy:
+                candidates = [node for node in self.nodes
+                              if node not in exclude] or self.nodes
+                return min(candidates, key=self._ejected_until.get)
+
+            if method.upper() != 'GET':
+                for node in self._write_picker:
+                    if node in healthy:
+                        return node
+
+            if random() < self.explore_rate:
+                return choice(healthy)
+            # Prefer nodes without any measured latency yet, so that
+            # every node is measured at least once
+            return min(healthy,
+                       key=lambda node: self._latencies[node] or 0.0)
+
+    def record(self, node, *, latency, failed):
+        """Record the outcome of a request to a node.
+
+        Args:
+            node (str): URL of the node
+            latency (float, keyword): Seconds the request took
+            failed (bool, keyword): Whether the request failed because
+                of the node (e.g. it could not be reached)
+        """
+        with self._lock:
+            weight = self.smoothing
+            if not failed:
+                previous = self._latencies[node]
+                self._latencies[node] = latency if previous is None else \
+                    (1 - weight) * previous + weight * latency
+
+            error_rate = ((1 - weight) * self._error_rates[node] +
+                          weight * (1.0 if failed else 0.0))
+            self._error_rates[node] = error_rate
+            if failed and error_rate >= self.max_error_rate:
+                self._ejected_until[node] = monotonic() + self.cooldown
+
+    def stats(self):
+        """Get the scheduling statistics of each node.
+
+        Returns:
+            dict: Each node's statistics, keyed by the node's URL::
+
+                {
+                    'latency': Average latency in seconds (or None if
+                               not measured yet),
+                    'error_rate': Average error rate (0 to 1),
+                    'ejected': Whether the node is currently avoided,
+                }
+        """
+        with self._lock:
+            now = monotonic()
+            return {node: {
+                'latency': self._latencies[node],
+                'error_rate': self._error_rates[node],
+                'ejected': self._ejected_until[node] > now,
+            } for node in self.nodes}
+
+
+class PooledTransport(Transport):
+    """Transport for :class:`bigchaindb_driver.BigchainDB` that keeps a
+    configurable pool of keep-alive connections to each node.
+
+    Requests are spread across the nodes in a round-robin fashion,
+    unless :attr:`latency_aware` is set, in which case nodes are picked
+    by a :class:`~.LatencyAwareScheduler` and reads that fail to reach a
+    node are retried once on another node.
+
+    Args:
+        *nodes (str): URLs of the BigchainDB nodes
+        headers (dict, keyword, optional): Extra headers to send with
+            every request
+        latency_aware (bool, keyword, optional): Whether to pick nodes
+            based on their latency and health. Defaults to ``False``.
+        scheduler_options (dict, keyword, optional): Options for the
+            :class:`~.LatencyAwareScheduler`
+        **connection_options: Options for each node's
+            :class:`~.PooledConnection` (``pool_maxsize``,
+            ``pool_block``, ``timeout``, ``max_retries`` and
+            ``instrumentation``)
+    """
+
+    def __init__(self, *nodes, headers=None, latency_aware=False,
+                 scheduler_options=None, **connection_options):
+        self.nodes = nodes
+        self.connections = tuple(
+            PooledConnection(node_url=node, headers=headers,
+                             **connection_options)
+            for node in nodes)
+        self._connections_by_node = {connection.node_url: connection
+                                     for connection in self.connections}
+        self.latency_aware = latency_aware
+        if latency_aware:
+            self.scheduler = LatencyAwareScheduler(
+                nodes, **(scheduler_options or {}))
+        else:
+            self.scheduler = RoundRobinScheduler(nodes)
+
+    def get_connection(self, method='GET', *, exclude=()):
+        """Pick the connection to send the next request through."""
+        node = self.scheduler.pick(method, exclude=exclude)
+        return self._connections_by_node[node]
+
+    def forward_request(self, method, path=None, json=None, params=None,
+                        headers=None):
+        """Send a request to one of the nodes.
+
+        Returns:
+            The response's decoded JSON data, or its text if the
+            response is not JSON
+        """
+        connection = self.get_connection(method)
+        try:
+            return self._request(connection, method, path=path, json=json,
+                                 params=params, headers=headers)
+        except ConnectionError:
+            if not (self.latency_aware and method.upper() == 'GET' and
+                    len(self.connections) > 1):
+                raise
+
+        connection = self.get_connection(method,
+                                         exclude=(connection.node_url,))
+        return self._request(connection, method, path=path, json=json,
+                             params=params, headers=headers, attempt=1)
+
+    def stream_request(self, method, path=None, params=None, headers=None):
+        """Generator: Send a request to one of the nodes, yielding the
+        response's text in chunks as it is received (see
+        :meth:`.PooledConnection.stream`).
+        """
+        connection = self.get_connection(method)
+        start = monotonic()
+        chunks = connection.stream(method, path=path, params=params,
+                                   headers=headers)
+        try:
+            # The response's status is only checked once its first chunk
+            # is requested, so fetch it here to record the node's latency
+            # and health before handing out the rest of the response
+            first_chunk = next(chunks, '')
+        except TransportError as ex:
+            self.scheduler.record(connection.node_url,
+                                  latency=monotonic() - start,
+                                  failed=_is_node_failure(ex))
+            raise
+        self.scheduler.record(connection.node_url,
+                              latency=monotonic() - start, failed=False)
+
+        try:
+            yield first_chunk
+            yield from chunks
+        finally:
+            chunks.close()
+
+    def pool_stats(self):
+        """Get usage statistics of each node's connection pool.
+
+        Returns:
+            dict: Each node's statistics (see
+            :meth:`.PooledConnection.pool_stats`), keyed by the node's
+            URL
+        """
+        return {connection.node_url: connection.pool_stats()
+                for connection in self.connections}
+
+    def node_stats(self):
+        """Get the scheduling statistics of each node (see
+        :meth:`.LatencyAwareScheduler.stats`); empty unless
+        :attr:`latency_aware` is set.
+        """
+        return self.scheduler.stats()
+
+    def close(self):
+        """Close all pooled connections to every node."""
+        for connection in self.connections:
+            connection.close()
+
+    def _request(self, connection, method, **kwargs):
+        start = monotonic()
+        try:
+            response = connection.request(method, **kwargs)
+        except TransportError as ex:
+            self.scheduler.record(connection.node_url,
+                                  latency=monotonic() - start,
+                                  failed=_is_node_failure(ex))
+            raise
+        self.scheduler.record(connection.node_url,
+                              latency=monotonic() - start, failed=False)
+        return response
+
+
+def _is_node_failure(ex):
+    # Only count errors that are the node's fault against it
+    return isinstance(ex, ConnectionError) or (ex.status_code or 0) >= 500
@@ -1,40 +1,178 @@
+import json
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
+from inspect import isgeneratorfunction
 from coalaip.exceptions import PersistenceError
+from coalaip_bigchaindb import builder
+from coalaip_bigchaindb.exceptions import TransactionChainError
+
+
+BatchResult = namedtuple('BatchResult', ('result', 'error'))
+"""Outcome of a single item in a batch operation.
+
+Exactly one of ``result`` and ``error`` is set: ``result`` holds the
+item's return value on success while ``error`` holds the exception that
+was raised for the item otherwise.
+"""
+
+
+class HistoryEvent(namedtuple('HistoryEvent', ('public_key', 'event_id'))):
+    """Immutable record of an ownership event in an entity's history.
+
+    ``public_key`` is the public key of the entity's owner after the
+    event and ``event_id`` the id of the event's transaction.
+    """
+
+    __slots__ = ()
+
+    def to_dict(self):
+        """Convert the event into the dict form returned by
+        :meth:`.Plugin.get_history`.
+        """
+        return {
+            'user': {
+                'public_key': self.public_key,
+                'private_key': None,
+            },
+            'event_id': self.event_id,
+        }
+
+
+class TransactionView(namedtuple('TransactionView', (
+        'id', 'operation', 'asset_id', 'owner', 'parent_id'))):
+    """Immutable record of the parts of a transaction needed to place
+    it in its asset's history.
+
+    ``owner`` is the public key the transaction's output is assigned to
+    and ``parent_id`` the id of the transaction it spends (``None`` for
+    a CREATE transaction).
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_tx(cls, tx):
+        """Create a view of a transaction with a single output (and
+        therefore a single owner).
+        """
+        return cls(id=tx['id'], operation=tx['operation'],
+                   asset_id=get_asset_id(tx),
+                   owner=tx['outputs'][0]['public_keys'][0],
+                   parent_id=get_parent_id(tx))
+
+    def link(self):
+        """Get the ``(id, parent_id)`` pair linking the transaction into
+        its asset's chain (see :func:`iter_order_transactions`).
+        """
+        return self.id, self.parent_id
+
+    def to_event(self):
+        """Get the :class:`~.HistoryEvent` of the transaction."""
+        return HistoryEvent(public_key=self.owner, event_id=self.id)
 
 
 def make_transfer_tx(bdb_driver, *, input_tx, recipients, metadata=None):
-    if input_tx['operation'] == 'CREATE':
-        input_asset_id = input_tx['id']
-    else:
-        input_asset_id = input_tx['asset']['id']
+    """Prepare a TRANSFER transaction that spends the single output of
+    :attr:`input_tx`.
 
+    If :attr:`bdb_driver` is ``None``, the transaction is prepared
+    without a driver by :func:`.builder.prepare_transaction`, which
+    gives the same transaction.
+    """
+    params = transfer_tx_params(input_tx=input_tx, recipients=recipients,
+                                metadata=metadata)
+    if bdb_driver is None:
+        return builder.prepare_transaction(**params)
+    return bdb_driver.transactions.prepare(**params)
+
+
+def transfer_tx_params(*, input_tx, recipients, metadata=None):
+    """Build the keyword arguments for preparing a TRANSFER transaction
+    that spends the single output of :attr:`input_tx`.
+
+    Returns:
+        dict: Keyword arguments for
+        :func:`bigchaindb_driver.offchain.prepare_transaction` (or
+        ``BigchainDB.transactions.prepare``)
+    """
+    input_asset_id = get_asset_id(input_tx)
     input_tx_output = input_tx['outputs'][0]
 
-    return bdb_driver.transactions.prepare(
-        operation='TRANSFER',
-        recipients=recipients,
-        asset={'id': input_asset_id},
-        metadata=metadata,
-        inputs={
+    return {
+        'operation': 'TRANSFER',
+        'recipients': recipients,
+        'asset': {'id': input_asset_id},
+        'metadata': metadata,
+        'inputs': {
             'fulfillment': input_tx_output['condition']['details'],
             'fulfills': {
                 'output_index': 0,
                 'transaction_id': input_tx['id'],
             },
             'owners_before': input_tx_output['public_keys']
-        })
+        },
+    }
+
+
+def get_asset_id(tx):
+    """Get the id of the asset that a transaction belongs to.
+
+    Args:
+        tx (dict): A CREATE or TRANSFER transaction
+
+    Returns:
+        str: The transaction's own id for a CREATE transaction, or the
+        id of the asset it transfers otherwise
+    """
+    if tx['operation'] == 'CREATE':
+        return tx['id']
+    else:
+        return tx['asset']['id']
+
+
+def get_parent_id(tx):
+    """Get the id of the transaction spent by a transaction.
+
+    Args:
+        tx (dict): A transaction with a single input
+
+    Returns:
+        str: Id of the spent transaction, or ``None`` for a CREATE
+        transaction
+    """
+    fulfills = tx['inputs'][0]['fulfills']
+    return fulfills['transaction_id'] if fulfills else None
 
 
 def reraise_as_persistence_error_if_not(*allowed_exceptions):
     """Decorator: Reraises any exception from the wrapped function
     by wrapping it around a :exc:`coalaip.PersistenceError` unless it's
-    one of the given :attr:`allowed_exceptions`.
+    one of the given :attr:`allowed_exceptions` (or already a
+    :exc:`coalaip.PersistenceError`).
+
+    Generator functions are supported as well, in which case exceptions
+    raised while iterating are reraised.
 
     Args:
         *allowed_exceptions (:exc:`Exception`): Exceptions to not
             reraise with :exc:`coalaip.PersistenceError`
     """
+    allowed_exceptions = (PersistenceError,) + allowed_exceptions
+
     def decorator(func):
+        if isgeneratorfunction(func):
+            @wraps(func)
+            def reraises_if_not_while_iterating(*args, **kwargs):
+                try:
+                    return (yield from func(*args, **kwargs))
+                except Exception as ex:
+                    if not isinstance(ex, allowed_exceptions):
+                        raise PersistenceError(error=ex) from ex
+                    else:
+                        raise
+            return reraises_if_not_while_iterating
+
         @wraps(func)
         def reraises_if_not(*args, **kwargs):
             try:
@@ -48,7 +186,7 @@ def reraise_as_persistence_error_if_not(*allowed_exceptions):
     return decorator
 
 
-def order_transactions(transactions):
+def order_transactions(transactions, *, key=None):
     """Given a list of unordered transactions, order and return them in
     a new list.
 
@@ -59,51 +197,275 @@ def order_transactions(transactions):
 
     Args:
         transactions (list): Unordered list of transactions
+        key (callable, keyword, optional): Function linking each
+            transaction (see :func:`iter_order_transactions`)
 
     Returns:
         list: Ordered list of transactions, beginning from the first
         available transaction.
 
     Raises:
-        :exc:`ValueError`: If the given list of transactions include two
-            or more disjoint chains (i.e. not linkable into a single
-            chain).
+        :exc:`~.TransactionChainError`: If the given list of
+            transactions cannot be linked into a single chain (e.g. it
+            includes two or more disjoint chains); its ``reason``
+            describes how the chain is broken. This is a subclass of
+            :exc:`ValueError`.
     """
-    if not transactions:
-        return []
+    return list(iter_order_transactions(transactions, key=key))
+
+
+def order_history(transactions):
+    """Order an asset's transactions into its ownership history.
+
+    The transactions are ordered through compact
+    :class:`~.TransactionView` records rather than the transactions
+    themselves (see :func:`order_transactions` for the assumptions made
+    about them).
+
+    Args:
+        transactions (list): Unordered list of all the asset's
+            transactions
+
+    Returns:
+        tuple: A ``(events, tip)`` pair, where ``events`` is a list of
+        :class:`~.HistoryEvent` ordered from the first transaction and
+        ``tip`` is the last transaction of the chain (or ``None`` if
+        there are no transactions)
+
+    Raises:
+        :exc:`~.TransactionChainError`: If the transactions cannot be
+            ordered into a single chain
+    """
+    ordered_views = order_transactions(
+        [TransactionView.from_tx(tx) for tx in transactions],
+        key=TransactionView.link)
+    if not ordered_views:
+        return [], None
+
+    tip_id = ordered_views[-1].id
+    tip = next(tx for tx in transactions if tx['id'] == tip_id)
+    return [view.to_event() for view in ordered_views], tip
+
+
+def iter_order_transactions(transactions, *, key=None):
+    """Generator: Order the given transactions in a single pass, yielding
+    each one as soon as its place in the chain is known.
+
+    Once the chain's first transaction (a CREATE) has been seen, each
+    transaction is yielded as soon as the transaction it spends has been
+    yielded, so that transactions can be consumed while they are still
+    streaming in. If the chain does not include its CREATE transaction,
+    its first transaction can only be found once all the transactions
+    have been seen.
+
+    See :func:`order_transactions` for the assumptions made about the
+    transactions. Note that the chain may be found to be broken after
+    some transactions have already been yielded.
+
+    Args:
+        transactions (iterable): Unordered transactions, or any records
+            of them that :attr:`key` can link
+        key (callable, keyword, optional): Function returning the
+            ``(transaction_id, parent_id)`` pair of a transaction (see
+            :func:`get_parent_id`). Defaults to reading them from a
+            transaction dict.
+
+    Yields:
+        The next transaction of the chain, beginning from the first
+        available transaction
+
+    Raises:
+        :exc:`~.TransactionChainError`: If the given transactions cannot
+            be linked into a single chain
+    """
+    key = key or _tx_link
+    # Whether each seen transaction has been linked into the chain yet
+    linked = {}
+    # Transactions waiting for the transaction they spend to be linked
+    waiting_by_parent = {}
+    tip_id = None
+
+    def link(tx):
+        nonlocal tip_id
+        tip_id, _ = key(tx)
+        linked[tip_id] = True
+
+    def link_waiting():
+        while tip_id in waiting_by_parent:
+            tx = waiting_by_parent.pop(tip_id)
+            link(tx)
+            yield tx
 
-    # Find the end tx:
-    #   Go through the transactions and find the transaction whose id is not
-    #   listed as a dependency of any other transaction
-    end_tx = None
-    input_dependencies = {tx['inputs'][0]['fulfills']['transaction_id']
-                          for tx in transactions
-                          if tx['inputs'][0]['fulfills']}
     for tx in transactions:
-        if tx['id'] not in input_dependencies:
-            if end_tx:
-                raise ValueError(
-                    ('More than one transaction (ids include `{}` and `{}`) '
-                     'was found to have no other transactions depend upon it '
-                     'when attempting to order a list of transactions. This '
-                     'means that the given list either contains a transaction '
-                     'chain that is not flat or that some transactions are '
-                     'missing from the list.'.format(end_tx['id'], tx['id'])))
-            end_tx = tx
-
-    if not end_tx:
-        raise ValueError(('Could not find an end transaction when attempting '
-                          'to order a list of transactions. This most likely '
-                          'means the given list contains a cycle somewhere.'))
-
-    # Create the ordered list of transactions, going backwards from the end
-    ordered_tx = [None] * len(transactions)
-    txs_by_id = {tx['id']: tx for tx in transactions}
-    for ii in reversed(range(0, len(transactions))):
-        ordered_tx[ii] = end_tx
-
-        # If we're at the start of the tx chain, there is no next tx to find
-        if ii is not 0:
-            end_tx = txs_by_id[end_tx['inputs'][0]['fulfills']['transaction_id']]
-
-    return ordered_tx
+        tx_id, parent_id = key(tx)
+
+        if tx_id in linked:
+            raise TransactionChainError(
+                'Transaction `{}` was found more than once.'.format(tx_id),
+                reason=TransactionChainError.DUPLICATE,
+                transaction_id=tx_id, parent_id=parent_id)
+
+        if parent_id is None:
+            if tip_id is not None:
+                raise TransactionChainError(
+                    ('Transaction `{}` starts a second chain of '
+                     'transactions.').format(tx_id),
+                    reason=TransactionChainError.DISJOINT,
+                    transaction_id=tx_id)
+            link(tx)
+            yield tx
+            yield from link_waiting()
+        elif parent_id == tip_id:
+            link(tx)
+            yield tx
+            yield from link_waiting()
+        elif linked.get(parent_id) or parent_id in waiting_by_parent:
+            raise TransactionChainError(
+                ('Transaction `{}` spends transaction `{}`, which has already '
+                 'been spent by another transaction.').format(
+                     tx_id, parent_id),
+                reason=TransactionChainError.FORK,
+                transaction_id=tx_id, parent_id=parent_id)
+        else:
+            linked[tx_id] = False
+            waiting_by_parent[parent_id] = tx
+
+    if tip_id is None and waiting_by_parent:
+        # Without a CREATE transaction, the chain starts with the only
+        # transaction spending a transaction that was not given
+        start_parent_ids = [parent_id for parent_id in waiting_by_parent
+                            if parent_id not in linked]
+        if not start_parent_ids:
+            tx_id, parent_id = key(next(iter(waiting_by_parent.values())))
+            raise TransactionChainError(
+                ('Could not find the first transaction of the chain; '
+                 'transaction `{}` is part of a cycle.').format(tx_id),
+                reason=TransactionChainError.CYCLE,
+                transaction_id=tx_id, parent_id=parent_id)
+        tx = waiting_by_parent.pop(start_parent_ids[0])
+        link(tx)
+        yield tx
+        yield from link_waiting()
+
+    if waiting_by_parent:
+        for parent_id, tx in waiting_by_parent.items():
+            if parent_id not in linked:
+                tx_id, _ = key(tx)
+                raise TransactionChainError(
+                    ('Transaction `{}` spends transaction `{}`, which is '
+                     'missing.').format(tx_id, parent_id),
+                    reason=TransactionChainError.MISSING_PARENT,
+                    transaction_id=tx_id, parent_id=parent_id)
+        tx_id, parent_id = key(next(iter(waiting_by_parent.values())))
+        raise TransactionChainError(
+            'Transaction `{}` is part of a cycle.'.format(tx_id),
+            reason=TransactionChainError.CYCLE,
+            transaction_id=tx_id, parent_id=parent_id)
+
+
+def _tx_link(tx):
+    return tx['id'], get_parent_id(tx)
+
+
+def iter_json_array(chunks):
+    """Generator: Decode a JSON array from chunks of its text, yielding
+    each of its elements as soon as it has been received in full.
+
+    Only the text of the element currently being received is held in
+    memory, so that large arrays can be consumed while they are still
+    streaming in.
+
+    Args:
+        chunks (iterable of str): Consecutive chunks of the array's text
+
+    Yields:
+        The array's decoded elements, in order
+
+    Raises:
+        :exc:`ValueError`: If the text is not a JSON array or ends
+            before the array does
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer = ''
+    position = 0
+    exhausted = False
+    expecting = '['
+
+    while True:
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
+
+        value_end = None
+        if position < len(buffer):
+            char = buffer[position]
+            if expecting == '[':
+                if char != '[':
+                    raise ValueError('Expected a JSON array')
+                position += 1
+                expecting = 'first value'
+                continue
+            elif char == ']' and expecting != 'value':
+                return
+            elif expecting == ',':
+                if char != ',':
+                    raise ValueError(
+                        'Expected `,` or `]` at character {}'.format(
+                            position))
+                position += 1
+                expecting = 'value'
+                continue
+
+            try:
+                value, value_end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                if exhausted:
+                    raise
+            # A value that is not followed by a separator yet (e.g. part
+            # of a number) may continue in the next chunk
+            if value_end is not None and (
+                    exhausted or (value_end < len(buffer) and
+                                  buffer[value_end] in ', \t\n\r]')):
+                yield value
+                position = value_end
+                expecting = ','
+                continue
+
+        if exhausted:
+            raise ValueError('Unexpected end of JSON array')
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+        else:
+            buffer = buffer[position:] + chunk
+            position = 0
+
+
+def map_concurrently(func, items, *, max_workers):
+    """Call :attr:`func` on every item in :attr:`items` using a bounded
+    pool of threads.
+
+    Errors are captured per item so that one failing item does not
+    abort the rest of the batch.
+
+    Args:
+        func (callable): Function to call with each item
+        items (iterable): Items to call :attr:`func` with
+        max_workers (int, keyword): Maximum number of concurrent calls
+
+    Returns:
+        list of :class:`~.BatchResult`: The outcome of each call, in
+        the same order as :attr:`items`
+    """
+    def capture(item):
+        try:
+            return BatchResult(result=func(item), error=None)
+        except Exception as ex:
+            return BatchResult(result=None, error=ex)
+
+    items = list(items)
+    if not items:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(capture, items))
@@ -12,6 +12,7 @@ with open('HISTORY.rst') as history_file:
 install_requires = [
     'coalaip==0.0.3',
     'bigchaindb_driver~=0.4.0',
+    'requests>=2.11.0',
 ]
 
 tests_require = [
@@ -21,6 +22,7 @@ tests_require = [
     'pytest>=3.0.1',
     'pytest-cov',
     'pytest-mock',
+    'hypothesis>=3.0',
     'bigchaindb~=1.0.1',
 ]
 
@@ -29,6 +31,19 @@ dev_require = [
     'ipython',
 ]
 
+# Requires Python 3.5 or later
+async_require = [
+    'aiohttp>=3.3',
+]
+
+async_tests_require = [
+    'pytest-asyncio',
+]
+
+prometheus_require = [
+    'prometheus_client>=0.4',
+]
+
 docs_require = [
     'Sphinx>=1.4.4',
     'sphinx-autobuild',
@@ -44,7 +59,7 @@ setup(
     author='BigchainDB',
     author_email='dev@bigchaindb.com',
     url='https://github.com/bigchaindb/pycoalaip-bigchaindb',
-    packages=find_packages(exclude=['tests*']),
+    packages=find_packages(exclude=['tests*', 'benchmarks*']),
     entry_points={
         'coalaip_plugin': 'bigchaindb = coalaip_bigchaindb.plugin:Plugin'
     },
@@ -52,8 +67,12 @@ setup(
     install_requires=install_requires,
     tests_require=tests_require,
     extras_require={
-        'test': tests_require,
-        'dev': dev_require + tests_require + docs_require,
+        'async': async_require,
+        'prometheus': prometheus_require,
+        'test': tests_require + prometheus_require,
+        'test-async': async_require + async_tests_require,
+        'dev': (dev_require + tests_require + prometheus_require +
+                docs_require),
         'docs': docs_require,
     },
     test_suite='tests',
@@ -1,8 +1,13 @@
+import sys
 from os import environ
 
 from pytest import fixture
 
 
+# The AsyncPlugin's tests use async/await, which Python 3.4 cannot parse
+collect_ignore = ['test_aio.py'] if sys.version_info < (3, 5) else []
+
+
 @fixture
 def alice_keypair():
     from bigchaindb_driver.crypto import generate_keypair
@@ -32,16 +37,42 @@ def bdb_port():
 
 
 @fixture
-def bdb_node(bdb_host, bdb_port):
+def bdb_node(request, bdb_host, bdb_port):
+    # Run against the in-memory stand-in ledger instead of a real node
+    if environ.get('BDB_FAKE'):
+        return request.getfixturevalue('fake_ledger_server').url
     return 'http://{host}:{port}'.format(host=bdb_host, port=bdb_port)
 
 
+@fixture(scope='session')
+def fake_ledger_server():
+    from tests.ledger import FakeLedger, FakeLedgerServer
+    server = FakeLedgerServer(FakeLedger())
+    server.start()
+    yield server
+    server.stop()
+
+
+@fixture
+def fake_ledger(fake_ledger_server):
+    ledger = fake_ledger_server.ledger
+    yield ledger
+    ledger.reset_options()
+
+
 @fixture
 def plugin(bdb_node):
     from coalaip_bigchaindb import Plugin
     return Plugin(bdb_node)
 
 
+@fixture
+def cached_plugin(bdb_node):
+    from coalaip_bigchaindb import Plugin
+    return Plugin(bdb_node, tx_cache_size=10, history_cache_size=10,
+                  tip_cache_size=10, owner_index_size=10)
+
+
 @fixture
 def bdb_driver(bdb_node):
     from bigchaindb_driver import BigchainDB
@@ -0,0 +1,316 @@
+"""In-memory stand-in for the parts of BigchainDB's HTTP API that the
+plugin uses, for offline testing and benchmarking.
+"""
+
+import json
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from random import random
+from socketserver import ThreadingMixIn
+from threading import Lock, Thread
+from time import monotonic, sleep
+from urllib.parse import parse_qsl, urlsplit
+
+from bigchaindb_driver.exceptions import HTTP_EXCEPTIONS, TransportError
+
+
+API_PREFIX = '/api/v1'
+
+
+class FakeLedger:
+    """In-memory ledger answering requests for BigchainDB's
+    transactions, statuses and outputs endpoints.
+
+    Transactions are accepted as long as they are not duplicates and do
+    not spend an already spent output or one that is not valid yet;
+    their signatures are not checked. An accepted transaction stays in
+    the ``'backlog'`` for :attr:`commit_delay` seconds before it becomes
+    ``'valid'``, and only valid transactions are returned by the
+    transactions and outputs endpoints (as with BigchainDB).
+
+    Failures can be injected either at random, through
+    :attr:`fail_rate`, or for the next few requests, through
+    :meth:`fail_next`.
+
+    Args:
+        latency (float, keyword, optional): Seconds to wait before
+            answering each request. Defaults to ``0``.
+        commit_delay (float, keyword, optional): Seconds before an
+            accepted transaction becomes valid. Defaults to ``0``.
+        fail_rate (float, keyword, optional): Probability of a request
+            failing with :attr:`fail_status`. Defaults to ``0``.
+        fail_status (int, keyword, optional): Status code of injected
+            failures. Defaults to ``503``.
+    """
+
+    def __init__(self, *, latency=0, commit_delay=0, fail_rate=0,
+                 fail_status=503):
+        self.latency = latency
+        self.commit_delay = commit_delay
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.requests = 0
+        self.failures = 0
+        self._pending_failures = []
+        self._txs = {}
+        self._commit_times = {}
+        self._txs_by_asset = {}
+        self._spent_outputs = set()
+        self._lock = Lock()
+
+    def add(self, tx, *, committed=True):
+        """Add a transaction directly, bypassing request handling and
+        validation.
+        """
+        with self._lock:
+            self._add(tx, committed=committed)
+
+    def fail_next(self, count=1, *, status_code=None):
+        """Make the next :attr:`count` requests fail.
+
+        Args:
+            count (int, optional): Number of requests to fail. Defaults
+                to ``1``.
+            status_code (int, keyword, optional): Status code to fail
+                the requests with. Defaults to :attr:`fail_status`.
+        """
+        with self._lock:
+            self._pending_failures.extend(
+                [status_code or self.fail_status] * count)
+
+    def reset_options(self):
+        """Remove any injected latency, commit delay or failures."""
+        with self._lock:
+            self.latency = 0
+            self.commit_delay = 0
+            self.fail_rate = 0
+            self._pending_failures.clear()
+
+    def handle(self, method, path, *, json=None, params=None):
+        """Answer a request to the ledger.
+
+        Args:
+            method (str): HTTP method of the request
+            path (str): Path of the request, including the API prefix
+            json (dict, keyword, optional): JSON body of the request
+            params (dict, keyword, optional): Query parameters of the
+                request
+
+        Returns:
+            tuple: A ``(status_code, data)`` pair, where ``data`` is the
+            JSON-serializable body of the response
+        """
+        with self._lock:
+            self.requests += 1
+            failure = self._take_failure()
+        if self.latency:
+            sleep(self.latency)
+        if failure:
+            return _error(failure, 'Injected failure')
+
+        params = params or {}
+        method = method.upper()
+        if not path.startswith(API_PREFIX):
+            return 404, {'message': 'Not found', 'status': 404}
+        path = path[len(API_PREFIX):].rstrip('/')
+
+        with self._lock:
+            if path == '/transactions' and method == 'POST':
+                return self._post_transaction(json)
+            if path == '/transactions' and method == 'GET':
+                return self._get_transactions(**params)
+            if path.startswith('/transactions/') and method == 'GET':
+                return self._get_transaction(path[len('/transactions/'):])
+            if path == '/statuses' and method == 'GET':
+                return self._get_status(**params)
+            if path == '/outputs' and method == 'GET':
+                return self._get_outputs(**params)
+        return 404, {'message': 'Not found', 'status': 404}
+
+    def _take_failure(self):
+        if self._pending_failures:
+            status_code = self._pending_failures.pop(0)
+        elif self.fail_rate and random() < self.fail_rate:
+            status_code = self.fail_status
+        else:
+            return None
+        self.failures += 1
+        return status_code
+
+    def _add(self, tx, *, committed):
+        self._txs[tx['id']] = tx
+        self._commit_times[tx['id']] = (
+            0 if committed else monotonic() + self.commit_delay)
+        self._txs_by_asset.setdefault(_asset_id(tx), []).append(tx)
+        fulfills = tx['inputs'][0]['fulfills']
+        if fulfills:
+            self._spent_outputs.add((fulfills['transaction_id'],
+                                     fulfills['output_index']))
+
+    def _is_valid(self, tx_id):
+        commit_time = self._commit_times.get(tx_id)
+        return commit_time is not None and commit_time <= monotonic()
+
+    def _post_transaction(self, tx):
+        if not tx or 'id' not in tx:
+            return _error(400, 'Invalid transaction')
+        if tx['id'] in self._txs:
+            return _error(400, 'Transaction `{}` already exists'.format(
+                tx['id']))
+
+        fulfills = tx['inputs'][0]['fulfills']
+        if fulfills:
+            spent = (fulfills['transaction_id'], fulfills['output_index'])
+            if spent[0] not in self._txs:
+                return _error(400, 'Input transaction `{}` does not '
+                                   'exist'.format(spent[0]))
+            if not self._is_valid(spent[0]):
+                return _error(400, 'Input transaction `{}` is not in a '
+                                   'valid block'.format(spent[0]))
+            if spent in self._spent_outputs:
+                return _error(400, 'Input transaction `{}` is already '
+                                   'spent'.format(spent[0]))
+
+        self._add(tx, committed=False)
+        return 202, tx
+
+    def _get_transaction(self, tx_id):
+        if not self._is_valid(tx_id):
+            return _error(404, 'Not found')
+        return 200, self._txs[tx_id]
+
+    def _get_transactions(self, asset_id=None, operation=None):
+        return 200, [tx for tx in self._txs_by_asset.get(asset_id, [])
+                     if self._is_valid(tx['id']) and
+                     (operation is None or tx['operation'] == operation)]
+
+    def _get_status(self, transaction_id=None):
+        if transaction_id not in self._txs:
+            return _error(404, 'Not found')
+        status = 'valid' if self._is_valid(transaction_id) else 'backlog'
+        return 200, {'status': status}
+
+    def _get_outputs(self, public_key=None, spent=None):
+        if isinstance(spent, str):
+            spent = {'true': True, 'false': False}.get(spent.lower())
+        outputs = []
+        for tx_id, tx in self._txs.items():
+            if not self._is_valid(tx_id):
+                continue
+            for index, output in enumerate(tx['outputs']):
+                if public_key not in output['public_keys']:
+                    continue
+                is_spent = (tx_id, index) in self._spent_outputs
+                if spent is None or spent == is_spent:
+                    outputs.append({'transaction_id': tx_id,
+                                    'output_index': index})
+        return 200, outputs
+
+
+class FakeLedgerTransport:
+    """Transport for :class:`bigchaindb_driver.BigchainDB` (and
+    :class:`coalaip_bigchaindb.Plugin`) that answers every request from
+    a :class:`~.FakeLedger` in-process.
+
+    Any connection options given by the plugin are ignored.
+
+    Args:
+        *nodes (str): Ignored
+        ledger (:class:`~.FakeLedger`, keyword): Ledger to answer
+            requests from
+    """
+
+    def __init__(self, *nodes, ledger, **options):
+        self.nodes = nodes
+        self.ledger = ledger
+
+    def forward_request(self, method, path=None, json=None, params=None,
+                        headers=None):
+        status_code, data = self.ledger.handle(method, urlsplit(path).path,
+                                               json=json, params=params)
+        if not 200 <= status_code < 300:
+            exc_cls = HTTP_EXCEPTIONS.get(status_code, TransportError)
+            raise exc_cls(status_code, _dumps(data), data)
+        return data
+
+
+class FakeLedgerServer(ThreadingMixIn, HTTPServer):
+    """HTTP server answering requests from a :class:`~.FakeLedger` on a
+    background thread, for use by anything that talks to BigchainDB
+    over HTTP.
+
+    Args:
+        ledger (:class:`~.FakeLedger`): Ledger to answer requests from
+        address (tuple, optional): ``(host, port)`` to listen on.
+            Defaults to a free port on ``127.0.0.1``.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, ledger, address=('127.0.0.1', 0)):
+        super().__init__(address, _FakeLedgerRequestHandler)
+        self.ledger = ledger
+        self._thread = None
+
+    @property
+    def url(self):
+        """str: Base URL of the server, to use as a BigchainDB node"""
+        host, port = self.server_address[:2]
+        return 'http://{host}:{port}'.format(host=host, port=port)
+
+    def start(self):
+        """Start serving requests on a background thread."""
+        self._thread = Thread(target=self.serve_forever, daemon=True,
+                              name='fake-ledger-server')
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving requests and close the server's socket."""
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+
+class _FakeLedgerRequestHandler(BaseHTTPRequestHandler):
+    # Keep connections alive, as BigchainDB does, for pooled clients
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self, method):
+        url = urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = (json.loads(self.rfile.read(length).decode('utf-8'))
+                    if length else None)
+        except ValueError:
+            status_code, data = _error(400, 'Invalid JSON body')
+        else:
+            status_code, data = self.server.ledger.handle(
+                method, url.path, json=body,
+                params=dict(parse_qsl(url.query)))
+
+        payload = _dumps(data).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def _asset_id(tx):
+    return tx['id'] if tx['operation'] == 'CREATE' else tx['asset']['id']
+
+
+def _error(status_code, message):
+    return status_code, {'message': message, 'status': status_code}
+
+
+def _dumps(data):
+    return json.dumps(data)
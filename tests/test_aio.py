@@ -0,0 +1,89 @@
+from pytest import importorskip, mark, raises
+from tests.utils import poll_bdb_transaction, poll_bdb_transaction_valid
+
+importorskip('aiohttp')
+
+
+@mark.asyncio
+async def test_async_save_and_load(bdb_node, bdb_driver,
+                                   manifestation_model_jsonld,
+                                   alice_keypair):
+    from coalaip_bigchaindb.aio import AsyncPlugin
+    async with AsyncPlugin(bdb_node) as plugin:
+        tx_id = await plugin.save(manifestation_model_jsonld,
+                                  user=alice_keypair)
+        poll_bdb_transaction(bdb_driver, tx_id)
+        loaded = await plugin.load(tx_id)
+    assert loaded == manifestation_model_jsonld
+
+
+@mark.asyncio
+async def test_async_transfer_and_get_history(bdb_node, bdb_driver,
+                                              persisted_manifestation,
+                                              rights_assignment_model_json,
+                                              alice_keypair, bob_keypair):
+    from coalaip_bigchaindb.aio import AsyncPlugin
+    entity_id = persisted_manifestation['id']
+    async with AsyncPlugin(bdb_node) as plugin:
+        transfer_tx_id = await plugin.transfer(
+            entity_id, rights_assignment_model_json,
+            from_user=alice_keypair, to_user=bob_keypair)
+        poll_bdb_transaction_valid(bdb_driver, transfer_tx_id)
+        status = await plugin.get_status(transfer_tx_id)
+        history = await plugin.get_history(entity_id)
+
+    assert status['status'] == 'valid'
+    assert [event['event_id'] for event in history] == [
+        entity_id, transfer_tx_id]
+    assert history[1]['user']['public_key'] == bob_keypair['public_key']
+
+
+@mark.asyncio
+@mark.parametrize('func_name', ['get_history', 'get_status', 'load'])
+async def test_async_func_on_id_raises_not_found_error_on_not_found(
+        monkeypatch, bdb_node, func_name):
+    from bigchaindb_driver.exceptions import NotFoundError
+    from coalaip.exceptions import EntityNotFoundError
+    from coalaip_bigchaindb.aio import AsyncPlugin
+
+    async def mock_request_not_found_error(*args, **kwargs):
+        raise NotFoundError()
+
+    async with AsyncPlugin(bdb_node) as plugin:
+        monkeypatch.setattr(plugin, '_request', mock_request_not_found_error)
+        with raises(EntityNotFoundError):
+            await getattr(plugin, func_name)('mock_id')
+
+
+@mark.asyncio
+@mark.parametrize('error_type_name', ['TransportError', 'ConnectionError'])
+async def test_async_save_raises_entity_creation_error_on_network_error(
+        monkeypatch, bdb_node, manifestation_model_json, alice_keypair,
+        error_type_name):
+    import importlib
+    from coalaip.exceptions import EntityCreationError
+    from coalaip_bigchaindb.aio import AsyncPlugin
+    bdb_exceptions = importlib.import_module('bigchaindb_driver.exceptions')
+
+    async def mock_request_error(*args, **kwargs):
+        raise getattr(bdb_exceptions, error_type_name)()
+
+    async with AsyncPlugin(bdb_node) as plugin:
+        monkeypatch.setattr(plugin, '_request', mock_request_error)
+        with raises(EntityCreationError):
+            await plugin.save(manifestation_model_json, user=alice_keypair)
+
+
+@mark.asyncio
+async def test_async_func_raises_persistence_error_on_error(monkeypatch,
+                                                            bdb_node):
+    from coalaip.exceptions import PersistenceError
+    from coalaip_bigchaindb.aio import AsyncPlugin
+
+    async def mock_request_error(*args, **kwargs):
+        raise Exception()
+
+    async with AsyncPlugin(bdb_node) as plugin:
+        monkeypatch.setattr(plugin, '_request', mock_request_error)
+        with raises(PersistenceError):
+            await plugin.load('mock_id')
@@ -0,0 +1,126 @@
+from pytest import fixture, mark, raises
+
+
+@fixture
+def entity_data():
+    return {
+        'type': 'CreativeWork',
+        'name': 'Ünïcödé Title ✓',
+        'datePublished': 2017,
+        'keywords': ['a', {'nested': None, 'flag': True}],
+    }
+
+
+@mark.parametrize('metadata', [None, {'note': 'Métadata', 'index': 1}])
+def test_create_matches_driver(alice_keypair, entity_data, metadata):
+    from bigchaindb_driver.offchain import prepare_transaction
+    from coalaip_bigchaindb.builder import prepare_transaction as build
+
+    params = {
+        'operation': 'CREATE',
+        'signers': alice_keypair['public_key'],
+        'asset': {'data': entity_data},
+        'metadata': metadata,
+    }
+    assert build(**params) == prepare_transaction(**params)
+
+
+def test_create_without_asset_matches_driver(alice_keypair, bob_keypair):
+    from bigchaindb_driver.offchain import prepare_transaction
+    from coalaip_bigchaindb.builder import prepare_transaction as build
+
+    params = {
+        'signers': [alice_keypair['public_key']],
+        'recipients': bob_keypair['public_key'],
+    }
+    assert build(**params) == prepare_transaction(**params)
+
+
+@mark.parametrize('metadata', [None, {'note': 'Métadata', 'index': 1}])
+def test_transfer_matches_driver(alice_keypair, bob_keypair, entity_data,
+                                 metadata):
+    from bigchaindb_driver.offchain import (
+        fulfill_transaction,
+        prepare_transaction,
+    )
+    from coalaip_bigchaindb.builder import prepare_transaction as build
+    from coalaip_bigchaindb.utils import transfer_tx_params
+
+    create_tx = fulfill_transaction(
+        prepare_transaction(signers=alice_keypair['public_key'],
+                            asset={'data': entity_data}),
+        private_keys=alice_keypair['private_key'])
+    params = transfer_tx_params(input_tx=create_tx,
+                                recipients=bob_keypair['public_key'],
+                                metadata=metadata)
+
+    transfer_tx = build(**params)
+    assert transfer_tx == prepare_transaction(**params)
+
+    # Fulfilling the built transaction must not change its id
+    fulfilled_tx = fulfill_transaction(
+        transfer_tx, private_keys=alice_keypair['private_key'])
+    assert fulfilled_tx['id'] == transfer_tx['id']
+
+
+def test_make_transfer_tx_without_driver(bdb_driver, persisted_manifestation,
+                                         bob_keypair):
+    from coalaip_bigchaindb.utils import make_transfer_tx
+    params = {
+        'input_tx': persisted_manifestation,
+        'recipients': bob_keypair['public_key'],
+        'metadata': {'note': 'offline'},
+    }
+    offline_tx = make_transfer_tx(None, **params)
+    assert offline_tx == make_transfer_tx(bdb_driver, **params)
+
+
+def test_condition_uri_is_cached(alice_keypair):
+    from coalaip_bigchaindb.builder import ed25519_condition_uri
+    ed25519_condition_uri.cache_clear()
+
+    uri = ed25519_condition_uri(alice_keypair['public_key'])
+    assert uri.startswith('ni:///sha-256;')
+    assert uri.endswith('?fpt=ed25519-sha-256&cost=131072')
+    assert ed25519_condition_uri(alice_keypair['public_key']) == uri
+    assert ed25519_condition_uri.cache_info().hits == 1
+
+
+def test_b58decode():
+    from coalaip_bigchaindb.builder import b58decode
+    assert b58decode('') == b''
+    assert b58decode('1') == b'\x00'
+    assert b58decode('112') == b'\x00\x00\x01'
+    assert b58decode('5Q') == b'\xff'
+    with raises(ValueError):
+        b58decode('0OIl')
+
+
+@mark.parametrize('params', [
+    {'operation': 'GENESIS', 'signers': 'key'},
+    {'signers': ['key_a', 'key_b']},
+    {'signers': 'not-a-valid-key'},
+])
+def test_prepare_transaction_rejects_unsupported_transactions(params):
+    from coalaip_bigchaindb.builder import prepare_transaction
+    with raises(ValueError):
+        prepare_transaction(**params)
+
+
+def test_plugin_prepare_offline(bdb_node, alice_keypair, bob_keypair,
+                                manifestation_model_jsonld):
+    from coalaip_bigchaindb import Plugin
+    from tests.utils import poll_result
+    plugin = Plugin(bdb_node, prepare_offline=True)
+
+    entity_id = plugin.save(manifestation_model_jsonld, user=alice_keypair)
+    poll_result(lambda: plugin.get_status(entity_id),
+                lambda result: result['status'] == 'valid')
+    transfer_tx_id = plugin.transfer(entity_id, from_user=alice_keypair,
+                                     to_user=bob_keypair)
+    poll_result(lambda: plugin.get_status(transfer_tx_id),
+                lambda result: result['status'] == 'valid')
+
+    assert plugin.load(entity_id) == manifestation_model_jsonld
+    assert [event['event_id'] for event in plugin.get_history(entity_id)] == [
+        entity_id, transfer_tx_id]
@@ -0,0 +1,238 @@
+from pytest import raises
+
+
+def test_lru_cache_evicts_least_recently_used():
+    from coalaip_bigchaindb.cache import LRUCache
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+
+    # Touch 'a' so that 'b' becomes the least recently used entry
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert len(cache) == 2
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert cache.get('c') == 3
+
+
+def test_lru_cache_counts_hits_and_misses():
+    from coalaip_bigchaindb.cache import LRUCache
+    cache = LRUCache(1)
+    cache.put('a', 1)
+
+    cache.get('a')
+    cache.get('a')
+    assert cache.get('b', 'default') == 'default'
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    cache.clear()
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_lru_cache_requires_positive_size():
+    from coalaip_bigchaindb.cache import LRUCache
+    with raises(ValueError):
+        LRUCache(0)
+
+
+def test_history_cache_extends_cached_chain(bdb_driver, alice_keypair,
+                                            bob_keypair):
+    import random
+    from coalaip_bigchaindb.cache import HistoryCache
+    from coalaip_bigchaindb.utils import make_transfer_tx
+    create_tx = bdb_driver.transactions.prepare(
+        operation='CREATE',
+        signers=alice_keypair['public_key'])
+    transfer_to_bob_tx = make_transfer_tx(bdb_driver, input_tx=create_tx,
+                                          recipients=bob_keypair['public_key'])
+    transfer_back_to_alice_tx = make_transfer_tx(
+        bdb_driver, input_tx=transfer_to_bob_tx, recipients=alice_keypair['public_key'])
+    cache = HistoryCache(1)
+
+    events, tip = cache.update(create_tx['id'], [transfer_to_bob_tx, create_tx])
+    assert events == [
+        (alice_keypair['public_key'], create_tx['id']),
+        (bob_keypair['public_key'], transfer_to_bob_tx['id']),
+    ]
+    assert tip == transfer_to_bob_tx
+
+    all_txs = [create_tx, transfer_to_bob_tx, transfer_back_to_alice_tx]
+    events, tip = cache.update(create_tx['id'],
+                               random.sample(all_txs, len(all_txs)))
+    assert [event_id for _, event_id in events] == [tx['id'] for tx in all_txs]
+    assert tip == transfer_back_to_alice_tx
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_history_cache_rebuilds_inconsistent_chain(bdb_driver, alice_keypair,
+                                                   bob_keypair, carly_keypair):
+    from coalaip_bigchaindb.cache import HistoryCache
+    from coalaip_bigchaindb.utils import make_transfer_tx
+    create_tx = bdb_driver.transactions.prepare(
+        operation='CREATE',
+        signers=alice_keypair['public_key'])
+    transfer_to_bob_tx = make_transfer_tx(bdb_driver, input_tx=create_tx,
+                                          recipients=bob_keypair['public_key'])
+    transfer_to_carly_tx = make_transfer_tx(
+        bdb_driver, input_tx=create_tx, recipients=carly_keypair['public_key'])
+    cache = HistoryCache(1)
+    cache.update(create_tx['id'], [create_tx, transfer_to_bob_tx])
+
+    # The transfer to Bob was dropped in favour of a transfer to Carly
+    events, tip = cache.update(create_tx['id'],
+                               [create_tx, transfer_to_carly_tx])
+    assert [event_id for _, event_id in events] == [
+        create_tx['id'], transfer_to_carly_tx['id']]
+    assert tip == transfer_to_carly_tx
+
+
+def test_history_cache_does_not_cache_empty_chain():
+    from coalaip_bigchaindb.cache import HistoryCache
+    cache = HistoryCache(1)
+    assert cache.update('mock_id', []) == ([], None)
+    assert 'mock_id' not in cache
+
+
+def test_owner_index_only_tracks_indexed_keys():
+    from coalaip_bigchaindb.cache import OwnerIndex
+    index = OwnerIndex(2)
+    assert index.get('alice') is None
+
+    index.put('alice', ['asset_a'])
+    index.move('asset_b', to_key='alice')
+    index.move('asset_c', to_key='bob')
+    assert index.get('alice') == ['asset_a', 'asset_b']
+    assert 'bob' not in index
+
+    index.put('bob', [])
+    index.move('asset_a', from_key='alice', to_key='bob')
+    assert index.get('alice') == ['asset_b']
+    assert index.get('bob') == ['asset_a']
+    assert (index.hits, index.misses) == (3, 1)
+
+
+def test_owner_index_applies_moves_made_while_scanning():
+    from coalaip_bigchaindb.cache import OwnerIndex
+    index = OwnerIndex(2)
+    index.put('bob', ['asset_c'])
+    scan = index.scan('alice')
+
+    # Moves made while alice's assets are being listed
+    index.move('asset_c', from_key='bob', to_key='alice')
+    index.move('asset_a', from_key='alice', to_key='bob')
+    index.put('alice', ['asset_a', 'asset_b'], scan=scan)
+
+    assert index.get('alice') == ['asset_b', 'asset_c']
+    assert index.get('bob') == ['asset_a']
+
+    # Discarded scans no longer record moves
+    scan = index.scan('bob')
+    index.discard(scan)
+    index.move('asset_b', from_key='alice', to_key='bob')
+    assert scan.moves == []
+
+
+def test_owner_index_expires_lists(monkeypatch):
+    from coalaip_bigchaindb import cache
+    now = 100.0
+    monkeypatch.setattr(cache, 'monotonic', lambda: now)
+    index = cache.OwnerIndex(2, ttl=10)
+    index.put('alice', ['asset_a'])
+
+    now = 109.0
+    assert index.get('alice') == ['asset_a']
+    now = 110.0
+    assert index.get('alice') is None
+    assert 'alice' not in index
+    assert (index.hits, index.misses) == (1, 1)
+
+
+def test_lru_cache_peek_does_not_touch_entry():
+    from coalaip_bigchaindb.cache import LRUCache
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+
+    assert cache.peek('a') == 1
+    assert cache.peek('c') is None
+    cache.put('c', 3)
+
+    assert 'a' not in cache
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_single_flight_shares_in_flight_call():
+    from threading import Event, Thread
+    from coalaip_bigchaindb.cache import SingleFlight
+    from tests.utils import poll_result
+    single_flight = SingleFlight()
+    started = Event()
+    release = Event()
+    results = []
+
+    def fetch(key):
+        started.set()
+        release.wait(5)
+        return [key]
+
+    def call():
+        results.append(single_flight.do('key', fetch, 'key'))
+
+    leader = Thread(target=call)
+    leader.start()
+    assert started.wait(5)
+    followers = [Thread(target=call) for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    poll_result(lambda: single_flight.shared,
+                lambda shared: shared == 3, interval=0.1)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join()
+
+    assert results == [['key']] * 4
+    assert all(result is results[0] for result in results)
+    assert (single_flight.calls, single_flight.shared) == (1, 3)
+    assert 'key' not in single_flight
+
+    # Finished calls are not reused
+    assert single_flight.do('key', fetch, 'other') == ['other']
+    assert single_flight.calls == 2
+
+
+def test_single_flight_shares_exceptions():
+    from threading import Event, Thread
+    from coalaip_bigchaindb.cache import SingleFlight
+    from tests.utils import poll_result
+    single_flight = SingleFlight()
+    started = Event()
+    release = Event()
+    errors = []
+
+    def fetch():
+        started.set()
+        release.wait(5)
+        raise KeyError('missing')
+
+    def call():
+        try:
+            single_flight.do('key', fetch)
+        except KeyError as ex:
+            errors.append(ex)
+
+    threads = [Thread(target=call) for _ in range(2)]
+    threads[0].start()
+    assert started.wait(5)
+    threads[1].start()
+    poll_result(lambda: single_flight.shared,
+                lambda shared: shared == 1, interval=0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 2
+    assert errors[0] is errors[1]
+    assert len(single_flight) == 0
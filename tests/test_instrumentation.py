@@ -0,0 +1,194 @@
+from pytest import fixture, importorskip, raises
+
+
+@fixture
+def recorder():
+    from coalaip_bigchaindb.instrumentation import Observer
+
+    class Recorder(Observer):
+        def __init__(self):
+            self.operations = []
+            self.phases = []
+            self.requests = []
+
+        def on_operation(self, event):
+            self.operations.append(event)
+
+        def on_phase(self, event):
+            self.phases.append(event)
+
+        def on_request(self, event):
+            self.requests.append(event)
+
+    return Recorder()
+
+
+@fixture
+def instrumented_plugin(fake_ledger_server, recorder):
+    from coalaip_bigchaindb import Plugin
+    plugin = Plugin(fake_ledger_server.url, observers=[recorder])
+    yield plugin
+    plugin.close()
+
+
+def test_phase_emits_timing(recorder):
+    from coalaip_bigchaindb.instrumentation import Instrumentation
+
+    instrumentation = Instrumentation([recorder])
+    with instrumentation.phase('send', 'CREATE'):
+        pass
+    with raises(KeyError):
+        with instrumentation.phase('fulfill', 'TRANSFER', count=2):
+            raise KeyError()
+
+    send_event, fulfill_event = recorder.phases
+    assert (send_event.phase, send_event.operation, send_event.count,
+            send_event.error) == ('send', 'CREATE', 1, None)
+    assert send_event.seconds >= 0
+    assert (fulfill_event.phase, fulfill_event.operation,
+            fulfill_event.count, fulfill_event.error) == (
+                'fulfill', 'TRANSFER', 2, 'KeyError')
+
+
+def test_failing_observer_is_ignored(recorder):
+    from coalaip_bigchaindb.instrumentation import Instrumentation, Observer
+
+    class FailingObserver(Observer):
+        def on_phase(self, event):
+            raise RuntimeError()
+
+    instrumentation = Instrumentation([FailingObserver(), recorder])
+    with instrumentation.phase('send'):
+        pass
+    assert len(recorder.phases) == 1
+
+
+def test_instrumented_save_transfer(instrumented_plugin, recorder,
+                                    fake_ledger_server, alice_keypair,
+                                    bob_keypair, manifestation_model_jsonld):
+    persist_id = instrumented_plugin.save(manifestation_model_jsonld,
+                                          user=alice_keypair)
+    instrumented_plugin.transfer(persist_id, from_user=alice_keypair,
+                                 to_user=bob_keypair)
+
+    assert [(event.operation, event.error)
+            for event in recorder.operations] == [('save', None),
+                                                  ('transfer', None)]
+    assert [(event.phase, event.operation)
+            for event in recorder.phases] == [
+        ('prepare', 'CREATE'), ('fulfill', 'CREATE'), ('send', 'CREATE'),
+        ('history', None), ('order', None), ('prepare', 'TRANSFER'),
+        ('fulfill', 'TRANSFER'), ('send', 'TRANSFER'),
+    ]
+
+    create_request = recorder.requests[0]
+    assert create_request.method == 'POST'
+    assert create_request.node == fake_ledger_server.url
+    assert create_request.request_size > 0
+    assert create_request.response_size > 0
+    assert create_request.status_code == 202
+    assert create_request.retries == 0
+    assert create_request.error is None
+
+
+def test_instrumented_errors(instrumented_plugin, recorder):
+    from coalaip.exceptions import EntityNotFoundError
+
+    with raises(EntityNotFoundError):
+        instrumented_plugin.load('nonexistent')
+
+    operation, = recorder.operations
+    assert (operation.operation, operation.error) == (
+        'load', 'EntityNotFoundError')
+    assert recorder.phases[0].error == 'NotFoundError'
+    request, = recorder.requests
+    assert (request.status_code, request.error) == (404, 'NotFoundError')
+
+
+def test_instrumented_generators(instrumented_plugin, recorder,
+                                 alice_keypair, manifestation_model_jsonld):
+    persist_id = instrumented_plugin.save(manifestation_model_jsonld,
+                                          user=alice_keypair)
+    history = instrumented_plugin.iter_history(persist_id)
+    assert next(history).event_id == persist_id
+
+    # Operations called while iterating are not nested in the generator
+    instrumented_plugin.load(persist_id)
+    assert list(history) == []
+    assert instrumented_plugin.get_owned(alice_keypair['public_key']) == [
+        persist_id]
+
+    assert [(event.operation, event.error, event.parent)
+            for event in recorder.operations] == [
+        ('save', None, None),
+        ('load', None, None),
+        ('iter_history', None, None),
+        ('iter_owned', None, 'get_owned'),
+        ('get_owned', None, None),
+    ]
+
+
+def test_instrumented_abandoned_generator(instrumented_plugin, recorder,
+                                          alice_keypair,
+                                          manifestation_model_jsonld):
+    persist_id = instrumented_plugin.save(manifestation_model_jsonld,
+                                          user=alice_keypair)
+    owned = instrumented_plugin.iter_owned(alice_keypair['public_key'])
+    assert next(owned) == persist_id
+    owned.close()
+
+    event = recorder.operations[-1]
+    assert (event.operation, event.error, event.parent) == (
+        'iter_owned', None, None)
+    assert event.seconds >= 0
+
+
+def test_instrumented_nested_operations(instrumented_plugin, recorder,
+                                        alice_keypair,
+                                        manifestation_model_jsonld):
+    persist_id = instrumented_plugin.save(manifestation_model_jsonld,
+                                          user=alice_keypair)
+    del recorder.operations[:]
+
+    results = instrumented_plugin.load_many([persist_id, 'nonexistent'])
+    assert results[0].error is None
+    assert results[1].error is not None
+
+    top_level = [event.operation for event in recorder.operations
+                 if event.parent is None]
+    nested = [(event.operation, event.error, event.parent)
+              for event in recorder.operations if event.parent is not None]
+    assert top_level == ['load_many']
+    assert len(nested) == 2
+    assert set(nested) == {('load', None, 'load_many'),
+                           ('load', 'EntityNotFoundError', 'load_many')}
+
+
+def test_prometheus_observer(fake_ledger_server, alice_keypair,
+                             manifestation_model_jsonld):
+    prometheus_client = importorskip('prometheus_client')
+    from coalaip_bigchaindb import Plugin
+    from coalaip_bigchaindb.prometheus import PrometheusObserver
+
+    registry = prometheus_client.CollectorRegistry()
+    plugin = Plugin(fake_ledger_server.url,
+                    observers=[PrometheusObserver(registry=registry)])
+    persist_id = plugin.save(manifestation_model_jsonld, user=alice_keypair)
+    plugin.load_many([persist_id])
+
+    assert registry.get_sample_value(
+        'coalaip_bigchaindb_operation_seconds_count',
+        {'operation': 'save'}) == 1
+    # Nested operations are not recorded
+    assert registry.get_sample_value(
+        'coalaip_bigchaindb_operation_seconds_count',
+        {'operation': 'load_many'}) == 1
+    assert registry.get_sample_value(
+        'coalaip_bigchaindb_operation_seconds_count',
+        {'operation': 'load'}) is None
+    assert registry.get_sample_value(
+        'coalaip_bigchaindb_phase_seconds_count',
+        {'phase': 'fulfill', 'operation': 'CREATE'}) == 1
+    assert registry.get_sample_value(
+        'coalaip_bigchaindb_request_seconds_count',
+        {'method': 'POST', 'node': fake_ledger_server.url}) == 1
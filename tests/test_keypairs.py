@@ -0,0 +1,62 @@
+from pytest import fixture, raises
+from tests.utils import poll_result
+
+
+@fixture
+def keypair_pool():
+    from coalaip_bigchaindb.keypairs import KeypairPool
+    keypair_pool = KeypairPool(4, refill_threshold=2)
+    yield keypair_pool
+    keypair_pool.close()
+
+
+def test_keypair_pool_fills_in_background(keypair_pool):
+    poll_result(lambda: keypair_pool.stats(),
+                lambda stats: stats['available'] == 4,
+                interval=0.1)
+
+    keypairs = [keypair_pool.take() for _ in range(4)]
+    assert len({keypair.public_key for keypair in keypairs}) == 4
+
+    # Dropping below the threshold triggers a refill
+    poll_result(lambda: keypair_pool.stats(),
+                lambda stats: stats['available'] == 4,
+                interval=0.1)
+    stats = keypair_pool.stats()
+    assert stats['hits'] == 4
+    assert stats['generated'] >= 8
+    assert stats['refills'] >= 2
+
+
+def test_keypair_pool_returns_none_when_empty(keypair_pool):
+    poll_result(lambda: keypair_pool.stats(),
+                lambda stats: stats['available'] == 4,
+                interval=0.1)
+    keypair_pool.close()
+
+    assert keypair_pool.take() is None
+    assert keypair_pool.stats()['misses'] == 1
+
+
+def test_keypair_pool_requires_positive_size():
+    from coalaip_bigchaindb.keypairs import KeypairPool
+    with raises(ValueError):
+        KeypairPool(0)
+
+
+def test_generate_user_with_keypair_pool(bdb_node):
+    from coalaip_bigchaindb import Plugin
+    plugin = Plugin(bdb_node, keypair_pool_size=2)
+    try:
+        users = [plugin.generate_user() for _ in range(5)]
+    finally:
+        plugin.close()
+
+    for user in users:
+        assert isinstance(user['public_key'], str)
+        assert isinstance(user['private_key'], str)
+    assert len({user['public_key'] for user in users}) == 5
+
+    # Falls back to generating keypairs once the pool is empty
+    assert plugin.generate_user()['public_key'] not in {
+        user['public_key'] for user in users}
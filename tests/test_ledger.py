@@ -0,0 +1,109 @@
+from pytest import fixture, raises
+
+
+@fixture
+def fake_plugin(fake_ledger_server):
+    from coalaip_bigchaindb import Plugin
+    return Plugin(fake_ledger_server.url)
+
+
+def test_fake_ledger_save_load(fake_ledger, fake_plugin, alice_keypair,
+                               manifestation_model_jsonld):
+    tx_id = fake_plugin.save(manifestation_model_jsonld, user=alice_keypair)
+    assert fake_plugin.get_status(tx_id) == {'status': 'valid'}
+    assert fake_plugin.load(tx_id) == manifestation_model_jsonld
+
+
+def test_fake_ledger_transfer(fake_ledger, fake_plugin, alice_keypair,
+                              bob_keypair, manifestation_model_jsonld):
+    tx_id = fake_plugin.save(manifestation_model_jsonld, user=alice_keypair)
+    transfer_tx_id = fake_plugin.transfer(tx_id, from_user=alice_keypair,
+                                          to_user=bob_keypair)
+
+    assert fake_plugin.get_history(tx_id) == [
+        {'user': {'public_key': alice_keypair['public_key'],
+                  'private_key': None},
+         'event_id': tx_id},
+        {'user': {'public_key': bob_keypair['public_key'],
+                  'private_key': None},
+         'event_id': transfer_tx_id},
+    ]
+
+
+def test_fake_ledger_rejects_double_spend(
+        fake_ledger, fake_plugin, alice_keypair, bob_keypair, carly_keypair,
+        manifestation_model_jsonld):
+    from coalaip.exceptions import EntityTransferError
+
+    tx_id = fake_plugin.save(manifestation_model_jsonld, user=alice_keypair)
+    create_tx = fake_plugin.driver.transactions.retrieve(tx_id)
+    fake_plugin.transfer(tx_id, from_user=alice_keypair, to_user=bob_keypair)
+
+    with raises(EntityTransferError):
+        fake_plugin.transfer(tx_id, from_user=alice_keypair,
+                             to_user=carly_keypair, input_tx=create_tx)
+
+
+def test_fake_ledger_commit_delay(fake_ledger, fake_plugin, alice_keypair,
+                                  manifestation_model_jsonld):
+    from coalaip.exceptions import EntityNotFoundError
+    from tests.utils import poll_result
+
+    fake_ledger.commit_delay = 0.5
+    tx_id = fake_plugin.save(manifestation_model_jsonld, user=alice_keypair)
+
+    assert fake_plugin.get_status(tx_id) == {'status': 'backlog'}
+    with raises(EntityNotFoundError):
+        fake_plugin.load(tx_id)
+
+    poll_result(lambda: fake_plugin.get_status(tx_id),
+                lambda result: result == {'status': 'valid'},
+                interval=0.2)
+    assert fake_plugin.load(tx_id) == manifestation_model_jsonld
+
+
+def test_fake_ledger_fail_next(fake_ledger, fake_plugin, alice_keypair,
+                               manifestation_model_jsonld):
+    from coalaip.exceptions import EntityCreationError
+
+    fake_ledger.fail_next(status_code=500)
+    with raises(EntityCreationError):
+        fake_plugin.save(manifestation_model_jsonld, user=alice_keypair)
+    assert fake_ledger.failures == 1
+
+    # Only the next request fails
+    tx_id = fake_plugin.save(manifestation_model_jsonld, user=alice_keypair)
+    assert fake_plugin.load(tx_id) == manifestation_model_jsonld
+
+
+def test_fake_ledger_transport(alice_keypair, manifestation_model_jsonld):
+    from functools import partial
+    from coalaip_bigchaindb import Plugin
+    from tests.ledger import FakeLedger, FakeLedgerTransport
+
+    ledger = FakeLedger()
+    plugin = Plugin('http://fake-ledger:9984',
+                    transport_class=partial(FakeLedgerTransport,
+                                            ledger=ledger))
+    tx_id = plugin.save(manifestation_model_jsonld, user=alice_keypair)
+
+    assert plugin.load(tx_id) == manifestation_model_jsonld
+    assert ledger.requests == 2
+
+
+def test_fake_ledger_transfer_chain_waits_for_commits(
+        fake_ledger, fake_plugin, alice_keypair, bob_keypair, carly_keypair,
+        manifestation_model_jsonld):
+    tx_id = fake_plugin.save(manifestation_model_jsonld, user=alice_keypair)
+    fake_plugin.wait_until_valid([tx_id], initial_interval=0.1)
+    fake_ledger.commit_delay = 0.3
+
+    transfer_tx_ids = fake_plugin.transfer_chain(tx_id, [
+        (None, alice_keypair, bob_keypair),
+        (None, bob_keypair, carly_keypair),
+    ], initial_interval=0.1)
+
+    assert fake_plugin.get_status(transfer_tx_ids[0]) == {'status': 'valid'}
+    fake_plugin.wait_until_valid(transfer_tx_ids[-1:], initial_interval=0.1)
+    assert [event_id for _, event_id in fake_plugin.iter_history(tx_id)] == [
+        tx_id] + transfer_tx_ids
@@ -0,0 +1,200 @@
+from pytest import fixture
+
+
+@fixture
+def outbox_path(tmpdir):
+    return str(tmpdir.join('outbox.sqlite'))
+
+
+@fixture
+def tx():
+    return {'id': 'tx-1', 'operation': 'CREATE'}
+
+
+def test_outbox_persists_pending_transactions(outbox_path, tx):
+    from coalaip_bigchaindb.outbox import Outbox
+    outbox = Outbox(outbox_path)
+    outbox.put(tx)
+    outbox.put(tx)
+    outbox.close()
+
+    # Transactions survive reopening the outbox (e.g. after a crash)
+    outbox = Outbox(outbox_path)
+    assert len(outbox) == 1
+    assert outbox.pending() == [tx]
+
+    outbox.remove(tx['id'])
+    assert len(outbox) == 0
+    assert outbox.stats() == {'pending': 0, 'failed': 0, 'delivered': 1,
+                              'retries': 0}
+    outbox.close()
+
+
+def test_outbox_drain_waits_for_deferred_transactions(outbox_path, tx):
+    from time import time
+    from coalaip_bigchaindb.outbox import Outbox
+    outbox = Outbox(outbox_path, initial_interval=10)
+    outbox.put(tx)
+    sent = []
+
+    def send(tx):
+        sent.append(tx)
+        return True
+
+    # Transactions are never resent while the caller may still be
+    # sending them itself
+    assert outbox.drain(send, now=time() + 3600) == 0
+    assert outbox.next_attempt() is None
+
+    outbox.defer(tx['id'], ConnectionError('unreachable'))
+    assert outbox.drain(send) == 0
+    assert outbox.drain(send, now=time() + 10) == 1
+    assert sent == [tx]
+    assert len(outbox) == 0
+    outbox.close()
+
+
+def test_outbox_drain_backs_off_failed_sends(outbox_path, tx):
+    from time import time
+    from coalaip_bigchaindb.outbox import Outbox
+    outbox = Outbox(outbox_path, initial_interval=1, max_interval=4)
+    outbox.put(tx)
+
+    def send(tx):
+        raise ConnectionError('unreachable')
+
+    start = time()
+    outbox.defer(tx['id'], ConnectionError('unreachable'))
+    intervals = [outbox.next_attempt() - start]
+    for _ in range(3):
+        start = time()
+        assert outbox.drain(send, now=outbox.next_attempt()) == 0
+        intervals.append(outbox.next_attempt() - start)
+
+    for interval, (low, high) in zip(intervals,
+                                     [(0.5, 1), (1, 2), (2, 4), (2, 4)]):
+        assert low <= interval <= high + 0.1
+    assert outbox.pending() == [tx]
+    assert outbox.stats()['retries'] == 3
+    outbox.close()
+
+
+def test_outbox_drain_keeps_rejected_transactions(outbox_path, tx):
+    from time import time
+    from coalaip_bigchaindb.outbox import Outbox
+    outbox = Outbox(outbox_path, initial_interval=0)
+    outbox.put(tx)
+    outbox.defer(tx['id'], ConnectionError('unreachable'))
+
+    assert outbox.drain(lambda tx: False, now=time() + 1) == 0
+    assert len(outbox) == 0
+    assert outbox.failed() == {tx['id']: 'ConnectionError: unreachable'}
+    assert outbox.drain(lambda tx: True, now=time() + 1) == 0
+    outbox.close()
+
+
+def test_outbox_starts_by_draining_leftover_transactions(outbox_path, tx):
+    from threading import Event
+    from coalaip_bigchaindb.outbox import Outbox
+    outbox = Outbox(outbox_path)
+    outbox.put(tx)
+    outbox.close()
+
+    delivered = Event()
+
+    def send(tx):
+        delivered.set()
+        return True
+
+    outbox = Outbox(outbox_path)
+    outbox.start(send)
+    assert delivered.wait(5)
+    outbox.close()
+    assert len(Outbox(outbox_path)) == 0
+
+
+def test_is_retriable():
+    from bigchaindb_driver.exceptions import (
+        BadRequest,
+        ConnectionError,
+        TransportError,
+    )
+    from coalaip_bigchaindb.outbox import is_retriable
+
+    assert is_retriable(ConnectionError())
+    assert is_retriable(TransportError(503, '', {}))
+    assert not is_retriable(BadRequest(400, '', {}))
+
+
+def test_plugin_resends_from_outbox(fake_ledger, fake_ledger_server,
+                                    outbox_path, alice_keypair,
+                                    manifestation_model_jsonld):
+    from coalaip_bigchaindb import Plugin
+    from coalaip_bigchaindb.outbox import Outbox
+    from tests.utils import poll_result
+
+    outbox = Outbox(outbox_path, initial_interval=0.1, poll_interval=0.1)
+    plugin = Plugin(fake_ledger_server.url, outbox=outbox)
+    fake_ledger.fail_next(1, status_code=503)
+
+    # The failed send is queued rather than raised
+    tx_id = plugin.save(manifestation_model_jsonld, user=alice_keypair)
+    poll_result(lambda: len(outbox), lambda pending: pending == 0,
+                interval=0.2)
+
+    assert plugin.get_status(tx_id) == {'status': 'valid'}
+    assert outbox.stats()['delivered'] == 1
+    plugin.close()
+
+
+def test_plugin_outbox_treats_duplicate_resend_as_delivered(
+        fake_ledger, fake_ledger_server, outbox_path, alice_keypair,
+        manifestation_model_jsonld):
+    from coalaip_bigchaindb import Plugin
+    from coalaip_bigchaindb.outbox import Outbox
+
+    outbox = Outbox(outbox_path)
+    plugin = Plugin(fake_ledger_server.url, outbox=outbox)
+    tx = plugin._make_create_tx(manifestation_model_jsonld, alice_keypair)
+
+    # Simulate an earlier send whose response was lost
+    plugin.driver.transactions.send(tx)
+    assert plugin._resend_tx(tx)
+    plugin.close()
+
+
+def test_plugin_outbox_drops_rejected_sends(fake_ledger, fake_ledger_server,
+                                            outbox_path, alice_keypair,
+                                            manifestation_model_jsonld):
+    from pytest import raises
+    from coalaip.exceptions import EntityCreationError
+    from coalaip_bigchaindb import Plugin
+    from coalaip_bigchaindb.outbox import Outbox
+
+    outbox = Outbox(outbox_path)
+    plugin = Plugin(fake_ledger_server.url, outbox=outbox)
+    fake_ledger.fail_next(1, status_code=400)
+
+    with raises(EntityCreationError):
+        plugin.save(manifestation_model_jsonld, user=alice_keypair)
+    assert len(outbox) == 0
+    plugin.close()
+
+
+def test_plugin_treats_duplicate_send_as_delivered(
+        fake_ledger, fake_ledger_server, outbox_path, alice_keypair,
+        manifestation_model_jsonld):
+    from coalaip_bigchaindb import Plugin
+    from coalaip_bigchaindb.outbox import Outbox
+
+    outbox = Outbox(outbox_path)
+    plugin = Plugin(fake_ledger_server.url, outbox=outbox)
+    tx = plugin._make_create_tx(manifestation_model_jsonld, alice_keypair)
+
+    # Simulate a resend that reached BigchainDB first
+    plugin.driver.transactions.send(tx)
+    assert plugin.save(manifestation_model_jsonld,
+                       user=alice_keypair) == tx['id']
+    assert len(outbox) == 0
+    assert outbox.stats()['delivered'] == 1
+    plugin.close()
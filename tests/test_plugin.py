@@ -80,6 +80,117 @@ def test_get_history(plugin, bdb_driver, alice_keypair, bob_keypair,
     assert history[2]['event_id'] == transfer_back_to_alice_tx['id']
 
 
+def test_get_history_reuses_cached_chain(cached_plugin, bdb_driver,
+                                         transferred_manifestation_tx,
+                                         bob_keypair, carly_keypair):
+    entity_id = transferred_manifestation_tx['asset']['id']
+    history = cached_plugin.get_history(entity_id)
+    assert [event['event_id'] for event in history] == [
+        entity_id, transferred_manifestation_tx['id']]
+
+    transfer_tx_id = cached_plugin.transfer(entity_id,
+                                            from_user=bob_keypair,
+                                            to_user=carly_keypair)
+    poll_bdb_transaction_valid(bdb_driver, transfer_tx_id)
+
+    history = cached_plugin.get_history(entity_id)
+    assert [event['event_id'] for event in history] == [
+        entity_id, transferred_manifestation_tx['id'], transfer_tx_id]
+    assert history[2]['user']['public_key'] == carly_keypair['public_key']
+    assert cached_plugin.history_cache.misses == 1
+
+
+@mark.parametrize('plugin_fixture', ['plugin', 'cached_plugin'])
+def test_iter_history(plugin_fixture, transferred_manifestation_tx,
+                      alice_keypair, bob_keypair, request):
+    plugin = request.getfixturevalue(plugin_fixture)
+    entity_id = transferred_manifestation_tx['asset']['id']
+
+    history = plugin.iter_history(entity_id)
+    assert next(history) == (alice_keypair['public_key'], entity_id)
+    assert list(history) == [
+        (bob_keypair['public_key'], transferred_manifestation_tx['id'])]
+
+
+def test_iter_history_of_unknown_entity(plugin):
+    assert list(plugin.iter_history('nonexistent')) == []
+
+
+@mark.parametrize('plugin_fixture', ['plugin', 'cached_plugin'])
+def test_get_owned(plugin_fixture, bdb_driver, manifestation_model_jsonld,
+                   alice_keypair, bob_keypair, request):
+    plugin = request.getfixturevalue(plugin_fixture)
+    entity_ids = [plugin.save(dict(manifestation_model_jsonld, name=name),
+                              user=alice_keypair)
+                  for name in ('First', 'Second')]
+    for entity_id in entity_ids:
+        poll_bdb_transaction_valid(bdb_driver, entity_id)
+    assert sorted(plugin.get_owned(alice_keypair['public_key'])) == sorted(
+        entity_ids)
+
+    transfer_tx_id = plugin.transfer(entity_ids[0], from_user=alice_keypair,
+                                     to_user=bob_keypair)
+    poll_bdb_transaction_valid(bdb_driver, transfer_tx_id)
+    assert plugin.get_owned(alice_keypair['public_key']) == entity_ids[1:]
+    assert list(plugin.iter_owned(bob_keypair['public_key'])) == (
+        entity_ids[:1])
+
+
+def test_get_owned_uses_owner_index(monkeypatch, cached_plugin, bdb_driver,
+                                    manifestation_model_jsonld,
+                                    alice_keypair):
+    public_key = alice_keypair['public_key']
+    assert cached_plugin.get_owned(public_key) == []
+
+    def mock_outputs(*args, **kwargs):
+        raise AssertionError('Owner index was not used')
+    monkeypatch.setattr(cached_plugin, '_iter_outputs', mock_outputs)
+
+    entity_id = cached_plugin.save(manifestation_model_jsonld,
+                                   user=alice_keypair)
+    assert cached_plugin.get_owned(public_key) == [entity_id]
+    assert cached_plugin.owner_index.hits == 1
+
+
+def test_get_owned_keeps_entities_saved_while_scanning(
+        monkeypatch, cached_plugin, bdb_driver, manifestation_model_jsonld,
+        alice_keypair):
+    public_key = alice_keypair['public_key']
+    first_id = cached_plugin.save(manifestation_model_jsonld,
+                                  user=alice_keypair)
+    poll_bdb_transaction_valid(bdb_driver, first_id)
+
+    saved_ids = []
+    iter_outputs = cached_plugin._iter_outputs
+
+    def mock_iter_outputs(public_key):
+        yield from iter_outputs(public_key)
+        # Save another entity once the outputs have already been fetched
+        saved_ids.append(cached_plugin.save(
+            dict(manifestation_model_jsonld, name='Second'),
+            user=alice_keypair))
+    monkeypatch.setattr(cached_plugin, '_iter_outputs', mock_iter_outputs)
+
+    assert cached_plugin.get_owned(public_key) == [first_id]
+    assert cached_plugin.get_owned(public_key) == [first_id] + saved_ids
+    assert cached_plugin.owner_index.hits == 1
+
+
+def test_get_owned_refetches_expired_owner_index(
+        monkeypatch, bdb_node, created_manifestation_id, alice_keypair):
+    from coalaip_bigchaindb import Plugin
+    plugin = Plugin(bdb_node, owner_index_size=10, owner_index_ttl=0)
+    public_key = alice_keypair['public_key']
+    outputs = [{'transaction_id': created_manifestation_id,
+                'output_index': 0}]
+    monkeypatch.setattr(plugin, '_iter_outputs', lambda public_key: outputs)
+
+    assert plugin.get_owned(public_key) == [created_manifestation_id]
+    outputs.clear()
+    assert plugin.get_owned(public_key) == []
+    assert (plugin.owner_index.hits, plugin.owner_index.misses) == (0, 2)
+
+
 def test_get_status(plugin, created_manifestation_id):
     # Poll BigchainDB for the initial status
     poll_result(
@@ -95,6 +206,60 @@ def test_get_status(plugin, created_manifestation_id):
         lambda result: result['status'] == 'valid')
 
 
+def test_get_statuses(monkeypatch, plugin, persisted_manifestation):
+    from bigchaindb_driver.exceptions import NotFoundError
+    from coalaip.exceptions import EntityNotFoundError
+    status = plugin.driver.transactions.status
+
+    def mock_status(tx_id, *args, **kwargs):
+        if tx_id == 'missing_id':
+            raise NotFoundError()
+        return status(tx_id, *args, **kwargs)
+    monkeypatch.setattr(plugin.driver.transactions, 'status', mock_status)
+
+    results = plugin.get_statuses([persisted_manifestation['id'],
+                                   'missing_id'])
+    assert results[0].result['status'] == 'valid'
+    assert results[0].error is None
+    assert results[1].result is None
+    assert isinstance(results[1].error, EntityNotFoundError)
+
+
+def test_wait_until_valid(plugin, manifestation_model_jsonld,
+                          manifestation_model_json, alice_keypair):
+    results = plugin.save_many(
+        [manifestation_model_jsonld, manifestation_model_json],
+        user=alice_keypair)
+    tx_ids = [tx_id for tx_id, _ in results]
+
+    statuses = plugin.wait_until_valid(tx_ids, timeout=30)
+    assert list(statuses.items()) == [(tx_id, 'valid') for tx_id in tx_ids]
+
+
+def test_wait_until_valid_stops_at_timeout(monkeypatch, plugin):
+    from bigchaindb_driver.exceptions import NotFoundError
+    polled_ids = []
+
+    def mock_status(tx_id, *args, **kwargs):
+        polled_ids.append(tx_id)
+        if tx_id == 'missing_id':
+            raise NotFoundError()
+        return {'status': 'valid' if tx_id == 'valid_id' else 'backlog'}
+    monkeypatch.setattr(plugin.driver.transactions, 'status', mock_status)
+
+    statuses = plugin.wait_until_valid(
+        ['valid_id', 'backlog_id', 'missing_id'], timeout=0.5,
+        initial_interval=0.1)
+    assert statuses == {
+        'valid_id': 'valid',
+        'backlog_id': 'backlog',
+        'missing_id': None,
+    }
+    # Settled entities are only polled once
+    assert polled_ids.count('valid_id') == 1
+    assert polled_ids.count('backlog_id') > 1
+
+
 @mark.parametrize('model_name', [
     'manifestation_model_jsonld',
     'manifestation_model_json'
@@ -113,6 +278,43 @@ def test_save_model(plugin, bdb_driver, model_name, alice_keypair, request):
     assert tx_recipients[0] == alice_keypair['public_key']
 
 
+def test_save_many(plugin, bdb_driver, manifestation_model_jsonld,
+                   manifestation_model_json, alice_keypair):
+    models_data = [manifestation_model_jsonld, manifestation_model_json]
+    results = plugin.save_many(models_data, user=alice_keypair)
+
+    assert len(results) == len(models_data)
+    for model_data, (tx_id, error) in zip(models_data, results):
+        assert error is None
+        tx = poll_bdb_transaction(bdb_driver, tx_id)
+        assert tx['asset']['data'] == model_data
+        assert tx['outputs'][0]['public_keys'][0] == alice_keypair['public_key']
+
+
+def test_save_many_reports_errors_per_item(monkeypatch, plugin,
+                                           manifestation_model_jsonld,
+                                           manifestation_model_json,
+                                           alice_keypair):
+    from bigchaindb_driver.exceptions import TransportError
+    from coalaip.exceptions import EntityCreationError
+    send = plugin.driver.transactions.send
+
+    def mock_send(tx, *args, **kwargs):
+        if tx['asset']['data'] == manifestation_model_json:
+            raise TransportError()
+        return send(tx, *args, **kwargs)
+    monkeypatch.setattr(plugin.driver.transactions, 'send', mock_send)
+
+    results = plugin.save_many(
+        [manifestation_model_jsonld, manifestation_model_json],
+        user=alice_keypair)
+
+    assert isinstance(results[0].result, str)
+    assert results[0].error is None
+    assert results[1].result is None
+    assert isinstance(results[1].error, EntityCreationError)
+
+
 def test_load_model(plugin, persisted_manifestation):
     tx_id = persisted_manifestation['id']
     loaded_transaction = plugin.load(tx_id)
@@ -126,6 +328,214 @@ def test_load_transfer_rights_assignment_model(
     assert loaded_rights_assignment == transferred_manifestation_tx['metadata']
 
 
+def test_load_caches_valid_transactions(monkeypatch, cached_plugin,
+                                        persisted_manifestation):
+    tx_id = persisted_manifestation['id']
+    assert cached_plugin.load(tx_id) == persisted_manifestation['asset']['data']
+
+    def mock_driver_error(*args, **kwargs):
+        raise Exception()
+    monkeypatch.setattr(cached_plugin.driver.transactions, 'retrieve',
+                        mock_driver_error)
+
+    # Loading again should not hit BigchainDB
+    assert cached_plugin.load(tx_id) == persisted_manifestation['asset']['data']
+    assert cached_plugin.tx_cache.hits == 1
+
+
+def test_load_does_not_share_cached_data(cached_plugin,
+                                         persisted_manifestation):
+    tx_id = persisted_manifestation['id']
+    expected_data = persisted_manifestation['asset']['data']
+
+    cached_plugin.load(tx_id)['name'] = 'mutated'
+    cached_data = cached_plugin.load(tx_id)
+    assert cached_data == expected_data
+    cached_data['name'] = 'mutated'
+    assert cached_plugin.load(tx_id) == expected_data
+    assert cached_plugin.tx_cache.hits == 2
+
+
+def test_load_does_not_share_coalesced_data(monkeypatch, bdb_node,
+                                            persisted_manifestation):
+    from concurrent.futures import ThreadPoolExecutor
+    from threading import Event
+    from coalaip_bigchaindb import Plugin
+    plugin = Plugin(bdb_node, coalesce_reads=True)
+    tx_id = persisted_manifestation['id']
+    retrieve = plugin.driver.transactions.retrieve
+    release = Event()
+
+    def mock_retrieve(tx_id):
+        release.wait(5)
+        return retrieve(tx_id)
+    monkeypatch.setattr(plugin.driver.transactions, 'retrieve', mock_retrieve)
+
+    with ThreadPoolExecutor(2) as executor:
+        futures = [executor.submit(plugin.load, tx_id) for _ in range(2)]
+        poll_result(lambda: plugin.single_flight.shared,
+                    lambda shared: shared == 1, interval=0.1)
+        release.set()
+        first_data, second_data = [future.result() for future in futures]
+
+    first_data['name'] = 'mutated'
+    assert second_data == persisted_manifestation['asset']['data']
+
+
+def test_load_does_not_cache_undecided_transactions(monkeypatch,
+                                                    cached_plugin,
+                                                    persisted_manifestation):
+    tx_id = persisted_manifestation['id']
+    monkeypatch.setattr(cached_plugin.driver.transactions, 'status',
+                        lambda *args, **kwargs: {'status': 'undecided'})
+
+    cached_plugin.load(tx_id)
+    assert tx_id not in cached_plugin.tx_cache
+
+
+def test_load_many(monkeypatch, plugin, persisted_manifestation,
+                   transferred_manifestation_tx):
+    from coalaip.exceptions import EntityNotFoundError
+    create_tx_id = persisted_manifestation['id']
+    transfer_tx_id = transferred_manifestation_tx['id']
+    retrieve = plugin.driver.transactions.retrieve
+    requests = []
+
+    def mock_retrieve(tx_id):
+        requests.append(tx_id)
+        return retrieve(tx_id)
+    monkeypatch.setattr(plugin.driver.transactions, 'retrieve', mock_retrieve)
+
+    results = plugin.load_many([transfer_tx_id, 'missing_id', create_tx_id,
+                                transfer_tx_id])
+    assert [result for result, _ in results] == [
+        transferred_manifestation_tx['metadata'],
+        None,
+        persisted_manifestation['asset']['data'],
+        transferred_manifestation_tx['metadata'],
+    ]
+    assert isinstance(results[1].error, EntityNotFoundError)
+    assert [error for _, error in results[::2]] == [None, None]
+    assert sorted(requests) == sorted([transfer_tx_id, 'missing_id',
+                                       create_tx_id])
+
+    # Repeated ids get their own copies of the data
+    results[0].result['transferContract'] = 'mutated'
+    assert results[3].result == transferred_manifestation_tx['metadata']
+
+
+def test_load_many_without_ids(plugin):
+    assert plugin.load_many([]) == []
+
+
+def test_load_uses_transaction_store_across_restarts(
+        monkeypatch, tmpdir, bdb_node, persisted_manifestation):
+    from coalaip_bigchaindb import Plugin
+    from coalaip_bigchaindb.store import TransactionStore
+    store_path = str(tmpdir.join('transactions.sqlite'))
+    tx_id = persisted_manifestation['id']
+
+    plugin = Plugin(bdb_node, tx_store=TransactionStore(store_path))
+    assert plugin.load(tx_id) == persisted_manifestation['asset']['data']
+    plugin.close()
+
+    def mock_driver_error(*args, **kwargs):
+        raise Exception()
+
+    # A restarted plugin should not hit BigchainDB
+    plugin = Plugin(bdb_node, tx_store=TransactionStore(store_path))
+    monkeypatch.setattr(plugin.driver.transactions, 'retrieve',
+                        mock_driver_error)
+    assert plugin.load(tx_id) == persisted_manifestation['asset']['data']
+    assert plugin.tx_store.hits == 1
+    plugin.close()
+
+
+def test_get_history_after_load_with_transaction_store(
+        tmpdir, bdb_node, transferred_manifestation_tx, alice_keypair, bob_keypair):
+    from coalaip_bigchaindb import Plugin
+    from coalaip_bigchaindb.store import TransactionStore
+    entity_id = transferred_manifestation_tx['asset']['id']
+    transfer_tx_id = transferred_manifestation_tx['id']
+    plugin = Plugin(bdb_node, tx_store=TransactionStore(
+        str(tmpdir.join('transactions.sqlite'))))
+
+    # Only the loaded TRANSFER is stored, which must not cut the
+    # entity's history short
+    assert plugin.load(transfer_tx_id) == (
+        transferred_manifestation_tx['metadata'])
+    assert plugin.get_history(entity_id) == [
+        {'user': {'public_key': alice_keypair['public_key'],
+                  'private_key': None},
+         'event_id': entity_id},
+        {'user': {'public_key': bob_keypair['public_key'],
+                  'private_key': None},
+         'event_id': transfer_tx_id},
+    ]
+
+    # Fetched histories are not written to the store
+    assert len(plugin.tx_store) == 1
+    assert entity_id not in plugin.tx_store
+    plugin.close()
+
+
+def test_load_coalesces_concurrent_reads(monkeypatch, bdb_node,
+                                         persisted_manifestation):
+    from concurrent.futures import ThreadPoolExecutor
+    from threading import Event
+    from coalaip_bigchaindb import Plugin
+    plugin = Plugin(bdb_node, coalesce_reads=True)
+    tx_id = persisted_manifestation['id']
+    retrieve = plugin.driver.transactions.retrieve
+    release = Event()
+    requests = []
+
+    def mock_retrieve(tx_id):
+        requests.append(tx_id)
+        release.wait(5)
+        return retrieve(tx_id)
+    monkeypatch.setattr(plugin.driver.transactions, 'retrieve', mock_retrieve)
+
+    with ThreadPoolExecutor(4) as executor:
+        futures = [executor.submit(plugin.load, tx_id) for _ in range(4)]
+        poll_result(lambda: plugin.single_flight.shared,
+                    lambda shared: shared == 3, interval=0.1)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == [persisted_manifestation['asset']['data']] * 4
+    assert requests == [tx_id]
+
+
+def test_get_history_coalesces_not_found_errors(monkeypatch, bdb_node):
+    from concurrent.futures import ThreadPoolExecutor
+    from threading import Event
+    from bigchaindb_driver.exceptions import NotFoundError
+    from coalaip.exceptions import EntityNotFoundError
+    from coalaip_bigchaindb import Plugin
+    plugin = Plugin(bdb_node, coalesce_reads=True)
+    release = Event()
+    requests = []
+
+    def mock_get(*, asset_id):
+        requests.append(asset_id)
+        release.wait(5)
+        raise NotFoundError()
+    monkeypatch.setattr(plugin.driver.transactions, 'get', mock_get)
+
+    with ThreadPoolExecutor(3) as executor:
+        futures = [executor.submit(plugin.get_history, 'mock_id')
+                   for _ in range(3)]
+        poll_result(lambda: plugin.single_flight.shared,
+                    lambda shared: shared == 2, interval=0.1)
+        release.set()
+        for future in futures:
+            with raises(EntityNotFoundError):
+                future.result()
+
+    assert requests == ['mock_id']
+
+
 @mark.parametrize('model_name', [
     'rights_assignment_model_jsonld',
     'rights_assignment_model_json'
@@ -183,6 +593,135 @@ def test_transfer_can_be_retransferred(plugin, bdb_driver,
     assert second_transfer_tx_recipients[0] == carly_keypair['public_key']
 
 
+def test_transfer_uses_tracked_tip(monkeypatch, cached_plugin, bdb_driver,
+                                   manifestation_model_json, alice_keypair,
+                                   bob_keypair, carly_keypair):
+    def mock_driver_error(*args, **kwargs):
+        raise Exception()
+    monkeypatch.setattr(cached_plugin.driver.transactions, 'get',
+                        mock_driver_error)
+
+    # Neither transfer should need to look up the entity's history
+    entity_id = cached_plugin.save(manifestation_model_json,
+                                   user=alice_keypair)
+    poll_bdb_transaction_valid(bdb_driver, entity_id)
+    to_bob_tx_id = cached_plugin.transfer(entity_id, from_user=alice_keypair,
+                                          to_user=bob_keypair)
+    poll_bdb_transaction_valid(bdb_driver, to_bob_tx_id)
+    to_carly_tx_id = cached_plugin.transfer(entity_id, from_user=bob_keypair,
+                                            to_user=carly_keypair)
+
+    to_carly_tx = poll_bdb_transaction(bdb_driver, to_carly_tx_id)
+    assert to_carly_tx['inputs'][0]['fulfills']['transaction_id'] == to_bob_tx_id
+    assert to_carly_tx['outputs'][0]['public_keys'][0] == carly_keypair['public_key']
+
+
+def test_transfer_looks_up_tip_moved_by_another_client(
+        cached_plugin, plugin, bdb_driver, manifestation_model_json,
+        alice_keypair, bob_keypair, carly_keypair):
+    entity_id = cached_plugin.save(manifestation_model_json,
+                                   user=alice_keypair)
+    poll_bdb_transaction_valid(bdb_driver, entity_id)
+    to_bob_tx_id = cached_plugin.transfer(entity_id, from_user=alice_keypair,
+                                          to_user=bob_keypair)
+    poll_bdb_transaction_valid(bdb_driver, to_bob_tx_id)
+
+    # Another plugin moves the entity on, leaving the tracked tip behind
+    to_carly_tx_id = plugin.transfer(entity_id, from_user=bob_keypair,
+                                     to_user=carly_keypair)
+    poll_bdb_transaction_valid(bdb_driver, to_carly_tx_id)
+
+    to_alice_tx_id = cached_plugin.transfer(entity_id,
+                                            from_user=carly_keypair,
+                                            to_user=alice_keypair)
+    to_alice_tx = poll_bdb_transaction(bdb_driver, to_alice_tx_id)
+    assert to_alice_tx['inputs'][0]['fulfills']['transaction_id'] == (
+        to_carly_tx_id)
+    assert cached_plugin.tip_cache.peek(entity_id)['id'] == to_alice_tx_id
+
+
+def test_transfer_with_input_tx(monkeypatch, plugin, bdb_driver,
+                                persisted_manifestation, alice_keypair,
+                                bob_keypair):
+    def mock_driver_error(*args, **kwargs):
+        raise Exception()
+    monkeypatch.setattr(plugin.driver.transactions, 'get', mock_driver_error)
+
+    entity_id = persisted_manifestation['id']
+    transfer_tx_id = plugin.transfer(entity_id, from_user=alice_keypair,
+                                     to_user=bob_keypair,
+                                     input_tx=persisted_manifestation)
+
+    transfer_tx = poll_bdb_transaction(bdb_driver, transfer_tx_id)
+    assert transfer_tx['inputs'][0]['fulfills']['transaction_id'] == entity_id
+
+
+def test_transfer_raises_entity_transfer_error_on_conflicting_input_tx(
+        plugin, created_manifestation, bob_keypair, carly_keypair):
+    from coalaip.exceptions import EntityTransferError
+    entity_id = created_manifestation['id']
+
+    with raises(EntityTransferError):
+        # Bob does not own the created manifestation
+        plugin.transfer(entity_id, from_user=bob_keypair,
+                        to_user=carly_keypair,
+                        input_tx=created_manifestation)
+
+    with raises(EntityTransferError):
+        plugin.transfer('another_entity_id', from_user=bob_keypair,
+                        to_user=carly_keypair,
+                        input_tx=created_manifestation)
+
+
+def test_transfer_raises_entity_transfer_error_on_stale_tip(
+        cached_plugin, bdb_driver, persisted_manifestation, alice_keypair,
+        bob_keypair, carly_keypair):
+    from coalaip.exceptions import EntityTransferError
+    entity_id = persisted_manifestation['id']
+    cached_plugin.tip_cache.put(entity_id, persisted_manifestation)
+    transfer_tx_id = cached_plugin.transfer(entity_id,
+                                            from_user=alice_keypair,
+                                            to_user=bob_keypair)
+    poll_bdb_transaction_valid(bdb_driver, transfer_tx_id)
+
+    # Reset the tracked tip to the already spent CREATE transaction
+    cached_plugin.tip_cache.put(entity_id, persisted_manifestation)
+    with raises(EntityTransferError):
+        cached_plugin.transfer(entity_id, from_user=alice_keypair,
+                               to_user=carly_keypair)
+    assert entity_id not in cached_plugin.tip_cache
+
+
+@mark.parametrize('error', [
+    'connection_error',
+    'server_error',
+])
+def test_transfer_keeps_tip_on_network_error(monkeypatch, cached_plugin,
+                                             persisted_manifestation,
+                                             alice_keypair, bob_keypair,
+                                             error):
+    from bigchaindb_driver.exceptions import ConnectionError, TransportError
+    from coalaip.exceptions import EntityTransferError
+    error = {
+        'connection_error': ConnectionError(),
+        'server_error': TransportError(503, 'Service Unavailable', {}),
+    }[error]
+    entity_id = persisted_manifestation['id']
+    cached_plugin.tip_cache.put(entity_id, persisted_manifestation)
+
+    def mock_driver_error(*args, **kwargs):
+        raise error
+    monkeypatch.setattr(cached_plugin.driver.transactions, 'send',
+                        mock_driver_error)
+
+    with raises(EntityTransferError) as excinfo:
+        cached_plugin.transfer(entity_id, from_user=alice_keypair,
+                               to_user=bob_keypair)
+    assert excinfo.value.error is error
+    assert 'stale' not in str(excinfo.value)
+    assert cached_plugin.tip_cache.peek(entity_id) == persisted_manifestation
+
+
 ###########################
 # Transaction error tests #
 ###########################
@@ -371,3 +910,82 @@ def test_transfer_raises_persistence_error_on_error(
 
     with raises(PersistenceError):
         plugin.transfer(tx_id, from_user=alice_keypair, to_user=bob_keypair)
+
+
+def test_transfer_many(plugin, bdb_driver, manifestation_model_jsonld,
+                       manifestation_model_json, rights_assignment_model_json,
+                       alice_keypair, bob_keypair):
+    from coalaip.exceptions import EntityNotFoundError, EntityTransferError
+
+    persist_ids = [
+        result.result for result in plugin.save_many(
+            [manifestation_model_jsonld, manifestation_model_json],
+            user=alice_keypair)]
+    plugin.wait_until_valid(persist_ids)
+
+    results = plugin.transfer_many([
+        (persist_ids[0], rights_assignment_model_json, alice_keypair,
+         bob_keypair),
+        (persist_ids[1], None, alice_keypair, bob_keypair),
+        ('nonexistent', None, alice_keypair, bob_keypair),
+        (persist_ids[0], None, alice_keypair, bob_keypair),
+    ])
+
+    assert len(results) == 4
+    for persist_id, (transfer_tx_id, error) in zip(persist_ids, results):
+        assert error is None
+        transfer_tx = poll_bdb_transaction(bdb_driver, transfer_tx_id)
+        assert transfer_tx['asset']['id'] == persist_id
+        assert transfer_tx['outputs'][0]['public_keys'] == [
+            bob_keypair['public_key']]
+    assert bdb_driver.transactions.retrieve(results[0].result)[
+        'metadata'] == rights_assignment_model_json
+    assert isinstance(results[2].error, EntityNotFoundError)
+    # Each entity can only be transferred once per batch
+    assert isinstance(results[3].error, EntityTransferError)
+
+
+def test_transfer_many_reports_errors_per_item(plugin,
+                                               persisted_manifestation,
+                                               bob_keypair, carly_keypair):
+    from coalaip.exceptions import EntityTransferError
+
+    results = plugin.transfer_many([
+        (persisted_manifestation['id'], None, bob_keypair, carly_keypair),
+    ])
+
+    # Bob does not own the entity, so cannot sign its transfer
+    assert results[0].result is None
+    assert isinstance(results[0].error, EntityTransferError)
+
+
+def test_transfer_chain(plugin, persisted_manifestation, alice_keypair,
+                        bob_keypair, carly_keypair,
+                        rights_assignment_model_json):
+    entity_id = persisted_manifestation['id']
+    transfer_tx_ids = plugin.transfer_chain(entity_id, [
+        (rights_assignment_model_json, alice_keypair, bob_keypair),
+        (None, bob_keypair, carly_keypair),
+    ])
+    assert len(transfer_tx_ids) == 2
+    plugin.wait_until_valid(transfer_tx_ids[-1:])
+
+    history = plugin.get_history(entity_id)
+    assert [event['event_id'] for event in history] == [
+        entity_id] + transfer_tx_ids
+    assert history[-1]['user']['public_key'] == carly_keypair['public_key']
+    assert plugin.load(transfer_tx_ids[0]) == rights_assignment_model_json
+
+
+def test_transfer_chain_requires_chain_of_owners(plugin,
+                                                 persisted_manifestation,
+                                                 alice_keypair, bob_keypair,
+                                                 carly_keypair):
+    from coalaip.exceptions import EntityTransferError
+
+    with raises(EntityTransferError):
+        plugin.transfer_chain(persisted_manifestation['id'], [
+            (None, alice_keypair, bob_keypair),
+            (None, carly_keypair, alice_keypair),
+        ])
+    assert plugin.transfer_chain(persisted_manifestation['id'], []) == []
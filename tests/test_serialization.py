@@ -0,0 +1,90 @@
+from hypothesis import given, settings, strategies as st
+from pytest import importorskip, mark, raises
+
+
+def json_values(scalars):
+    return st.recursive(
+        scalars,
+        lambda children: (st.lists(children, max_size=4) |
+                          st.dictionaries(st.text(), children, max_size=4)),
+        max_leaves=20)
+
+
+json_scalars = (st.none() | st.booleans() | st.text() |
+                st.integers(min_value=-2 ** 63, max_value=2 ** 63 - 1))
+json_floats = st.floats(allow_nan=False, allow_infinity=False)
+
+
+def reference_serialize(data):
+    from bigchaindb.common.utils import serialize
+    return serialize(data)
+
+
+@given(json_values(json_scalars))
+def test_serialize_json_matches_reference(data):
+    from coalaip_bigchaindb.serialization import serialize_json
+    assert serialize_json(data) == reference_serialize(data)
+
+
+@given(json_values(json_scalars | json_floats))
+def test_serialize_rapidjson_matches_reference(data):
+    importorskip('rapidjson')
+    from coalaip_bigchaindb.serialization import serialize_rapidjson
+    assert serialize_rapidjson(data) == reference_serialize(data)
+
+
+@mark.parametrize('data', [
+    '\x00\x0b\x1f',
+    {'\x1b': ['\\u001b', '\\\x1b', '\\\\\x0f']},
+])
+def test_serialize_json_escapes_control_characters(data):
+    from coalaip_bigchaindb.serialization import serialize_json
+    assert serialize_json(data) == reference_serialize(data)
+
+
+@mark.parametrize('data', [1.5, {'a': [0.1]}, {1: 'a'}])
+def test_serialize_json_rejects_unsupported_values(data):
+    from coalaip_bigchaindb.serialization import serialize_json
+    with raises(TypeError):
+        serialize_json(data)
+
+
+@settings(max_examples=50)
+@given(asset_data=json_values(json_scalars),
+       metadata=st.none() | st.dictionaries(st.text(),
+                                            json_values(json_scalars),
+                                            max_size=4))
+def test_builder_ids_match_reference(asset_data, metadata):
+    from bigchaindb.common.crypto import hash_data
+    from bigchaindb_driver.crypto import generate_keypair
+    from coalaip_bigchaindb.builder import prepare_transaction
+    from coalaip_bigchaindb.serialization import transaction_id
+
+    def reference_id(tx):
+        body = {key: value for key, value in tx.items() if key != 'id'}
+        body['inputs'] = [dict(input_, fulfillment=None)
+                          for input_ in tx['inputs']]
+        return hash_data(reference_serialize(body))
+
+    alice_public_key = generate_keypair().public_key
+    bob_public_key = generate_keypair().public_key
+
+    create_tx = prepare_transaction(signers=alice_public_key,
+                                    asset={'data': asset_data},
+                                    metadata=metadata)
+    assert create_tx['id'] == reference_id(create_tx)
+    assert transaction_id(create_tx) == create_tx['id']
+
+    transfer_tx = prepare_transaction(
+        operation='TRANSFER',
+        inputs={
+            'fulfillment': create_tx['outputs'][0]['condition']['details'],
+            'fulfills': {'transaction_id': create_tx['id'],
+                         'output_index': 0},
+            'owners_before': create_tx['outputs'][0]['public_keys'],
+        },
+        recipients=bob_public_key,
+        asset={'id': create_tx['id']},
+        metadata=metadata)
+    assert transfer_tx['id'] == reference_id(transfer_tx)
+    assert transaction_id(transfer_tx) == transfer_tx['id']
@@ -0,0 +1,74 @@
+from pytest import fixture
+
+
+@fixture
+def signing_pool():
+    from coalaip_bigchaindb.signing import SigningPool
+    signing_pool = SigningPool(2, chunksize=2)
+    yield signing_pool
+    signing_pool.close()
+
+
+def test_signing_pool_fulfills_in_order(signing_pool, bdb_driver,
+                                        alice_keypair, bob_keypair):
+    txs = [bdb_driver.transactions.prepare(
+        operation='CREATE',
+        signers=keypair['public_key'],
+        asset={'data': {'index': index}})
+        for index, keypair in enumerate([alice_keypair, bob_keypair] * 3)]
+    private_keys = [alice_keypair['private_key'],
+                    bob_keypair['private_key']] * 3
+
+    results = signing_pool.fulfill_many(zip(txs, private_keys))
+
+    assert len(results) == len(txs)
+    for tx, private_key, result in zip(txs, private_keys, results):
+        fulfilled_tx, error = result
+        assert error is None
+        assert fulfilled_tx == bdb_driver.transactions.fulfill(
+            tx, private_keys=private_key)
+
+    stats = signing_pool.stats()
+    assert stats['signed'] == len(txs)
+    assert stats['failed'] == 0
+    assert stats['throughput'] > 0
+
+
+def test_signing_pool_reports_errors_per_item(signing_pool, bdb_driver,
+                                              alice_keypair, bob_keypair):
+    tx = bdb_driver.transactions.prepare(
+        operation='CREATE',
+        signers=alice_keypair['public_key'])
+
+    results = signing_pool.fulfill_many([
+        (tx, alice_keypair['private_key']),
+        (tx, bob_keypair['private_key']),
+    ])
+
+    assert results[0].error is None
+    assert results[1].result is None
+    assert isinstance(results[1].error, Exception)
+    assert signing_pool.stats()['failed'] == 1
+
+
+def test_save_many_with_signing_pool(bdb_node, manifestation_model_jsonld,
+                                     manifestation_model_json, alice_keypair,
+                                     bob_keypair):
+    from coalaip.exceptions import PersistenceError
+    from coalaip_bigchaindb import Plugin
+    plugin = Plugin(bdb_node, signing_workers=2)
+    try:
+        results = plugin.save_many(
+            [manifestation_model_jsonld, manifestation_model_json],
+            user=alice_keypair)
+        failed_results = plugin.save_many(
+            [manifestation_model_json],
+            user={'public_key': alice_keypair['public_key'],
+                  'private_key': bob_keypair['private_key']})
+    finally:
+        plugin.close()
+
+    assert [error for _, error in results] == [None, None]
+    assert all(isinstance(tx_id, str) for tx_id, _ in results)
+    assert isinstance(failed_results[0].error, PersistenceError)
+    assert plugin.signing_pool.stats()['signed'] == 2
@@ -0,0 +1,50 @@
+from pytest import fixture
+
+
+@fixture
+def store_path(tmpdir):
+    return str(tmpdir.join('transactions.sqlite'))
+
+
+@fixture
+def create_tx():
+    return {'id': 'create-1', 'operation': 'CREATE', 'inputs': [],
+            'asset': {'data': {'name': 'Ünïcödé'}}}
+
+
+@fixture
+def transfer_tx(create_tx):
+    return {'id': 'transfer-1', 'operation': 'TRANSFER', 'inputs': [],
+            'asset': {'id': create_tx['id']}}
+
+
+def test_store_persists_transactions(store_path, create_tx, transfer_tx):
+    from coalaip_bigchaindb.store import TransactionStore
+    store = TransactionStore(store_path)
+    store.put(create_tx)
+    store.put(transfer_tx)
+    # Storing a transaction again is a no-op
+    store.put(create_tx)
+    store.close()
+
+    # Transactions survive reopening the store (e.g. after a restart)
+    store = TransactionStore(store_path)
+    assert len(store) == 2
+    assert transfer_tx['id'] in store
+    assert store.get(create_tx['id']) == create_tx
+    assert store.get('unknown') is None
+    assert (store.hits, store.misses) == (1, 1)
+    store.close()
+
+
+def test_store_clear(store_path, create_tx):
+    from coalaip_bigchaindb.store import TransactionStore
+    store = TransactionStore(store_path)
+    store.put(create_tx)
+    assert store.get(create_tx['id']) == create_tx
+
+    store.clear()
+    assert len(store) == 0
+    assert (store.hits, store.misses) == (0, 0)
+    assert store.get(create_tx['id']) is None
+    store.close()
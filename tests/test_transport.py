@@ -0,0 +1,155 @@
+from pytest import raises
+
+
+UNREACHABLE_NODE = 'http://localhost:1'
+
+
+def test_pooled_transport_reuses_connections(bdb_node,
+                                             created_manifestation_id):
+    from coalaip_bigchaindb.transport import PooledTransport
+    transport = PooledTransport(bdb_node, pool_maxsize=2)
+    path = '/api/v1/transactions/{}'.format(created_manifestation_id)
+
+    for _ in range(3):
+        tx = transport.forward_request('GET', path=path)
+        assert tx['id'] == created_manifestation_id
+
+    stats = transport.pool_stats()[bdb_node]
+    assert stats['requests'] == 3
+    assert stats['errors'] == 0
+    assert stats['in_flight'] == 0
+    assert stats['connections_opened'] == 1
+    assert stats['idle_connections'] == 1
+
+
+def test_pooled_transport_maps_http_errors(bdb_node):
+    from bigchaindb_driver.exceptions import NotFoundError
+    from coalaip_bigchaindb.transport import PooledTransport
+    transport = PooledTransport(bdb_node)
+
+    with raises(NotFoundError):
+        transport.forward_request('GET', path='/api/v1/transactions/missing')
+    assert transport.pool_stats()[bdb_node]['errors'] == 1
+
+
+def test_pooled_transport_maps_connection_errors():
+    from bigchaindb_driver.exceptions import ConnectionError
+    from coalaip_bigchaindb.transport import PooledTransport
+    transport = PooledTransport(UNREACHABLE_NODE, timeout=(0.5, 0.5))
+
+    with raises(ConnectionError):
+        transport.forward_request('GET', path='/api/v1/')
+    assert transport.pool_stats()[UNREACHABLE_NODE]['errors'] == 1
+
+
+def test_plugin_passes_connection_options(bdb_node):
+    from coalaip_bigchaindb import Plugin
+    plugin = Plugin(bdb_node, timeout=(1, 5), max_retries=2,
+                    pool_maxsize=4, pool_block=True)
+    connection, = plugin.driver.transport.connections
+
+    assert connection.timeout == (1, 5)
+    assert connection.adapter.max_retries.total == 2
+    assert connection.adapter._pool_maxsize == 4
+    assert connection.adapter._pool_block
+    assert list(plugin.pool_stats()) == [bdb_node]
+
+
+def test_plugin_stats_without_pooled_transport():
+    from functools import partial
+    from coalaip_bigchaindb import Plugin
+    from tests.ledger import FakeLedger, FakeLedgerTransport
+    plugin = Plugin('http://fake-ledger:9984', transport_class=partial(
+        FakeLedgerTransport, ledger=FakeLedger()))
+
+    assert plugin.pool_stats() == {}
+    assert plugin.node_stats() == {}
+    plugin.close()
+
+
+def test_save_raises_entity_creation_error_on_unreachable_node(
+        manifestation_model_json, alice_keypair):
+    from coalaip.exceptions import EntityCreationError
+    from coalaip_bigchaindb import Plugin
+    plugin = Plugin(UNREACHABLE_NODE, timeout=0.5)
+
+    with raises(EntityCreationError):
+        plugin.save(manifestation_model_json, user=alice_keypair)
+
+
+def test_latency_aware_scheduler_prefers_fastest_node():
+    from coalaip_bigchaindb.transport import LatencyAwareScheduler
+    scheduler = LatencyAwareScheduler(['slow', 'fast'], explore_rate=0)
+
+    # Unmeasured nodes are tried first
+    assert scheduler.pick('GET') == 'slow'
+    scheduler.record('slow', latency=0.5, failed=False)
+    assert scheduler.pick('GET') == 'fast'
+    scheduler.record('fast', latency=0.1, failed=False)
+
+    assert scheduler.pick('GET') == 'fast'
+    assert scheduler.stats()['fast']['latency'] == 0.1
+
+
+def test_latency_aware_scheduler_ejects_failing_node():
+    from coalaip_bigchaindb.transport import LatencyAwareScheduler
+    scheduler = LatencyAwareScheduler(['flaky', 'steady'], explore_rate=0,
+                                      cooldown=60)
+    scheduler.record('flaky', latency=0.1, failed=False)
+    scheduler.record('steady', latency=0.2, failed=False)
+    assert scheduler.pick('GET') == 'flaky'
+
+    for _ in range(4):
+        scheduler.record('flaky', latency=0.1, failed=True)
+
+    assert scheduler.stats()['flaky']['ejected']
+    assert scheduler.pick('GET') == 'steady'
+    assert {scheduler.pick('POST') for _ in range(4)} == {'steady'}
+
+
+def test_latency_aware_scheduler_uses_ejected_node_as_last_resort():
+    from coalaip_bigchaindb.transport import LatencyAwareScheduler
+    scheduler = LatencyAwareScheduler(['only'], max_error_rate=0.1)
+    scheduler.record('only', latency=0.1, failed=True)
+
+    assert scheduler.stats()['only']['ejected']
+    assert scheduler.pick('GET') == 'only'
+
+
+def test_latency_aware_transport_fails_over_reads(bdb_node,
+                                                  created_manifestation_id):
+    from coalaip_bigchaindb.transport import PooledTransport
+    transport = PooledTransport(UNREACHABLE_NODE, bdb_node,
+                                latency_aware=True, timeout=0.5,
+                                scheduler_options={'explore_rate': 0})
+    path = '/api/v1/transactions/{}'.format(created_manifestation_id)
+
+    # The unreachable node is tried first, as it has not been measured yet
+    tx = transport.forward_request('GET', path=path)
+    assert tx['id'] == created_manifestation_id
+
+    stats = transport.node_stats()
+    assert stats[UNREACHABLE_NODE]['error_rate'] > 0
+    assert stats[bdb_node]['latency'] is not None
+
+
+def test_pooled_transport_streams_responses(bdb_node,
+                                            created_manifestation_id):
+    import json
+    from coalaip_bigchaindb.transport import PooledTransport
+    transport = PooledTransport(bdb_node)
+    path = '/api/v1/transactions/{}'.format(created_manifestation_id)
+
+    text = ''.join(transport.stream_request('GET', path=path))
+    assert json.loads(text)['id'] == created_manifestation_id
+    assert transport.pool_stats()[bdb_node]['in_flight'] == 0
+
+
+def test_pooled_transport_stream_maps_http_errors(bdb_node):
+    from bigchaindb_driver.exceptions import NotFoundError
+    from coalaip_bigchaindb.transport import PooledTransport
+    transport = PooledTransport(bdb_node)
+
+    with raises(NotFoundError):
+        list(transport.stream_request('GET',
+                                      path='/api/v1/transactions/missing'))
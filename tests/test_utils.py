@@ -1,4 +1,4 @@
-from pytest import raises
+from pytest import mark, raises
 
 
 def test_make_transfer_transaction(bdb_driver, alice_keypair, bob_keypair,
@@ -47,6 +47,35 @@ def test_reraise_as_persistence_error_raises_allowed():
     assert excinfo.value == mock_type_error
 
 
+def test_reraise_as_persistence_error_does_not_rewrap():
+    from coalaip.exceptions import PersistenceError
+    from coalaip_bigchaindb.utils import reraise_as_persistence_error_if_not
+    mock_persistence_error = PersistenceError()
+
+    @reraise_as_persistence_error_if_not(ValueError)
+    def raises_persistence_error():
+        raise mock_persistence_error
+
+    with raises(PersistenceError) as excinfo:
+        raises_persistence_error()
+    assert excinfo.value == mock_persistence_error
+
+
+def test_map_concurrently_keeps_order_and_captures_errors():
+    from coalaip_bigchaindb.utils import map_concurrently
+    mock_value_error = ValueError()
+
+    def invert(num):
+        if num == 0:
+            raise mock_value_error
+        return 1 / num
+
+    results = map_concurrently(invert, [1, 0, 4], max_workers=2)
+    assert [result.result for result in results] == [1, None, 0.25]
+    assert [result.error for result in results] == [
+        None, mock_value_error, None]
+
+
 def test_order_transactions(bdb_driver, alice_keypair, bob_keypair):
     import random
     from coalaip_bigchaindb.utils import make_transfer_tx, order_transactions
@@ -178,3 +207,162 @@ def test_order_transactions_fails_with_missing_tx(bdb_driver, alice_keypair,
             transfer_to_bob_tx,
             transfer_to_alice_tx,
         ])
+
+
+def test_order_transactions_reports_chain_errors(bdb_driver, alice_keypair,
+                                                 bob_keypair, carly_keypair):
+    from coalaip_bigchaindb.exceptions import TransactionChainError
+    from coalaip_bigchaindb.utils import make_transfer_tx, order_transactions
+    create_tx = bdb_driver.transactions.prepare(
+        operation='CREATE',
+        signers=alice_keypair['public_key'])
+    other_create_tx = bdb_driver.transactions.prepare(
+        operation='CREATE',
+        signers=bob_keypair['public_key'])
+    transfer_to_bob_tx = make_transfer_tx(bdb_driver, input_tx=create_tx,
+                                          recipients=bob_keypair['public_key'])
+    transfer_to_carly_tx = make_transfer_tx(
+        bdb_driver, input_tx=create_tx, recipients=carly_keypair['public_key'])
+    transfer_back_to_alice_tx = make_transfer_tx(
+        bdb_driver, input_tx=transfer_to_bob_tx, recipients=alice_keypair['public_key'])
+
+    def chain_error(transactions):
+        with raises(TransactionChainError) as excinfo:
+            order_transactions(transactions)
+        return excinfo.value
+
+    error = chain_error([create_tx, transfer_to_bob_tx, transfer_to_carly_tx])
+    assert error.reason == TransactionChainError.FORK
+    assert error.transaction_id == transfer_to_carly_tx['id']
+    assert error.parent_id == create_tx['id']
+
+    error = chain_error([create_tx, transfer_to_bob_tx, create_tx])
+    assert error.reason == TransactionChainError.DUPLICATE
+    assert error.transaction_id == create_tx['id']
+
+    error = chain_error([create_tx, other_create_tx])
+    assert error.reason == TransactionChainError.DISJOINT
+    assert error.transaction_id == other_create_tx['id']
+
+    error = chain_error([create_tx, transfer_back_to_alice_tx])
+    assert error.reason == TransactionChainError.MISSING_PARENT
+    assert error.transaction_id == transfer_back_to_alice_tx['id']
+    assert error.parent_id == transfer_to_bob_tx['id']
+
+
+def test_iter_order_transactions_yields_while_streaming(
+        bdb_driver, alice_keypair, bob_keypair):
+    from coalaip_bigchaindb.utils import (
+        iter_order_transactions,
+        make_transfer_tx,
+    )
+    create_tx = bdb_driver.transactions.prepare(
+        operation='CREATE',
+        signers=alice_keypair['public_key'])
+    transfer_to_bob_tx = make_transfer_tx(bdb_driver, input_tx=create_tx,
+                                          recipients=bob_keypair['public_key'])
+    transfer_back_to_alice_tx = make_transfer_tx(
+        bdb_driver, input_tx=transfer_to_bob_tx, recipients=alice_keypair['public_key'])
+    consumed = []
+
+    def stream():
+        for tx in [transfer_back_to_alice_tx, create_tx, transfer_to_bob_tx]:
+            consumed.append(tx)
+            yield tx
+
+    ordered_tx = iter_order_transactions(stream())
+    # The CREATE transaction is yielded as soon as it is seen
+    assert next(ordered_tx) == create_tx
+    assert len(consumed) == 2
+    assert list(ordered_tx) == [transfer_to_bob_tx, transfer_back_to_alice_tx]
+
+
+def test_iter_order_transactions_with_key():
+    from operator import itemgetter
+    from coalaip_bigchaindb.utils import iter_order_transactions
+
+    links = [('c', 'b', 'carly'), ('a', None, 'alice'), ('b', 'a', 'bob')]
+    ordered = iter_order_transactions(links, key=itemgetter(0, 1))
+    assert [owner for _, _, owner in ordered] == ['alice', 'bob', 'carly']
+
+
+@mark.parametrize('chunk_size', [1, 3, 16, 1024])
+def test_iter_json_array(chunk_size):
+    import json
+    from coalaip_bigchaindb.utils import iter_json_array
+
+    array = [{'id': 'a', 'inputs': [{'fulfills': None}]}, 12.5, 'x, ]',
+             [], None]
+    text = json.dumps(array, indent=2)
+    chunks = [text[start:start + chunk_size]
+              for start in range(0, len(text), chunk_size)]
+    assert list(iter_json_array(chunks)) == array
+
+
+@mark.parametrize('text', ['{}', '[1,', '[1 2]', '[1,]', ''])
+def test_iter_json_array_fails_on_invalid_array(text):
+    from coalaip_bigchaindb.utils import iter_json_array
+
+    with raises(ValueError):
+        list(iter_json_array([text]))
+
+
+def test_reraise_as_persistence_error_while_iterating():
+    from coalaip.exceptions import PersistenceError
+    from coalaip_bigchaindb.utils import reraise_as_persistence_error_if_not
+
+    @reraise_as_persistence_error_if_not(KeyError)
+    def generate(error):
+        yield 'first'
+        raise error
+
+    assert next(generate(ValueError())) == 'first'
+    with raises(PersistenceError):
+        list(generate(ValueError()))
+    with raises(KeyError):
+        list(generate(KeyError()))
+
+
+def test_history_event_to_dict():
+    from coalaip_bigchaindb.utils import HistoryEvent
+
+    event = HistoryEvent(public_key='alice', event_id='tx')
+    assert event == ('alice', 'tx')
+    assert event.to_dict() == {
+        'user': {'public_key': 'alice', 'private_key': None},
+        'event_id': 'tx',
+    }
+    assert not hasattr(event, '__dict__')
+
+
+def test_transaction_view(bdb_driver, alice_keypair, bob_keypair):
+    from coalaip_bigchaindb.utils import TransactionView, make_transfer_tx
+
+    create_tx = bdb_driver.transactions.prepare(
+        operation='CREATE',
+        signers=alice_keypair['public_key'])
+    transfer_tx = make_transfer_tx(bdb_driver, input_tx=create_tx,
+                                   recipients=bob_keypair['public_key'])
+
+    view = TransactionView.from_tx(transfer_tx)
+    assert view == (transfer_tx['id'], 'TRANSFER', create_tx['id'],
+                    bob_keypair['public_key'], create_tx['id'])
+    assert view.link() == (transfer_tx['id'], create_tx['id'])
+    assert view.to_event() == (bob_keypair['public_key'], transfer_tx['id'])
+    assert TransactionView.from_tx(create_tx).parent_id is None
+
+
+def test_order_history(bdb_driver, alice_keypair, bob_keypair):
+    from coalaip_bigchaindb.utils import make_transfer_tx, order_history
+
+    create_tx = bdb_driver.transactions.prepare(
+        operation='CREATE',
+        signers=alice_keypair['public_key'])
+    transfer_tx = make_transfer_tx(bdb_driver, input_tx=create_tx,
+                                   recipients=bob_keypair['public_key'])
+
+    events, tip = order_history([transfer_tx, create_tx])
+    assert events == [(alice_keypair['public_key'], create_tx['id']),
+                      (bob_keypair['public_key'], transfer_tx['id'])]
+    assert tip is transfer_tx
+    assert order_history([]) == ([], None)